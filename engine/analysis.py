@@ -0,0 +1,188 @@
+"""
+Position analysis with a persistent result cache.
+
+``Analyser.analyse(position, simulations)`` takes a position in the
+``engine.wire`` text form (FEN, or a connect4 column / move string) and
+returns the best move, the root value from the side to move, the PV and the
+most visited moves.  Results are kept in an ``AnalysisCache`` (SQLite, one
+local file) together with the number of root visits behind them; a request
+is answered from the cache when an entry has at least the visits asked for.
+
+Otherwise the position is searched deeper: the search trees of recently
+analysed positions stay in memory (at most ``trees`` of them, with at most
+``max_nodes`` root visits between them; a visit adds at most one node), so
+asking again for more visits continues the same tree and only runs the
+difference.  A position whose tree has been dropped is searched from scratch.  Either way the entry
+is updated.  Entries are keyed by the position and the search settings
+(value function and its weights' timestamp, policy, ``c``), so a new model
+does not answer from an old model's results.
+
+Requests are capped at ``max_simulations`` and ``max_time`` seconds (also
+the default time limit), and the search runs in short slices so a ``cancel``
+event set by the caller stops it; an entry cut short is stored with the
+visits it reached.  ``complete`` tells whether the visits asked for were
+reached, ``capped`` whether they were cut to ``max_simulations``.
+
+``analysis.hits`` / ``analysis.misses`` count in ``engine.metrics``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional
+
+import engine.mcts as mcts
+from engine import metrics
+from engine import wire
+from engine.search_jobs import summarize_search
+
+
+class AnalysisCache:
+    def __init__(self, path: str | os.PathLike = ":memory:"):
+        self.path = str(path)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute \
+            (
+                "CREATE TABLE IF NOT EXISTS analysis ("
+                " position TEXT, settings TEXT, nodes INTEGER, data TEXT, updated REAL,"
+                " PRIMARY KEY (position, settings))"
+            )
+
+    def get(self, position: str, settings: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT data FROM analysis WHERE position = ? AND settings = ?",
+                                   (position, settings)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # Keeps whichever entry has more visits.
+    def put(self, position: str, settings: str, entry: Dict[str, Any]) -> None:
+        with self._lock, self._db:
+            self._db.execute \
+            (
+                "INSERT INTO analysis VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (position, settings) DO UPDATE SET"
+                " nodes = excluded.nodes, data = excluded.data, updated = excluded.updated"
+                " WHERE excluded.nodes > analysis.nodes",
+                (position, settings, entry["simulations"], json.dumps(entry), time.time()),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class _Tree:
+    def __init__(self, searcher, lane):
+        self.searcher = searcher
+        self.lane = lane
+        self.lock = threading.Lock()
+
+
+class Analyser:
+    SLICE = 0.25        # seconds between checks of the deadline and `cancel`
+
+    def __init__(self, engine, cache: AnalysisCache, *, evaluator: Optional[Callable] = None, trees: int = 32,
+                 max_nodes: int = 2_000_000, workers: int = 2, batch_size: int = 32, max_simulations: int = 1_000_000,
+                 max_time: float = 60.0):
+        self.engine = engine
+        self.cache = cache
+        # evaluator(turn) -> (value for the search, scheduler lane or None),
+        # e.g. SearchJobs.evaluator; defaults to the engine's values.
+        self.evaluator = evaluator or (lambda turn: (engine.values[turn], None))
+        self.trees = trees
+        self.max_nodes = max_nodes
+        self.batch_size = batch_size
+        self.max_simulations = max_simulations
+        self.max_time = max_time
+        self._trees: "OrderedDict[tuple, _Tree]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyse")
+
+    def settings(self, c: float) -> str:
+        cfg = self.engine.config
+        weights = [getattr(v, "_weights_mtime", None) for v in self.engine.values]
+        return json.dumps({"game": cfg["game"], "value": cfg.get("value_function"), "value_args": cfg.get("value", {}),
+                           "policy": cfg.get("policy_function"), "c": c, "weights": weights}, sort_keys=True)
+
+    def submit(self, position: str, simulations: int, c: float = 1.4, time_limit: float = 0.0,
+               cancel: Optional[threading.Event] = None) -> Future:
+        return self._pool.submit(self.analyse, position, simulations, c, time_limit, cancel)
+
+    # `time_limit` 0 means max_time.
+    def analyse(self, position: str, simulations: int, c: float = 1.4, time_limit: float = 0.0,
+                cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        requested, simulations = simulations, min(simulations, self.max_simulations)
+        time_limit = min(time_limit, self.max_time) if time_limit > 0 else self.max_time
+        backend = self.engine.backend
+        state = wire.parse_position(backend, position)
+        key = wire.position_text(backend, state)
+        out = {"position": key}
+        result = self.engine._evaluate(state)
+        if result is not None:
+            return {**out, "result": result, "move": None, "simulations": 0, "cached": False}
+
+        settings = self.settings(c)
+        entry = self.cache.get(key, settings)
+        if entry is not None and entry["simulations"] >= simulations:
+            metrics.add("analysis.hits")
+            return {**out, **entry, "cached": True}
+        metrics.add("analysis.misses")
+
+        tree = self._tree(key, settings, state, c)
+        with tree.lock:
+            searcher = tree.searcher
+            t0 = time.perf_counter()
+            reused = searcher.simulations
+            with tree.lane.running() if tree.lane is not None else nullcontext():
+                while searcher.simulations < simulations and not (cancel is not None and cancel.is_set()):
+                    left = time_limit - (time.perf_counter() - t0)
+                    if left <= 0:
+                        break
+                    searcher.run(simulations - searcher.simulations, min(self.SLICE, left))
+            entry = {**summarize_search(searcher.result()), "result": None}
+        self._trim()
+        entry = json.loads(json.dumps(entry))       # as the cache returns it: moves as lists
+        self.cache.put(key, settings, entry)
+        return {**out, **entry, "cached": False, "reused": reused, "complete": entry["simulations"] >= requested,
+                "capped": requested > simulations, "seconds": time.perf_counter() - t0}
+
+    def _tree(self, key: str, settings: str, state, c: float) -> _Tree:
+        with self._lock:
+            tree = self._trees.get((key, settings))
+            if tree is not None:
+                self._trees.move_to_end((key, settings))
+                return tree
+            value, lane = self.evaluator(state.turn)
+            searcher = mcts.Searcher(state, value, self.engine.policy, self.engine.backend, c, self.batch_size)
+            tree = self._trees[(key, settings)] = _Tree(searcher, lane)
+        self._trim()
+        return tree
+
+    # Drops the least recently used trees (a search still running on one
+    # keeps it until it ends) down to the count and node budgets; a single
+    # tree above the node budget is not kept.
+    def _trim(self) -> None:
+        with self._lock:
+            nodes = sum(tree.searcher.simulations for tree in self._trees.values())
+            while self._trees and (len(self._trees) > self.trees or nodes > self.max_nodes):
+                _, tree = self._trees.popitem(last=False)
+                nodes -= tree.searcher.simulations
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        self._trees.clear()
+        self.cache.close()
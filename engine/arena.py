@@ -0,0 +1,306 @@
+"""
+Engine-vs-engine matches: round-robin tournaments and ratings.
+
+A *player* is a label plus the keyword arguments of its ``Value`` (e.g.
+``{"name": "network_at_path", "model_type": "chess_value", "path": ...}``).
+``Tournament`` schedules every pairing of its players, half the games with each
+colour, across worker processes.  Each worker keeps the Values it has built,
+keyed by label, so games that use the same model share one Value and its
+batching thread.  Finished pairings are cached in a JSON file; re-running with
+extra players only plays the missing games.
+
+``ratings`` fits BayesElo-style ratings: a Bradley-Terry model where draws
+score half a point, a prior of a few virtual draws against a 0-rated
+opponent, a MAP fit by Newton's method and Laplace-approximation confidence
+intervals.
+
+``SPRT`` / ``gate`` decide whether a candidate beats an incumbent with a
+sequential probability ratio test, playing only as many games as needed.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import math
+import multiprocessing as mp
+import os
+import queue
+import signal
+import traceback
+from collections import OrderedDict
+from itertools import combinations
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from engine.selfplay import play_games
+
+ELO_PER_NAT = 400.0 / math.log(10.0)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Playing games
+# ──────────────────────────────────────────────────────────────────────────
+class _ValueCache:
+    def __init__(self, size: int = 8):
+        self.size = size
+        self._values: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, label: str, spec: Dict[str, Any]):
+        from engine.value_functions import Value
+
+        if label in self._values:
+            self._values.move_to_end(label)
+            return self._values[label]
+        spec = dict(spec)
+        value = Value(spec.pop("name"), **spec)
+        self._values[label] = value
+        while len(self._values) > self.size:
+            _, old = self._values.popitem(last=False)
+            old.close()
+        return value
+
+    def close(self):
+        for value in self._values.values():
+            value.close()
+        self._values.clear()
+
+
+# White's score per game: 1 win, 0.5 draw, 0 loss.  Results follow
+# Engine._evaluate: +1 white won, -1 black won, 0 draw.
+def play_pairing(config: dict, white, black, games: int, cache: Optional[_ValueCache] = None) -> List[float]:
+    from engine.engine import Engine
+
+    cache = cache or _ValueCache()
+    engine = Engine(config, value_functions=[cache.get(*white), cache.get(*black)])
+    results = play_games(engine, games)
+    return [(r + 1) / 2 for r in results if r is not None]
+
+
+def _worker(config, task_q, out_q, cache_size):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    cache = _ValueCache(cache_size)
+    while True:
+        task = task_q.get()
+        if task is None:
+            break
+        tid, white, black, games = task
+        try:
+            out_q.put(("result", tid, play_pairing(config, white, black, games, cache)))
+        except Exception:
+            out_q.put(("error", tid, traceback.format_exc()))
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Ratings
+# ──────────────────────────────────────────────────────────────────────────
+def ratings(players: Sequence[str], results: Dict[Tuple[str, str], Tuple[float, int]], *,
+            prior: float = 2.0, z: float = 1.96, iters: int = 100) -> Dict[str, Tuple[float, float]]:
+    """
+    ``results[(a, b)] = (score of a, games)``.  Returns ``{player: (elo,
+    ci)}`` with the mean rating at 0 and ``elo ± ci`` the ``z`` interval.
+    """
+    idx = {p: i for i, p in enumerate(players)}
+    n = len(players)
+    S = np.zeros((n, n))
+    N = np.zeros((n, n))
+    for (a, b), (score, games) in results.items():
+        i, j = idx[a], idx[b]
+        S[i, j] += score
+        S[j, i] += games - score
+        N[i, j] += games
+        N[j, i] += games
+
+    theta = np.zeros(n)
+    for _ in range(iters):
+        diff = theta[:, None] - theta[None, :]
+        p = 1.0 / (1.0 + np.exp(-diff))
+        p0 = 1.0 / (1.0 + np.exp(-theta))
+        grad = (S - N * p).sum(axis=1) + prior * (0.5 - p0)
+        w = N * p * (1 - p)
+        H = w - np.diag(w.sum(axis=1) + prior * p0 * (1 - p0))
+        step = np.linalg.solve(H, grad)
+        theta -= step
+        if np.abs(step).max() < 1e-9:
+            break
+
+    cov = np.linalg.inv(-H)
+    elo = (theta - theta.mean()) * ELO_PER_NAT
+    ci = z * np.sqrt(np.diag(cov)) * ELO_PER_NAT
+    return {p: (float(elo[i]), float(ci[i])) for p, i in idx.items()}
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Tournament
+# ──────────────────────────────────────────────────────────────────────────
+class Tournament:
+    def __init__(self, config: dict, players: Dict[str, Dict[str, Any]], *, games_per_pair: int = 10,
+                 workers: int = 1, cache_path: Optional[str | os.PathLike] = None, values_per_worker: int = 8):
+        self.config = copy.deepcopy(config)
+        self.players = dict(players)
+        self.games_per_pair = games_per_pair
+        self.workers = workers
+        self.values_per_worker = values_per_worker
+        self.cache_path = Path(cache_path) if cache_path else None
+        # Results only carry over between runs with the same search settings.
+        self.settings = json.dumps({k: self.config.get(k) for k in ("game", "mcts", "policy_function")}, sort_keys=True)
+        self.games = self._load_cache()
+
+    # games[(white, black)] = list of white's scores
+    def _load_cache(self) -> Dict[Tuple[str, str], List[float]]:
+        if not self.cache_path or not self.cache_path.exists():
+            return {}
+        with open(self.cache_path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("settings") != self.settings:
+            return {}
+        return {tuple(k.split("|")): v for k, v in data["games"].items()}
+
+    def _save_cache(self) -> None:
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"settings": self.settings, "games": {f"{w}|{b}": v for (w, b), v in self.games.items()}}, fh)
+        os.replace(tmp, self.cache_path)
+
+    def schedule(self) -> List[Tuple[str, str, int]]:
+        tasks = []
+        for a, b in combinations(self.players, 2):
+            for white, black, share in ((a, b, self.games_per_pair // 2),
+                                        (b, a, self.games_per_pair - self.games_per_pair // 2)):
+                missing = share - len(self.games.get((white, black), []))
+                if missing > 0:
+                    tasks.append((white, black, missing))
+        return tasks
+
+    def _record(self, white: str, black: str, scores: List[float], on_result: Optional[Callable]):
+        self.games.setdefault((white, black), []).extend(scores)
+        self._save_cache()
+        if on_result is not None:
+            on_result(white, black, scores)
+
+    def run(self, on_result: Optional[Callable] = None) -> Dict[str, Tuple[float, float]]:
+        tasks = self.schedule()
+        spec = lambda label: (label, self.players[label])
+        if self.workers <= 1:
+            cache = _ValueCache(self.values_per_worker)
+            for white, black, games in tasks:
+                self._record(white, black, play_pairing(self.config, spec(white), spec(black), games, cache), on_result)
+            return self.ratings()
+
+        ctx = mp.get_context("spawn")
+        task_q, out_q = ctx.Queue(), ctx.Queue()
+        procs = [ctx.Process(target=_worker, args=(self.config, task_q, out_q, self.values_per_worker), daemon=True)
+                 for _ in range(min(self.workers, len(tasks)))]
+        for p in procs:
+            p.start()
+        # Grouping by white player keeps a worker's Values warm across tasks.
+        for tid, (white, black, games) in sorted(enumerate(tasks), key=lambda t: t[1][:2]):
+            task_q.put((tid, spec(white), spec(black), games))
+
+        errors = []
+        try:
+            for _ in range(len(tasks)):
+                while True:
+                    try:
+                        kind, tid, payload = out_q.get(timeout=0.5)
+                        break
+                    except queue.Empty:
+                        if not all(p.is_alive() for p in procs):
+                            raise RuntimeError("tournament worker exited unexpectedly")
+                if kind == "error":
+                    errors.append(payload)
+                    continue
+                white, black, _ = tasks[tid]
+                self._record(white, black, payload, on_result)
+        finally:
+            for _ in procs:
+                task_q.put(None)
+            for p in procs:
+                p.join(timeout=10)
+                if p.is_alive():
+                    p.terminate()
+        if errors:
+            raise RuntimeError("tournament games failed\n" + "\n".join(errors))
+        return self.ratings()
+
+    def ratings(self, **kwargs) -> Dict[str, Tuple[float, float]]:
+        results = {}
+        for (white, black), scores in self.games.items():
+            if white in self.players and black in self.players:
+                results[(white, black)] = (sum(scores), len(scores))
+        return ratings(list(self.players), results, **kwargs)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Sequential testing
+# ──────────────────────────────────────────────────────────────────────────
+def elo_to_score(elo: float) -> float:
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+class SPRT:
+    """
+    H0: candidate is ``elo0`` stronger, H1: ``elo1`` stronger.  Uses the
+    normal approximation of the generalised SPRT on the trinomial (W/D/L)
+    score, with half a virtual game of each outcome so that a short run of
+    identical results cannot end the test on its own.
+    """
+
+    def __init__(self, elo0: float = 0.0, elo1: float = 30.0, alpha: float = 0.05, beta: float = 0.05):
+        self.s0, self.s1 = elo_to_score(elo0), elo_to_score(elo1)
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.wdl = [0, 0, 0]
+
+    def update(self, score: float) -> None:
+        self.wdl[0 if score == 1 else 1 if score == 0.5 else 2] += 1
+
+    @property
+    def games(self) -> int:
+        return sum(self.wdl)
+
+    def llr(self) -> float:
+        w, d, l = (x + 0.5 for x in self.wdl)
+        n = w + d + l
+        mu = (w + 0.5 * d) / n
+        var = (w * (1 - mu) ** 2 + d * (0.5 - mu) ** 2 + l * mu ** 2) / n
+        return n * (self.s1 - self.s0) * (2 * mu - self.s0 - self.s1) / (2 * var)
+
+    def status(self) -> Optional[str]:
+        llr = self.llr()
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+
+# Plays candidate-vs-incumbent games, alternating colours in rounds of
+# `round_games` per colour, until the SPRT decides or max_games have been
+# played (the last round is cut short to fit).  An undecided test counts as
+# a rejection.
+def gate(config: dict, candidate, incumbent, *, elo0: float = 0.0, elo1: float = 30.0, alpha: float = 0.05,
+         beta: float = 0.05, max_games: int = 400, round_games: Optional[int] = None,
+         on_round: Optional[Callable] = None) -> Tuple[bool, SPRT]:
+    test = SPRT(elo0, elo1, alpha, beta)
+    round_games = round_games or max(1, config.get("threads", 1))
+    cache = _ValueCache(2)
+    played = 0
+    try:
+        while test.status() is None and played < max_games:
+            per_colour = min(round_games, (max_games - played + 1) // 2)
+            for white, black, flip in ((candidate, incumbent, False), (incumbent, candidate, True)):
+                games = min(per_colour, max_games - played)
+                played += games
+                for score in play_pairing(config, white, black, games, cache) if games else ():
+                    test.update(1 - score if flip else score)
+            if on_round is not None:
+                on_round(test)
+    finally:
+        cache.close()
+    return test.status() == "H1", test
@@ -1,16 +1,61 @@
 import yaml
 import importlib
+import threading
+from array import array
 import engine.mcts as mcts
+from engine import metrics, tracing
 from engine.value_functions import Value
 from engine.policy_functions import Policy
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Any, Optional, Sequence, Callable
+from typing import Any, Iterator, Optional, Sequence, Callable
 
+# A game as its initial state and the moves played: the move keys (move[0])
+# flattened into `keys`, `width` numbers per move, and the move scores in
+# `scores`, so a game costs a few bytes per ply instead of a State per ply.
+# States are replayed from `init` when needed (`states(backend)`); len() is
+# the number of positions, 0 once harvested.
 @dataclass
 class History:
-    states: list[Any] = field(default_factory=list)
+    init: Any = None
     result: Optional[int] = None
+    keys: array = field(default_factory=lambda: array("H"))
+    scores: array = field(default_factory=lambda: array("d"))
+    width: int = 0
+    # Root search statistics, aligned with the positions (filled by play_mcts
+    # when config `record_search` is on): visit distribution over the
+    # position's legal moves as float16, and the root Q from the side to
+    # move.  Positions that were not searched hold None / NaN; the lists may
+    # be shorter than the game, missing entries count as not searched.
+    visits: list[Any] = field(default_factory=list)
+    root_q: list[float] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return 0 if self.init is None else len(self.scores) + 1
+
+    def append(self, move) -> None:
+        key = move[0]
+        if isinstance(key, tuple):
+            self.width = len(key)
+            self.keys.extend(key)
+        else:
+            self.width = 1
+            self.keys.append(key)
+        self.scores.append(move[1])
+
+    def move(self, i: int):
+        w = self.width
+        key = tuple(self.keys[i * w:(i + 1) * w]) if w > 1 else self.keys[i]
+        return key, self.scores[i]
+
+    def states(self, backend) -> Iterator[Any]:
+        if self.init is None:
+            return
+        state = self.init
+        yield state
+        for i in range(len(self.scores)):
+            state = backend.play_move(state, self.move(i))
+            yield state
 
 class Engine:
     # ---------------------------------------------------------------------
@@ -34,76 +79,159 @@ class Engine:
                 raise ValueError("value_functions must have length 2")
             self.values = list(value_functions)
 
+        self.record_search = self.config.get('record_search', False)
+        self.profile_search = self.config.get('profile_search', False)
+        self.q_blend = self.config.get('q_blend', 0.0)
+
         init_state = self.backend.create_init_state()
         self.threads = self.config.get('threads', 1)
         self.states = [init_state for _ in range(self.threads)]
-        self.history = [History(states=[init_state], result=None) for _ in range(self.threads)]
+        self.history = [History(init=init_state) for _ in range(self.threads)]
+        self._legal = [None] * self.threads     # move_index of each game's current state
 
+        # value `warm_start`: the network loads in the background; a first
+        # evaluation there takes torch's lazy initialisation off the first search.
+        if self.config.get('value', {}).get('warm_start') and value_functions is None:
+            threading.Thread(target=self.warm_up, name="warm-start", daemon=True).start()
     # ---------------------------------------------------------------------
     #  Basic Functions
     # ---------------------------------------------------------------------
     def add_game(self, init_state=None):
         state = init_state or self.backend.create_init_state()
         self.states.append(state)
-        self.history.append(History(states=[state], result=None))
+        self.history.append(History(init=state))
+        self._legal.append(None)
         return len(self.states) - 1
     
+    # Runs one evaluation through each value function (see `warm_start`).
+    def warm_up(self):
+        for value in {id(v): v for v in self.values}.values():
+            if hasattr(value, "warm_up"):
+                value.warm_up(self.backend)
+
     def get_state(self, idx=0):
         return self.states[idx]
     
     def get_hist(self, idx=0):
-        return list(self.history[idx])
+        return list(self.history[idx].states(self.backend))
     
     # ------------------------------------------------------------------
     #  Dataset Helper
     # ------------------------------------------------------------------
-    def get_dataset(self):
+    # Value targets blend the game outcome z with the recorded root Q:
+    # (1 - q_blend) * z + q_blend * q; states without search keep z.  Q is
+    # clipped to [-1, 1], the value net's range; unbounded evaluators (e.g.
+    # crude_chess_score) make poor Q targets.  With
+    # with_policy=True the visit distributions come back as well, packed as
+    # (float16 values, int64 offsets) so state i owns flat[off[i]:off[i + 1]].
+    def get_dataset(self, compact: bool = False, *, q_blend: Optional[float] = None, with_policy: bool = False):
         import numpy as np
+        encode, _, dtype = self.row_codec(compact)
         state_arrays = []
         labels = []
+        policies = []
 
         for hist_entry in self.history:
-            states_seq = hist_entry.states
-            final_result = hist_entry.result
-            if final_result is None:
+            if hist_entry.result is None or not len(hist_entry):
                 continue
-
-            factor = 0 if final_result == 0 else -1
-            label_entry = []
-            for state in states_seq:
-                arr = self.backend.state_to_tensor(state)
-                state_arrays.append(arr.astype(np.float32))
-                label_entry.append(factor)
-                factor = -factor
-            labels += list(reversed(label_entry))
+            rows, game_labels = self._game_rows(hist_entry, encode, dtype, q_blend)
+            state_arrays.append(rows)
+            labels.append(game_labels)
+            policies.extend(self._game_policies(hist_entry))
 
         if not state_arrays:
-            dummy = self.backend.state_to_tensor(self.backend.create_init_state())
-            empty_states = np.empty((0,) + dummy.shape, dtype=np.float32)
+            dummy = encode(self.backend.create_init_state())
+            empty_states = np.empty((0,) + dummy.shape, dtype=dtype)
             empty_labels = np.empty((0,), dtype=np.float32)
+            if with_policy:
+                return empty_states, empty_labels, self._pack_policies([])
             return empty_states, empty_labels
         
-        states_np = np.stack(state_arrays, axis=0)
-        results_np = np.array(labels, dtype=np.float32)
+        states_np = np.concatenate(state_arrays, axis=0)
+        results_np = np.concatenate(labels, axis=0)
 
+        if with_policy:
+            return states_np, results_np, self._pack_policies(policies)
         return states_np, results_np
 
+    # Training rows for one finished game.  The game's history is released
+    # afterwards, so self-play can stream rows out as games end.
+    def harvest(self, idx, compact: bool = True, *, q_blend: Optional[float] = None):
+        hist = self.history[idx]
+        if hist.result is None:
+            raise ValueError(f"game {idx} is not finished")
+        encode, _, dtype = self.row_codec(compact)
+        rows, labels = self._game_rows(hist, encode, dtype, q_blend)
+        self.history[idx] = History(result=hist.result)
+        return rows, labels
+
+    def _game_rows(self, hist_entry, encode, dtype, q_blend=None):
+        import numpy as np
+        factor = 0 if hist_entry.result == 0 else -1
+        label_entry = []
+        for _ in range(len(hist_entry)):
+            label_entry.append(factor)
+            factor = -factor
+
+        with tracing.span("dataset.rows", cat="dataset", positions=len(hist_entry)):
+            rows = np.stack([encode(state).astype(dtype, copy=False) for state in hist_entry.states(self.backend)], axis=0)
+        labels = np.array(label_entry[::-1], dtype=np.float32)
+
+        blend = self.q_blend if q_blend is None else q_blend
+        if blend and hist_entry.root_q:
+            q = np.full(len(labels), np.nan, dtype=np.float32)
+            q[:len(hist_entry.root_q)] = np.clip(hist_entry.root_q[:len(labels)], -1.0, 1.0)
+            searched = ~np.isnan(q)
+            labels[searched] = (1.0 - blend) * labels[searched] + blend * q[searched]
+        return rows, labels
+
+    def _game_policies(self, hist_entry):
+        visits = list(hist_entry.visits[:len(hist_entry)])
+        return visits + [None] * (len(hist_entry) - len(visits))
+
+    @staticmethod
+    def _pack_policies(policies):
+        import numpy as np
+        sizes = [0 if p is None else len(p) for p in policies]
+        offsets = np.zeros(len(policies) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        parts = [p for p in policies if p is not None]
+        flat = np.concatenate(parts).astype(np.float16) if parts else np.empty(0, dtype=np.float16)
+        return flat, offsets
+
+    # (encode, decode, dtype) for dataset rows.  Compact rows
+    # (backend.state_to_compact) are what the replay buffer stores and are
+    # expanded per batch by backend.compact_to_tensor; backends without an
+    # encoding fall back to float32 planes and an identity decode.
+    def row_codec(self, compact: bool = True):
+        import numpy as np
+        if compact and hasattr(self.backend, "state_to_compact"):
+            return self.backend.state_to_compact, self.backend.compact_to_tensor, np.uint8
+        return self.backend.state_to_tensor, np.asarray, np.float32
+
     # ------------------------------------------------------------------
     #  Game‑play Helpers
     # ------------------------------------------------------------------
+    # Legal moves of `state` by key (move[0]), in the backend's order.
+    def move_index(self, state) -> dict:
+        return {mv[0]: mv for mv in self.backend.get_legal_moves(state)}
+
     def legal_moves(self, idx=0):
-        state = self.states[idx]
-        return self.backend.get_legal_moves(state)
+        return list(self._legal_index(idx).values())
 
+    # Plays the legal move whose key matches move[0], so the score part of
+    # `move` does not matter.
     def play_move(self, move, idx=0):
-        if not self._is_legal(move, idx):
+        move = self._legal_index(idx).get(move[0])
+        if move is None:
             raise ValueError("Illegal move")
-        
+
         new_state = self.backend.play_move(self.states[idx], move)
         self.states[idx] = new_state
+        self._legal[idx] = None
 
         hist = self.history[idx]
-        hist.states.append(new_state)
+        hist.append(move)
         hist.result = self._evaluate(new_state)
         return hist.result
     
@@ -125,12 +253,23 @@ class Engine:
             return terminal_result
 
         value_fn = self.values[state.turn]
-        move = mcts.get_move(state, value_fn, self.policy, self.backend, simulations, c)
-        return self.play_move(move, idx)
+        metrics.add("plies")
+        metrics.add("mcts.simulations", simulations)
+        with tracing.span("engine.play_mcts", game=idx, ply=len(self.history[idx]), simulations=simulations):
+            if not (self.record_search or self.profile_search):
+                move = mcts.get_move(state, value_fn, self.policy, self.backend, simulations, c)
+                return self.play_move(move, idx)
+
+            stats = mcts.search(state, value_fn, self.policy, self.backend, simulations, c, profile=self.profile_search)
+            if self.record_search:
+                self._record_search(self.history[idx], stats)
+            if self.profile_search:
+                self._record_profile(stats["profile"])
+            return self.play_move(stats["move"], idx)
     
     def play_mcts_parallel(self, idxs, simulations=1000, c=1.4, max_workers=None):        
         results = {}
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="play-mcts") as executor:
             futures = {executor.submit(self.play_mcts, idx, simulations, c): idx for idx in idxs}
             for future in futures:
                 idx = futures[future]
@@ -140,7 +279,8 @@ class Engine:
     def reset_all_games(self):
         init_state = self.backend.create_init_state()
         self.states  = [init_state for _ in range(self.threads)]
-        self.history = [History(states=[init_state], result=None) for _ in range(self.threads)]
+        self.history = [History(init=init_state) for _ in range(self.threads)]
+        self._legal  = [None] * self.threads
 
     # ------------------------------------------------------------------
     #  Internal Helpers
@@ -152,10 +292,34 @@ class Engine:
             return 0
         return None
     
-    def _is_legal(self, mv, idx=0) -> bool:
-        fr, fc, tr, tc = mv[0] 
-        return any(legal[0] == (fr, fc, tr, tc) for legal in self.legal_moves(idx))
-    
-            
+    # Stats belong to the current (last) state of the game.
+    @staticmethod
+    def _record_search(hist, stats):
+        import numpy as np
+        pos = len(hist) - 1
+        for seq, missing in ((hist.visits, None), (hist.root_q, float("nan"))):
+            seq.extend([missing] * (pos - len(seq)))
+            del seq[pos:]
+        visits = np.asarray(stats["visits"], dtype=np.float32)
+        total = visits.sum()
+        hist.visits.append((visits / total if total else visits).astype(np.float16))
+        hist.root_q.append(float(stats["root_q"]))
+
+    # Per-search profiles (config `profile_search`) add up in the metrics
+    # counters as mcts.*, across threads and worker processes; max_depth is
+    # summed so that metrics.summarize can report the mean.
+    @staticmethod
+    def _record_profile(profile):
+        counters = {f"mcts.{k}": v for k, v in profile.items() if k != "max_depth"}
+        counters["mcts.max_depth_sum"] = profile["max_depth"]
+        counters["mcts.searches"] = 1
+        metrics.merge(counters)
 
+    def _legal_index(self, idx=0) -> dict:
+        index = self._legal[idx]
+        if index is None:
+            index = self._legal[idx] = self.move_index(self.states[idx])
+        return index
 
+    def _is_legal(self, mv, idx=0) -> bool:
+        return mv[0] in self._legal_index(idx)
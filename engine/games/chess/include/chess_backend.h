@@ -19,7 +19,10 @@ namespace chess
   State play_move(const State &state, const Move &m);
   bool check_win(const State &state);
   bool check_draw(const State &state);
+  bool in_check(const State &state);
   State create_init_state();
   pybind11::array_t<float> state_to_tensor(const State &state);
+  pybind11::array_t<uint8_t> state_to_compact(const State &state);
+  pybind11::array_t<float> compact_to_tensor(pybind11::array_t<uint8_t, pybind11::array::c_style | pybind11::array::forcecast> rows);
   State state_from_fen(const std::string &fen);
 }
\ No newline at end of file
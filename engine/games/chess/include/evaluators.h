@@ -0,0 +1,33 @@
+#pragma once
+#include "state.h"
+#include <Python.h>
+#include <string>
+#include <vector>
+
+// ─── Native evaluator ABI ───────────────────────────────────────────────────
+//
+// Shared with engine/mcts/src/native_eval.h.  An evaluator is handed to MCTS as
+// a PyCapsule named NATIVE_EVALUATOR_CAPSULE.  `unwrap` is called with the GIL
+// held when a node is created and returns a pointer to the C++ State owned by
+// the Python object; `eval(ctx, state)` only touches that pointer and may run
+// without the GIL.  Scores are from the perspective of the side to move.
+
+#define NATIVE_EVALUATOR_CAPSULE "zeroclone.native_evaluator"
+#define NATIVE_EVALUATOR_ABI 1
+
+struct NativeEvaluator
+{
+    int abi_version;
+    const void* ctx;
+    const void* (*unwrap)(PyObject* state);
+    double (*eval)(const void* ctx, const void* state);
+};
+
+namespace chess
+{
+  using EvalFn = double (*)(const State &state);
+
+  void register_evaluator(const std::string &name, EvalFn fn);
+  const NativeEvaluator* find_evaluator(const std::string &name);
+  std::vector<std::string> list_evaluators();
+}
@@ -3,7 +3,7 @@ import pybind11
 
 ext = Extension(
   'chess_backend',
-  sources=['src/bindings_chess.cpp', 'src/chess_backend.cpp'],
+  sources=['src/bindings_chess.cpp', 'src/chess_backend.cpp', 'src/evaluators.cpp'],
   include_dirs=[pybind11.get_include(), 'include'],
   language='c++',
   extra_compile_args=[
@@ -1,6 +1,7 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include "chess_backend.h"
+#include "evaluators.h"
 #include "state.h"
 
 namespace py = pybind11;
@@ -45,6 +46,10 @@ PYBIND11_MODULE(chess_backend, m)
             "Generate all legal moves for a given state");
       m.def("state_to_tensor", &chess::state_to_tensor, py::arg("state"),
             "Convert a State into a NumPy tensor (C×8×8)");
+      m.def("state_to_compact", &chess::state_to_compact, py::arg("state"),
+            "Encode a State as 69 bytes (board, turn, castling flags)");
+      m.def("compact_to_tensor", &chess::compact_to_tensor, py::arg("rows"),
+            "Expand an (N, 69) batch of compact rows into (N, 17, 8, 8) planes");
       m.def("play_move", &chess::play_move, py::arg("state"), py::arg("move"),
             "Apply a move to a state and return the new state");
       m.def("check_win", &chess::check_win, py::arg("state"),
@@ -56,4 +61,43 @@ PYBIND11_MODULE(chess_backend, m)
       m.def("state_from_fen", &chess::state_from_fen, py::arg("fen"),
             "Create a chess State from a FEN string");
 
+      // Native heuristic evaluators (see include/evaluators.h)
+      m.def("list_evaluators", &chess::list_evaluators,
+            "Names of the registered native evaluators");
+      m.def("get_evaluator",
+            [](const std::string &name)
+            {
+                  const NativeEvaluator* ev = chess::find_evaluator(name);
+                  if(!ev) throw py::key_error(name);
+                  return py::capsule(static_cast<const void*>(ev), NATIVE_EVALUATOR_CAPSULE);
+            },
+            py::arg("name"),
+            "Return a capsule MCTS can call directly, without the GIL");
+      m.def("evaluate",
+            [](const std::string &name, const State &state)
+            {
+                  const NativeEvaluator* ev = chess::find_evaluator(name);
+                  if(!ev) throw py::key_error(name);
+                  return ev->eval(ev->ctx, &state);
+            },
+            py::arg("name"), py::arg("state"),
+            "Score a state with a native evaluator (side-to-move perspective)");
+      m.def("evaluate_batch",
+            [](const std::string &name, py::sequence states)
+            {
+                  const NativeEvaluator* ev = chess::find_evaluator(name);
+                  if(!ev) throw py::key_error(name);
+                  std::vector<const State*> ptrs;
+                  ptrs.reserve(py::len(states));
+                  for(auto s: states) ptrs.push_back(&s.cast<const State&>());
+                  std::vector<double> out(ptrs.size());
+                  {
+                        py::gil_scoped_release release;
+                        for(size_t i=0;i<ptrs.size();++i) out[i] = ev->eval(ev->ctx, ptrs[i]);
+                  }
+                  return out;
+            },
+            py::arg("name"), py::arg("states"),
+            "Score a sequence of states with a native evaluator");
+
 }
\ No newline at end of file
@@ -8,6 +8,7 @@
 #include <cmath>
 #include <algorithm>
 #include <sstream>
+#include <stdexcept>
 
 using namespace chess;
 using Move = ::Move;
@@ -399,6 +400,15 @@ State chess::play_move(const State &state,const Move &m)
 	return State(bd,turn,fifty,w_ck,w_cq,b_ck,b_cq,hw,hb);
 }
 
+// ─── Side to move in check ──────────────────────────────────────────────────
+
+bool chess::in_check(const State &state)
+{
+	int kr,kc;
+	find_king(state,state.turn,kr,kc);
+	return kr>=0 && king_attacked(state,kr,kc);
+}
+
 // ─── Check win ───────────────────────────────────────────────────────────────
 
 bool chess::check_win(const State &state)
@@ -520,6 +530,68 @@ pybind11::array_t<float> chess::state_to_tensor(const State &st)
 	return arr;
 }
 
+// ─── Compact encoding ────────────────────────────────────────────────────────
+//
+// 69 bytes per position: 64 board bytes, side to move, then the four castling
+// flags (w_ck, w_cq, b_ck, b_cq).  compact_to_tensor expands a whole batch of
+// rows into the same 17×8×8 planes as state_to_tensor.
+
+static constexpr int COMPACT_LEN = 69;
+
+pybind11::array_t<uint8_t> chess::state_to_compact(const State &st)
+{
+	auto arr = pybind11::array_t<uint8_t>(COMPACT_LEN);
+	uint8_t* out = arr.mutable_data();
+	std::copy(st.board.begin(), st.board.end(), out);
+	out[64] = st.turn;
+	out[65] = st.w_ck;
+	out[66] = st.w_cq;
+	out[67] = st.b_ck;
+	out[68] = st.b_cq;
+	return arr;
+}
+
+pybind11::array_t<float> chess::compact_to_tensor(pybind11::array_t<uint8_t, pybind11::array::c_style | pybind11::array::forcecast> rows)
+{
+	if(rows.ndim()!=2 || rows.shape(1)!=COMPACT_LEN)
+	{
+		throw std::invalid_argument("compact_to_tensor expects an (N, 69) uint8 array");
+	}
+	constexpr int C=17, HW=64;
+	const ssize_t n = rows.shape(0);
+	auto arr = pybind11::array_t<float>({(ssize_t)n,(ssize_t)C,(ssize_t)8,(ssize_t)8});
+	float* out = arr.mutable_data();
+	const uint8_t* in = rows.data();
+
+	int plane_of[256];
+	std::fill(std::begin(plane_of), std::end(plane_of), -1);
+	static constexpr char pieces[12]={'P','N','B','R','Q','K','p','n','b','r','q','k'};
+	for(int pi=0;pi<12;pi++) plane_of[(uint8_t)pieces[pi]] = pi;
+
+	{
+		pybind11::gil_scoped_release release;
+		std::fill(out, out + n*C*HW, 0.0f);
+		for(ssize_t k=0;k<n;k++)
+		{
+			const uint8_t* row = in + k*COMPACT_LEN;
+			float* planes = out + k*C*HW;
+			for(int idx=0;idx<64;idx++)
+			{
+				int pi = plane_of[row[idx]];
+				if(pi>=0) planes[pi*HW + idx] = 1.0f;
+			}
+			const float flags[5] = {row[64]==0 ? 1.0f : 0.0f,
+			                        (float)(row[65]!=0), (float)(row[66]!=0),
+			                        (float)(row[67]!=0), (float)(row[68]!=0)};
+			for(int f=0;f<5;f++)
+			{
+				std::fill(planes + (12+f)*HW, planes + (13+f)*HW, flags[f]);
+			}
+		}
+	}
+	return arr;
+}
+
 // ─── FEN to State ────────────────────────────────────────────────────────────
 
 State chess::state_from_fen(const std::string &fen)
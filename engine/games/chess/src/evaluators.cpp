@@ -0,0 +1,293 @@
+#include "evaluators.h"
+#include "chess_backend.h"
+
+#include <pybind11/pybind11.h>
+#include <cctype>
+#include <cmath>
+#include <map>
+#include <memory>
+#include <mutex>
+
+namespace py = pybind11;
+
+// ─── Registry ───────────────────────────────────────────────────────────────
+
+namespace
+{
+	struct Entry
+	{
+		NativeEvaluator abi;
+		chess::EvalFn fn;
+	};
+
+	const void* unwrap_state(PyObject* obj)
+	{
+		try
+		{
+			return &py::handle(obj).cast<const State&>();
+		}
+		catch(const py::cast_error&)
+		{
+			return nullptr;
+		}
+	}
+
+	double call_entry(const void* ctx,const void* st)
+	{
+		return static_cast<const Entry*>(ctx)->fn(*static_cast<const State*>(st));
+	}
+
+	std::mutex registry_mu;
+	std::map<std::string,std::unique_ptr<Entry>> &registry();
+}
+
+void chess::register_evaluator(const std::string &name,EvalFn fn)
+{
+	std::lock_guard<std::mutex> lock(registry_mu);
+	auto entry = std::make_unique<Entry>();
+	entry->fn = fn;
+	entry->abi = NativeEvaluator{NATIVE_EVALUATOR_ABI, entry.get(), &unwrap_state, &call_entry};
+	registry()[name] = std::move(entry);
+}
+
+const NativeEvaluator* chess::find_evaluator(const std::string &name)
+{
+	std::lock_guard<std::mutex> lock(registry_mu);
+	auto &reg = registry();
+	auto it = reg.find(name);
+	return it==reg.end() ? nullptr : &it->second->abi;
+}
+
+std::vector<std::string> chess::list_evaluators()
+{
+	std::lock_guard<std::mutex> lock(registry_mu);
+	std::vector<std::string> names;
+	for(auto &kv: registry()) names.push_back(kv.first);
+	return names;
+}
+
+// ─── Tables ─────────────────────────────────────────────────────────────────
+//
+// Piece-square tables are written from white's point of view with a8 first,
+// matching the board layout (row 0 = rank 8).  Black pieces read them with the
+// rows mirrored (idx ^ 56).
+
+static constexpr int PST[6][64] = {
+	{ // pawn
+	  0,  0,  0,  0,  0,  0,  0,  0,
+	 50, 50, 50, 50, 50, 50, 50, 50,
+	 10, 10, 20, 30, 30, 20, 10, 10,
+	  5,  5, 10, 25, 25, 10,  5,  5,
+	  0,  0,  0, 20, 20,  0,  0,  0,
+	  5, -5,-10,  0,  0,-10, -5,  5,
+	  5, 10, 10,-20,-20, 10, 10,  5,
+	  0,  0,  0,  0,  0,  0,  0,  0},
+	{ // knight
+	-50,-40,-30,-30,-30,-30,-40,-50,
+	-40,-20,  0,  0,  0,  0,-20,-40,
+	-30,  0, 10, 15, 15, 10,  0,-30,
+	-30,  5, 15, 20, 20, 15,  5,-30,
+	-30,  0, 15, 20, 20, 15,  0,-30,
+	-30,  5, 10, 15, 15, 10,  5,-30,
+	-40,-20,  0,  5,  5,  0,-20,-40,
+	-50,-40,-30,-30,-30,-30,-40,-50},
+	{ // bishop
+	-20,-10,-10,-10,-10,-10,-10,-20,
+	-10,  0,  0,  0,  0,  0,  0,-10,
+	-10,  0,  5, 10, 10,  5,  0,-10,
+	-10,  5,  5, 10, 10,  5,  5,-10,
+	-10,  0, 10, 10, 10, 10,  0,-10,
+	-10, 10, 10, 10, 10, 10, 10,-10,
+	-10,  5,  0,  0,  0,  0,  5,-10,
+	-20,-10,-10,-10,-10,-10,-10,-20},
+	{ // rook
+	  0,  0,  0,  0,  0,  0,  0,  0,
+	  5, 10, 10, 10, 10, 10, 10,  5,
+	 -5,  0,  0,  0,  0,  0,  0, -5,
+	 -5,  0,  0,  0,  0,  0,  0, -5,
+	 -5,  0,  0,  0,  0,  0,  0, -5,
+	 -5,  0,  0,  0,  0,  0,  0, -5,
+	 -5,  0,  0,  0,  0,  0,  0, -5,
+	  0,  0,  0,  5,  5,  0,  0,  0},
+	{ // queen
+	-20,-10,-10, -5, -5,-10,-10,-20,
+	-10,  0,  0,  0,  0,  0,  0,-10,
+	-10,  0,  5,  5,  5,  5,  0,-10,
+	 -5,  0,  5,  5,  5,  5,  0, -5,
+	  0,  0,  5,  5,  5,  5,  0, -5,
+	-10,  5,  5,  5,  5,  5,  0,-10,
+	-10,  0,  5,  0,  0,  0,  0,-10,
+	-20,-10,-10, -5, -5,-10,-10,-20},
+	{ // king (middle game)
+	-30,-40,-40,-50,-50,-40,-40,-30,
+	-30,-40,-40,-50,-50,-40,-40,-30,
+	-30,-40,-40,-50,-50,-40,-40,-30,
+	-30,-40,-40,-50,-50,-40,-40,-30,
+	-20,-30,-30,-40,-40,-30,-30,-20,
+	-10,-20,-20,-20,-20,-20,-20,-10,
+	 20, 20,  0,  0,  0,  0, 20, 20,
+	 20, 30, 10,  0,  0, 10, 30, 20}
+};
+
+static constexpr int CP[6] = {100, 320, 330, 500, 900, 0};
+static constexpr double SCALE = 1000.0;
+
+static constexpr std::pair<int,int> knight_steps[] = {
+	{-2,-1},{-2, 1},{-1,-2},{-1, 2},{ 1,-2},{ 1, 2},{ 2,-1},{ 2, 1}
+};
+static constexpr std::pair<int,int> slide_dirs[] = {
+	{-1,-1},{-1, 1},{ 1,-1},{ 1, 1},{-1, 0},{ 1, 0},{ 0,-1},{ 0, 1}
+};
+
+// ─── Tiny inlines ───────────────────────────────────────────────────────────
+
+inline int kind(char pc)
+{
+	switch(pc)
+	{
+		case 'P': case 'p': return 0;
+		case 'N': case 'n': return 1;
+		case 'B': case 'b': return 2;
+		case 'R': case 'r': return 3;
+		case 'Q': case 'q': return 4;
+		case 'K': case 'k': return 5;
+		default:            return -1;
+	}
+}
+
+inline bool is_white(char pc)
+{
+	return pc>='A' && pc<='Z';
+}
+
+inline double side(const State &st)
+{
+	return st.turn==0 ? 1.0 : -1.0;
+}
+
+// Mate from the mover's point of view.  Legal moves are only generated when
+// the side to move is in check, which keeps the common path allocation-free.
+inline bool is_mated(const State &st)
+{
+	return chess::in_check(st) && chess::get_legal_moves(st).empty();
+}
+
+static int pseudo_mobility(const State &st,int idx,int k,bool white)
+{
+	int r = idx/8, c = idx%8, n = 0;
+	auto reachable = [&](int rr,int cc)
+	{
+		char sq = st.board[rr*8+cc];
+		return sq==' ' || sq=='\0' || is_white(sq)!=white;
+	};
+	if(k==1)
+	{
+		for(auto [dr,dc]: knight_steps)
+		{
+			int rr=r+dr, cc=c+dc;
+			if((unsigned)rr<8 && (unsigned)cc<8 && reachable(rr,cc)) n++;
+		}
+		return n;
+	}
+	int lo = (k==3) ? 4 : 0;
+	int hi = (k==2) ? 4 : 8;
+	for(int d=lo; d<hi; d++)
+	{
+		int rr=r+slide_dirs[d].first, cc=c+slide_dirs[d].second;
+		while((unsigned)rr<8 && (unsigned)cc<8)
+		{
+			char sq = st.board[rr*8+cc];
+			if(sq==' ' || sq=='\0') { n++; }
+			else { if(is_white(sq)!=white) n++; break; }
+			rr+=slide_dirs[d].first; cc+=slide_dirs[d].second;
+		}
+	}
+	return n;
+}
+
+// ─── Evaluators ─────────────────────────────────────────────────────────────
+
+// Same contract as Value.crude_chess_score: raw material balance for the side
+// to move, 1000 once the side to move has been checkmated.
+static double crude_chess_score(const State &st)
+{
+	if(is_mated(st)) return 1000.0;
+	static constexpr int pawns[6] = {1, 3, 3, 5, 9, 0};
+	int sum = 0;
+	for(uint8_t sq: st.board)
+	{
+		int k = kind((char)sq);
+		if(k<0) continue;
+		sum += is_white((char)sq) ? pawns[k] : -pawns[k];
+	}
+	return side(st) * sum;
+}
+
+static double material(const State &st)
+{
+	if(is_mated(st)) return -1.0;
+	int cp = 0;
+	for(uint8_t sq: st.board)
+	{
+		int k = kind((char)sq);
+		if(k<0) continue;
+		cp += is_white((char)sq) ? CP[k] : -CP[k];
+	}
+	return std::tanh(side(st) * cp / SCALE);
+}
+
+static int pst_centipawns(const State &st)
+{
+	int cp = 0;
+	for(int idx=0; idx<64; idx++)
+	{
+		char pc = (char)st.board[idx];
+		int k = kind(pc);
+		if(k<0) continue;
+		if(is_white(pc)) cp += CP[k] + PST[k][idx];
+		else             cp -= CP[k] + PST[k][idx ^ 56];
+	}
+	return cp;
+}
+
+static double pst(const State &st)
+{
+	if(is_mated(st)) return -1.0;
+	return std::tanh(side(st) * pst_centipawns(st) / SCALE);
+}
+
+static double mobility(const State &st)
+{
+	if(is_mated(st)) return -1.0;
+	int mob = 0;
+	for(int idx=0; idx<64; idx++)
+	{
+		char pc = (char)st.board[idx];
+		int k = kind(pc);
+		if(k<1 || k>4) continue;
+		bool white = is_white(pc);
+		int m = pseudo_mobility(st,idx,k,white);
+		mob += white ? m : -m;
+	}
+	return std::tanh(side(st) * (pst_centipawns(st) + 10*mob) / SCALE);
+}
+
+namespace
+{
+	std::map<std::string,std::unique_ptr<Entry>> &registry()
+	{
+		static std::map<std::string,std::unique_ptr<Entry>> reg;
+		return reg;
+	}
+
+	struct Builtins
+	{
+		Builtins()
+		{
+			chess::register_evaluator("crude_chess_score", &crude_chess_score);
+			chess::register_evaluator("material", &material);
+			chess::register_evaluator("pst", &pst);
+			chess::register_evaluator("mobility", &mobility);
+		}
+	} builtins;
+}
@@ -60,4 +60,16 @@ def state_to_tensor(state):
 
     return np.stack([current_plane, opponent_plane], axis=0)
 
+def state_to_compact(state):
+    cells = [tokens.index(cell) + 1 if cell != ' ' else 0 for row in state.board for cell in row]
+    return np.array(cells + [state.turn], dtype=np.uint8)
 
+def compact_to_tensor(rows):
+    rows = np.asarray(rows, dtype=np.uint8)
+    board = rows[:, :ROWS * COLS].reshape(-1, ROWS, COLS)
+    turn = rows[:, ROWS * COLS].reshape(-1, 1, 1)
+
+    current_plane  = (board == turn + 1).astype(np.float32)
+    opponent_plane = (board == 2 - turn).astype(np.float32)
+
+    return np.stack([current_plane, opponent_plane], axis=1)
@@ -0,0 +1,330 @@
+"""
+Process-isolated value-network inference over shared memory.
+
+The model and its batching loop live in a dedicated server process.  Each
+client owns a fixed region of two shared-memory buffers (input planes and
+output values): a request reserves a contiguous run of free slots, writes its
+tensors in place and only sends ``(client, request, start, count)`` through a
+queue.  Threads sharing a client finish in any order, so the client keeps a
+list of free slot ranges.  The server merges pending requests into one batch,
+writes the values back into the output ring and wakes the client.
+
+A batch that fails is answered with its error, which ``evaluate`` raises; a
+checkpoint that fails to reload leaves the previous weights in place.  A
+client waiting on a server process that has died raises instead of hanging.
+
+Shared memory and the queues are local IPC primitives; server and clients must
+run on the same machine.
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from multiprocessing import shared_memory
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Client side
+# ──────────────────────────────────────────────────────────────────────────
+# Works from any process, not only the server's parent; an exited server
+# that was not reaped yet shows as a zombie.
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        with open(f"/proc/{pid}/stat") as fh:
+            return fh.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return True
+
+
+class InferenceClient:
+    POLL = 1.0      # seconds between checks that the server is still alive
+
+    def __init__(self, cid: int, in_name: str, out_name: str, input_shape: Sequence[int],
+                 slots: int, total_slots: int, req_q, resp_q, server_pid: int):
+        self.cid = cid
+        self.in_name = in_name
+        self.out_name = out_name
+        self.input_shape = tuple(input_shape)
+        self.slots = slots
+        self.total_slots = total_slots
+        self.req_q = req_q
+        self.resp_q = resp_q
+        self.server_pid = server_pid
+        self._local_init()
+
+    # Handles are shipped to worker processes; per-process state is rebuilt.
+    def __getstate__(self):
+        return {k: self.__dict__[k] for k in
+                ("cid", "in_name", "out_name", "input_shape", "slots", "total_slots", "req_q", "resp_q",
+                 "server_pid")}
+
+    def __setstate__(self, st):
+        self.__dict__.update(st)
+        self._local_init()
+
+    def _local_init(self):
+        self._shm_in = self._shm_out = None
+        self._inputs = self._outputs = None
+        self._cv = threading.Condition()
+        self._free = [(0, self.slots)]      # free slot ranges [lo, hi), sorted
+        self._rids = itertools.count()
+        self._waiters: dict[int, threading.Event] = {}
+        self._errors: dict[int, str] = {}
+        self._receiver: Optional[threading.Thread] = None
+
+    def _attach(self):
+        self._shm_in = shared_memory.SharedMemory(name=self.in_name)
+        self._shm_out = shared_memory.SharedMemory(name=self.out_name)
+        base = self.cid * self.slots
+        inputs = np.ndarray((self.total_slots,) + self.input_shape, dtype=np.float32, buffer=self._shm_in.buf)
+        outputs = np.ndarray((self.total_slots,), dtype=np.float32, buffer=self._shm_out.buf)
+        self._inputs = inputs[base:base + self.slots]
+        self._outputs = outputs[base:base + self.slots]
+        self._receiver = threading.Thread(target=self._recv_loop, daemon=True)
+        self._receiver.start()
+
+    def _recv_loop(self):
+        while True:
+            rid, error = self.resp_q.get()
+            with self._cv:
+                evt = self._waiters.pop(rid, None)
+                if evt is not None and error is not None:
+                    self._errors[rid] = error
+            if evt is not None:
+                evt.set()
+
+    # First fit; waits until some free range holds n slots.
+    def _reserve(self, n: int) -> int:
+        with self._cv:
+            while True:
+                for i, (lo, hi) in enumerate(self._free):
+                    if hi - lo >= n:
+                        if hi - lo == n:
+                            del self._free[i]
+                        else:
+                            self._free[i] = (lo + n, hi)
+                        return lo
+                self._cv.wait()
+
+    def _release(self, start: int, n: int):
+        with self._cv:
+            bisect.insort(self._free, (start, start + n))
+            merged = []
+            for lo, hi in self._free:
+                if merged and merged[-1][1] == lo:
+                    merged[-1] = (merged[-1][0], hi)
+                else:
+                    merged.append((lo, hi))
+            self._free = merged
+            self._cv.notify_all()
+
+    def evaluate(self, arrays) -> np.ndarray:
+        if self._inputs is None:
+            with self._cv:
+                if self._inputs is None:
+                    self._attach()
+
+        arrays = np.asarray(arrays, dtype=np.float32)
+        out = np.empty(len(arrays), dtype=np.float32)
+        for lo in range(0, len(arrays), self.slots):
+            chunk = arrays[lo:lo + self.slots]
+            n = len(chunk)
+            start = self._reserve(n)
+            self._inputs[start:start + n] = chunk
+
+            rid = next(self._rids)
+            evt = threading.Event()
+            with self._cv:
+                self._waiters[rid] = evt
+            self.req_q.put((self.cid, rid, self.cid * self.slots + start, n))
+            while not evt.wait(self.POLL):
+                if not _pid_alive(self.server_pid):
+                    with self._cv:
+                        self._waiters.pop(rid, None)
+                    # The slots stay reserved: nothing will answer for them.
+                    raise RuntimeError(f"inference server process {self.server_pid} has exited")
+
+            with self._cv:
+                error = self._errors.pop(rid, None)
+            if error is None:
+                out[lo:lo + n] = self._outputs[start:start + n]
+            self._release(start, n)
+            if error is not None:
+                raise RuntimeError(f"inference server failed a batch:\n{error}")
+        return out
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Server process
+# ──────────────────────────────────────────────────────────────────────────
+def _load_model(model_type: str, path: Optional[str], device: str):
+    import models.core as core
+
+    _, latest_path = core.get_value_network(model_type)
+    path = path or str(latest_path)
+    return core.load_model(model_type, path, device), path
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
+
+
+def _serve(model_type, path, batch_size, in_name, out_name, input_shape, total_slots,
+           req_q, resp_qs, ready, reload_interval):
+    import torch
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    dtype = torch.float16 if device == "cuda" else torch.float32
+
+    model, watch_path = _load_model(model_type, path, device)
+    model.to(device=device, dtype=dtype).eval()
+    loaded_at = _mtime(watch_path)
+    next_check = time.monotonic() + reload_interval
+
+    shm_in = shared_memory.SharedMemory(name=in_name)
+    shm_out = shared_memory.SharedMemory(name=out_name)
+    inputs = np.ndarray((total_slots,) + tuple(input_shape), dtype=np.float32, buffer=shm_in.buf)
+    outputs = np.ndarray((total_slots,), dtype=np.float32, buffer=shm_out.buf)
+    ready.set()
+
+    while True:
+        if time.monotonic() >= next_check:
+            next_check = time.monotonic() + reload_interval
+            mtime = _mtime(watch_path)
+            if mtime and mtime != loaded_at:
+                loaded_at = mtime       # a bad checkpoint is tried once, not every interval
+                previous = {k: v.clone() for k, v in model.state_dict().items()}
+                try:
+                    fresh, _ = _load_model(model_type, watch_path, device)
+                    model.load_state_dict(fresh.state_dict())
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+                    model.load_state_dict(previous)
+                model.to(device=device, dtype=dtype).eval()
+
+        try:
+            req = req_q.get(timeout=reload_interval)
+        except queue.Empty:
+            continue
+        if req is None:
+            break
+
+        reqs, rows = [req], req[3]
+        while rows < batch_size:
+            try:
+                nxt = req_q.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is None:
+                req_q.put(None)
+                break
+            reqs.append(nxt)
+            rows += nxt[3]
+
+        try:
+            batch_np = np.concatenate([inputs[s:s + n] for _, _, s, n in reqs], axis=0)
+            with torch.no_grad():
+                vals = model(torch.from_numpy(batch_np).to(device=device, dtype=dtype))
+            vals = vals.float().reshape(-1).cpu().numpy()
+        except Exception:
+            error = traceback.format_exc()
+            for cid, rid, _, _ in reqs:
+                resp_qs[cid].put((rid, error))
+            continue
+
+        off = 0
+        for cid, rid, s, n in reqs:
+            outputs[s:s + n] = vals[off:off + n]
+            off += n
+            resp_qs[cid].put((rid, None))
+
+    del inputs, outputs
+    shm_in.close()
+    shm_out.close()
+
+
+class InferenceServer:
+    def __init__(self, model_type: str, input_shape: Sequence[int], *, path: Optional[str] = None,
+                 clients: int = 1, slots: int = 1024, batch_size: int = 256, reload_interval: float = 5.0):
+        self.model_type = model_type
+        self.input_shape = tuple(input_shape)
+        self.path = path
+        self.n_clients = clients
+        self.slots = slots
+        self.batch_size = batch_size
+        self.reload_interval = reload_interval
+        self._proc = None
+        self._clients: list[InferenceClient] = []
+
+    def start(self) -> "InferenceServer":
+        ctx = mp.get_context("spawn")
+        total = self.n_clients * self.slots
+        row_bytes = int(np.prod(self.input_shape)) * 4
+        self._shm_in = shared_memory.SharedMemory(create=True, size=total * row_bytes)
+        self._shm_out = shared_memory.SharedMemory(create=True, size=total * 4)
+
+        self._req_q = ctx.Queue()
+        resp_qs = [ctx.Queue() for _ in range(self.n_clients)]
+        ready = ctx.Event()
+        self._proc = ctx.Process \
+        (
+            target=_serve,
+            args=(self.model_type, self.path, self.batch_size, self._shm_in.name, self._shm_out.name,
+                  self.input_shape, total, self._req_q, resp_qs, ready, self.reload_interval),
+            daemon=True,
+        )
+        self._proc.start()
+        while not ready.wait(timeout=0.5):
+            if not self._proc.is_alive():
+                self.stop()
+                raise RuntimeError("inference server process exited during start-up")
+
+        self._clients = \
+        [
+            InferenceClient(cid, self._shm_in.name, self._shm_out.name, self.input_shape,
+                            self.slots, total, self._req_q, resp_qs[cid], self._proc.pid)
+            for cid in range(self.n_clients)
+        ]
+        return self
+
+    def client(self, cid: int = 0) -> InferenceClient:
+        return self._clients[cid]
+
+    def stop(self):
+        if self._proc is None:
+            return
+        if self._proc.is_alive():
+            self._req_q.put(None)
+            self._proc.join(timeout=10)
+        if self._proc.is_alive():
+            self._proc.terminate()
+        self._proc = None
+        for shm in (self._shm_in, self._shm_out):
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
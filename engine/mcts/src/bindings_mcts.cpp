@@ -9,4 +9,25 @@ PYBIND11_MODULE(mcts, m)
     m.def("get_move", &get_move, py::arg("state"), py::arg("value"),
       py::arg("policy"), py::arg("backend"), py::arg("simulations")=1000,
       py::arg("c")=1.4, py::arg("batch_size")=32, py::call_guard<py::gil_scoped_release>());
+    m.def("search", &search, py::arg("state"), py::arg("value"),
+      py::arg("policy"), py::arg("backend"), py::arg("simulations")=1000,
+      py::arg("c")=1.4, py::arg("batch_size")=32, py::arg("time_limit")=0.0,
+      py::arg("profile")=false, py::call_guard<py::gil_scoped_release>());
+
+    py::class_<Searcher>(m, "Searcher")
+      .def(py::init<py::object, py::object, py::object, py::object, double, int>(),
+           py::arg("state"), py::arg("value"), py::arg("policy"), py::arg("backend"),
+           py::arg("c")=1.4, py::arg("batch_size")=32)
+      .def("run", &Searcher::run, py::arg("simulations"), py::arg("time_limit")=0.0,
+           py::call_guard<py::gil_scoped_release>(),
+           "Run up to `simulations` more simulations; returns how many ran")
+      .def("stop", &Searcher::stop, "Interrupt the current (or next) run")
+      .def("result", &Searcher::result, py::arg("pv_length")=8)
+      .def("advance", &Searcher::advance, py::arg("move"), py::arg("collect")=true,
+           "Re-root at the position after `move`; True if its subtree was kept")
+      .def("collect", &Searcher::collect, py::arg("chunk")=512,
+           "Free the trees left by advance(collect=False); returns the nodes freed")
+      .def_property_readonly("state", &Searcher::state)
+      .def_property_readonly("simulations", &Searcher::simulations)
+      .def_property_readonly("c", &Searcher::c);
 }
@@ -3,13 +3,18 @@
 #include <vector>
 #include <random>
 #include <cmath>
+#include <chrono>
+#include <optional>
+#include <atomic>
 #include "mcts.h"
+#include "native_eval.h"
 
 namespace py = pybind11;
 
 struct Node 
 {
     py::object state;
+    const void* native_state = nullptr;
     std::vector<py::object> moves;
     std::vector<int> Na;
     std::vector<double> Wa;
@@ -44,8 +49,9 @@ static double UCT(const Node* node, int a, double c)
     return node->Qa[a] + c * std::sqrt(std::log((double)node->N) / node->Na[a]);
 }
 
-static Node* select(Node* node, double c) 
+static Node* select(Node* node, double c, int& depth) 
 {
+    depth = 0;
     while (node) 
     {
         if (!node->untried.empty()) return node;
@@ -58,11 +64,19 @@ static Node* select(Node* node, double c)
         }
         if (best == -1) return node;
         node = node->children[best];
+        depth++;
     }
     return node;
 }
 
-static Node* expand(Node* node, py::object backend, py::object policy) 
+static const void* unwrap_state(const NativeEvaluator* native, const py::object& state)
+{
+    const void* ptr = native->unwrap(state.ptr());
+    if (!ptr) throw std::runtime_error("native evaluator cannot read this state type");
+    return ptr;
+}
+
+static Node* expand(Node* node, py::object backend, py::object policy, const NativeEvaluator* native) 
 {
     py::list untried_moves;
     for (int idx : node->untried) untried_moves.append(node->moves[idx]);
@@ -73,6 +87,7 @@ static Node* expand(Node* node, py::object backend, py::object policy)
     py::object new_state = backend.attr("play_move")(node->state, action);
     py::list new_moves = backend.attr("get_legal_moves")(new_state);
     Node* child = new Node(new_state, new_moves, node, move_idx);
+    if (native) child->native_state = unwrap_state(native, new_state);
     node->children[move_idx] = child;
     return child;
 }
@@ -99,63 +114,385 @@ static void backprop(Node* node, double result)
     }
 }
 
-py::object get_move(py::object state, py::object value, py::object policy, py::object backend, int simulations, double c, int batch_size)
+// Values that name a registered backend evaluator (Value.native_evaluator) are
+// scored in C++ without touching the interpreter; everything else goes through
+// value.batch under the GIL.
+static const NativeEvaluator* find_native(py::object value, py::object backend)
 {
-    Node* root;
+    if (!py::hasattr(value, "native_evaluator")) return nullptr;
+    py::object cap = value.attr("native_evaluator")(backend);
+    if (cap.is_none()) return nullptr;
+    auto* native = static_cast<const NativeEvaluator*>(PyCapsule_GetPointer(cap.ptr(), NATIVE_EVALUATOR_CAPSULE));
+    if (!native) throw py::error_already_set();
+    if (native->abi_version != NATIVE_EVALUATOR_ABI) throw std::runtime_error("native evaluator ABI mismatch");
+    return native;
+}
+
+static int best_child(const Node* root)
+{
+    int best_idx=-1; int best_N=-1;
+    for (size_t i=0;i<root->children.size();++i) 
+    {
+        Node* child = root->children[i];
+        if (child && child->N > best_N) { best_N = child->N; best_idx = (int)i; }
+    }
+    return best_idx;
+}
+
+using Clock = std::chrono::steady_clock;
+
+static double seconds_since(Clock::time_point t0)
+{
+    return std::chrono::duration<double>(Clock::now() - t0).count();
+}
+
+// Opt-in (search(..., profile=True)) counters and phase timers.  Phases:
+// select = tree walk, expand = policy/backend callbacks, evaluate = leaf
+// values (value.batch or the native evaluator), backprop.  gil_wait is the
+// time spent acquiring the GIL and overlaps expand/evaluate.
+struct Profile
+{
+    bool on = false;
+    long nodes = 0, expansions = 0, flushes = 0, leaves = 0, slots = 0;
+    int max_depth = 0;
+    double select = 0.0, expand = 0.0, evaluate = 0.0, backprop = 0.0, gil_wait = 0.0;
+};
+
+// Adds the scope's duration to `acc` when profiling; a no-op otherwise.
+struct PhaseTimer
+{
+    double* acc;
+    Clock::time_point t0;
+    PhaseTimer(const Profile& prof, double& a): acc(prof.on ? &a : nullptr) { if (acc) t0 = Clock::now(); }
+    ~PhaseTimer() { if (acc) *acc += seconds_since(t0); }
+};
+
+static void acquire_gil(std::optional<py::gil_scoped_acquire>& gil, Profile& prof)
+{
+    PhaseTimer wait(prof, prof.gil_wait);
+    gil.emplace();
+}
+
+struct SearchStats
+{
+    double seconds = 0.0;
+    // Root visits / seconds at which the final best move last took the lead.
+    int settled_simulations = 0;
+    double settled_seconds = 0.0;
+    Profile profile;
+};
+
+// What a search needs besides the tree.  Built with the GIL held.
+struct SearchContext
+{
+    py::object value, policy, backend;
+    const NativeEvaluator* native;
+    double c;
+    int batch_size;
+
+    SearchContext(py::object v, py::object p, py::object b, double c_, int bs)
+        : value(v), policy(p), backend(b), native(find_native(v, b)), c(c_), batch_size(bs) {}
+
+    Node* make_root(py::object state) const
     {
-        py::gil_scoped_acquire gil;
         py::list moves = backend.attr("get_legal_moves")(state);
-        root = new Node(state, moves);
+        Node* root = new Node(state, moves);
+        if (native) root->native_state = unwrap_state(native, state);
+        return root;
     }
+};
+
+// Runs up to `simulations` more simulations from `root`, stopping early once
+// time_limit seconds have passed (if positive) or *stop is set.  Called
+// without the GIL.  Returns the number of simulations run.
+static int simulate(const SearchContext& ctx, Node* root, int simulations, double time_limit, SearchStats& stats,
+                    const std::atomic<bool>* stop = nullptr)
+{
+    const auto t0 = Clock::now();
+    auto elapsed = [&]() { return seconds_since(t0); };
+    Profile& prof = stats.profile;
+    const NativeEvaluator* native = ctx.native;
+
     std::vector<Node*> pending_nodes;
-    std::vector<py::object> pending_states;
+    std::vector<double> values;
+    int leader = best_child(root);
+    auto evaluate = [&]()
+    {
+        PhaseTimer timer(prof, prof.evaluate);
+        values.clear();
+        if (native)
+        {
+            for (Node* leaf : pending_nodes) values.push_back(native->eval(native->ctx, leaf->native_state));
+            return;
+        }
+        std::optional<py::gil_scoped_acquire> gil;
+        acquire_gil(gil, prof);
+        py::list states;
+        for (Node* leaf : pending_nodes) states.append(leaf->state);
+        py::object vals_obj = ctx.value.attr("batch")(states, py::arg("backend")=ctx.backend);
+        for (auto v : vals_obj.cast<py::list>()) values.push_back(v.cast<double>());
+    };
     auto flush = [&]() 
     {
         if (pending_nodes.empty()) return;
-        py::gil_scoped_acquire gil;
-        py::list states;
-        for (auto& s : pending_states) states.append(s);
-        py::object vals_obj = value.attr("batch")(states, py::arg("backend")=backend);
-        auto vals = vals_obj.cast<py::list>();
-        for (size_t i=0;i<pending_nodes.size();++i) 
+        evaluate();
         {
-            double v = vals[i].cast<double>();
-            backprop(pending_nodes[i], v);
+            PhaseTimer timer(prof, prof.backprop);
+            for (size_t i=0;i<pending_nodes.size();++i) backprop(pending_nodes[i], values[i]);
         }
+        prof.flushes++;
+        prof.leaves += pending_nodes.size();
+        prof.slots += ctx.batch_size;
         pending_nodes.clear();
-        pending_states.clear();
+        int best = best_child(root);
+        if (best != leader)
+        {
+            leader = best;
+            stats.settled_simulations = root->N;
+            stats.settled_seconds = elapsed();
+        }
     };
 
-    for (int i=0;i<simulations;i++) 
+    int done = 0;
+    for (; done<simulations; done++) 
     {
-        Node* node = select(root, c);
+        if (time_limit > 0 && elapsed() >= time_limit) break;
+        if (stop && stop->load(std::memory_order_relaxed)) break;
+        int depth;
+        Node* node;
+        {
+            PhaseTimer timer(prof, prof.select);
+            node = select(root, ctx.c, depth);
+        }
         Node* leaf;
         if (!node->untried.empty()) 
         {
-            py::gil_scoped_acquire gil;
-            leaf = expand(node, backend, policy);
+            PhaseTimer timer(prof, prof.expand);
+            std::optional<py::gil_scoped_acquire> gil;
+            acquire_gil(gil, prof);
+            leaf = expand(node, ctx.backend, ctx.policy, native);
+            prof.nodes++;
+            prof.expansions++;
+            depth++;
         } 
         else 
         {
             leaf = node;
         }
+        if (depth > prof.max_depth) prof.max_depth = depth;
         pending_nodes.push_back(leaf);
-        pending_states.push_back(leaf->state);
-        if ((int)pending_nodes.size() >= batch_size) 
+        if ((int)pending_nodes.size() >= ctx.batch_size) 
         {
             flush();
         }
     }
     flush();
-    int best_idx=-1; int best_N=-1;
-    for (size_t i=0;i<root->children.size();++i) 
+    stats.seconds = elapsed();
+    return done;
+}
+
+// Root statistics: per-move visit counts and Q (both in get_legal_moves order,
+// Q from the side to move), the root's visit-weighted value and the most
+// visited move.  Needs the GIL.
+static py::dict root_stats(const Node* root)
+{
+    int best_idx = best_child(root);
+    double w = 0.0; long n = 0;
+    for (size_t i=0;i<root->Na.size();++i) { w += root->Wa[i]; n += root->Na[i]; }
+
+    py::dict out;
+    out["move"] = best_idx >= 0 ? root->moves[best_idx] : py::none();
+    out["moves"] = py::cast(root->moves);
+    out["visits"] = py::cast(root->Na);
+    out["q"] = py::cast(root->Qa);
+    out["root_q"] = n ? w / n : 0.0;
+    out["simulations"] = root->N;
+    return out;
+}
+
+py::object get_move(py::object state, py::object value, py::object policy, py::object backend, int simulations, double c, int batch_size)
+{
+    std::optional<SearchContext> ctx;
+    Node* root;
     {
-        Node* child = root->children[i];
-        if (child && child->N > best_N) { best_N = child->N; best_idx = (int)i; }
+        py::gil_scoped_acquire gil;
+        ctx.emplace(value, policy, backend, c, batch_size);
+        root = ctx->make_root(state);
     }
+    SearchStats stats;
+    simulate(*ctx, root, simulations, 0.0, stats);
+    int best_idx = best_child(root);
     py::gil_scoped_acquire gil;
     py::object best_move = root->moves[best_idx];
     delete root;
+    ctx.reset();
     return best_move;
 }
 
+// Same search as get_move, plus root_stats.  A positive time_limit (seconds)
+// ends the search early; `simulations` is then an upper bound.  settled_* tell
+// when the returned move became and stayed the most visited one.  With
+// profile=True the result also carries a "profile" dict of Profile's counters
+// and phase seconds.
+py::dict search(py::object state, py::object value, py::object policy, py::object backend, int simulations, double c, int batch_size,
+                double time_limit, bool profile)
+{
+    std::optional<SearchContext> ctx;
+    Node* root;
+    {
+        py::gil_scoped_acquire gil;
+        ctx.emplace(value, policy, backend, c, batch_size);
+        root = ctx->make_root(state);
+    }
+    SearchStats stats;
+    stats.profile.on = profile;
+    stats.profile.nodes = 1;    // the root
+    simulate(*ctx, root, simulations, time_limit, stats);
+
+    py::gil_scoped_acquire gil;
+    py::dict out = root_stats(root);
+    out["seconds"] = stats.seconds;
+    out["settled_simulations"] = stats.settled_simulations;
+    out["settled_seconds"] = stats.settled_seconds;
+    if (profile)
+    {
+        const Profile& p = stats.profile;
+        py::dict prof;
+        prof["nodes"] = p.nodes;
+        prof["expansions"] = p.expansions;
+        prof["flushes"] = p.flushes;
+        prof["leaves"] = p.leaves;
+        prof["slots"] = p.slots;
+        prof["max_depth"] = p.max_depth;
+        prof["select_s"] = p.select;
+        prof["expand_s"] = p.expand;
+        prof["evaluate_s"] = p.evaluate;
+        prof["backprop_s"] = p.backprop;
+        prof["gil_wait_s"] = p.gil_wait;
+        out["profile"] = prof;
+    }
+    delete root;
+    ctx.reset();
+    return out;
+}
+
+// ─── Searcher: a tree that outlives one call ────────────────────────────────
+
+struct Searcher::Impl
+{
+    SearchContext ctx;
+    Node* root;
+    std::atomic<bool> stop_flag{false};
+    std::vector<Node*> garbage;     // detached subtrees left for collect()
+
+    Impl(py::object state, py::object value, py::object policy, py::object backend, double c, int batch_size)
+        : ctx(value, policy, backend, c, batch_size), root(ctx.make_root(state)) {}
+    ~Impl()
+    {
+        delete root;
+        for (Node* node : garbage) delete node;
+    }
+};
+
+Searcher::Searcher(py::object state, py::object value, py::object policy, py::object backend, double c, int batch_size)
+    : impl(new Impl(state, value, policy, backend, c, batch_size)) {}
+
+Searcher::~Searcher() = default;
+
+int Searcher::run(int simulations, double time_limit)
+{
+    SearchStats stats;
+    int done = simulate(impl->ctx, impl->root, simulations, time_limit, stats, &impl->stop_flag);
+    impl->stop_flag.store(false);
+    return done;
+}
+
+void Searcher::stop()
+{
+    impl->stop_flag.store(true);
+}
+
+py::dict Searcher::result(int pv_length) const
+{
+    py::dict out = root_stats(impl->root);
+    py::list pv;
+    for (const Node* node = impl->root; node && (int)py::len(pv) < pv_length; )
+    {
+        int best = best_child(node);
+        if (best < 0 || node->children[best]->N == 0) break;
+        pv.append(node->moves[best]);
+        node = node->children[best];
+    }
+    out["pv"] = pv;
+    return out;
+}
+
+// The old root and the rest of its tree are freed here, or with
+// collect=false handed to collect(): freeing a large tree takes a while
+// (every node holds Python objects) and need not delay the caller.
+bool Searcher::advance(py::object move, bool collect)
+{
+    Node* root = impl->root;
+    bool kept = false;
+    for (size_t i=0;i<root->moves.size();++i)
+    {
+        if (!root->moves[i].equal(move)) continue;
+        Node* child = root->children[i];
+        if (child)
+        {
+            root->children[i] = nullptr;
+            child->parent = nullptr;
+            child->parent_action_idx = -1;
+            impl->root = child;
+            kept = true;
+        }
+        break;
+    }
+    if (!kept)
+    {
+        py::object next = impl->ctx.backend.attr("play_move")(root->state, move);
+        impl->root = impl->ctx.make_root(next);
+    }
+    if (collect) delete root;
+    else impl->garbage.push_back(root);
+    return kept;
+}
+
+// Node by node, letting other Python threads in every `chunk` nodes, until
+// done or stop() is called.  Returns the number of nodes freed.
+int Searcher::collect(int chunk)
+{
+    std::vector<Node*>& todo = impl->garbage;
+    int freed = 0;
+    while (!todo.empty() && !impl->stop_flag.load())
+    {
+        Node* node = todo.back();
+        todo.pop_back();
+        for (Node*& child : node->children)
+        {
+            if (child) todo.push_back(child);
+            child = nullptr;
+        }
+        delete node;
+        if (++freed % chunk == 0)
+        {
+            py::gil_scoped_release release;
+        }
+    }
+    return freed;
+}
+
+py::object Searcher::state() const
+{
+    return impl->root->state;
+}
+
+int Searcher::simulations() const
+{
+    return impl->root->N;
+}
+
+double Searcher::c() const
+{
+    return impl->ctx.c;
+}
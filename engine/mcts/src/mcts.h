@@ -1,3 +1,30 @@
 #pragma once
+#include <memory>
 #include <pybind11/pybind11.h>
 pybind11::object get_move(pybind11::object state, pybind11::object value, pybind11::object policy, pybind11::object backend, int simulations, double c, int batch_size);
+pybind11::dict search(pybind11::object state, pybind11::object value, pybind11::object policy, pybind11::object backend, int simulations, double c, int batch_size,
+                      double time_limit, bool profile);
+
+// A search tree kept between calls: `run` adds simulations (without the GIL),
+// `stop` interrupts a run from another thread, `result` reports the root
+// statistics plus the principal variation, and `advance` re-roots the tree at
+// the child reached by a move, keeping that subtree's statistics (the rest is
+// freed then, or later by `collect`).
+class Searcher
+{
+public:
+    Searcher(pybind11::object state, pybind11::object value, pybind11::object policy, pybind11::object backend, double c, int batch_size);
+    ~Searcher();
+    int run(int simulations, double time_limit);
+    void stop();
+    pybind11::dict result(int pv_length) const;
+    bool advance(pybind11::object move, bool collect);
+    int collect(int chunk);
+    pybind11::object state() const;
+    int simulations() const;
+    double c() const;
+
+private:
+    struct Impl;
+    std::unique_ptr<Impl> impl;
+};
@@ -0,0 +1,17 @@
+#pragma once
+#include <Python.h>
+
+// Mirror of the evaluator ABI in engine/games/chess/include/evaluators.h.  A
+// backend hands MCTS a PyCapsule named NATIVE_EVALUATOR_CAPSULE; `unwrap` needs
+// the GIL, `eval` does not.
+
+#define NATIVE_EVALUATOR_CAPSULE "zeroclone.native_evaluator"
+#define NATIVE_EVALUATOR_ABI 1
+
+struct NativeEvaluator
+{
+    int abi_version;
+    const void* ctx;
+    const void* (*unwrap)(PyObject* state);
+    double (*eval)(const void* ctx, const void* state);
+};
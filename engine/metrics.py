@@ -0,0 +1,106 @@
+"""
+Process-wide throughput counters and a JSONL metrics stream.
+
+Hot paths bump named counters with ``add`` (games, plies, MCTS simulations,
+value-net batches and the rows/slots they filled, training samples, cache
+hits/misses, and the MCTS core's profile when config ``profile_search`` is
+on).  ``stage`` times a block and emits one record with the counter
+deltas over it, their per-second rates and the derived ratios (batch fill,
+cache hit rate), so a cycle's time can be attributed stage by stage.
+
+Records are JSON objects, one per line, with at least ``ts`` and ``event``;
+readers look fields up by name.  Nothing is written until ``configure`` opens
+a file, so library code can call ``emit`` unconditionally.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+_lock = threading.Lock()
+_counters: Counter = Counter()
+_sink = None
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Counters
+# ──────────────────────────────────────────────────────────────────────────
+def add(name: str, n: float = 1) -> None:
+    with _lock:
+        _counters[name] += n
+
+
+def merge(deltas: Dict[str, float]) -> None:
+    with _lock:
+        _counters.update(deltas)
+
+
+def counters() -> Dict[str, float]:
+    with _lock:
+        return dict(_counters)
+
+
+def delta(before: Dict[str, float], after: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    after = counters() if after is None else after
+    return {k: v - before.get(k, 0) for k, v in after.items() if v != before.get(k, 0)}
+
+
+# Per-second rates plus the ratios that only make sense over a window.
+def summarize(deltas: Dict[str, float], seconds: float) -> Dict[str, Any]:
+    out: Dict[str, Any] = dict(deltas)
+    for k, v in deltas.items():
+        out[f"{k}_per_s"] = v / seconds if seconds > 0 else 0.0
+    if deltas.get("nn.slots"):
+        out["nn.fill"] = deltas.get("nn.rows", 0) / deltas["nn.slots"]
+    if deltas.get("sched.slots"):
+        out["sched.fill"] = deltas.get("sched.rows", 0) / deltas["sched.slots"]
+    if deltas.get("mcts.slots"):
+        out["mcts.fill"] = deltas.get("mcts.leaves", 0) / deltas["mcts.slots"]
+    if deltas.get("mcts.searches"):
+        out["mcts.mean_max_depth"] = deltas.get("mcts.max_depth_sum", 0) / deltas["mcts.searches"]
+    for k in deltas:
+        if k.endswith(".hits"):
+            base = k[:-len(".hits")]
+            total = deltas[k] + deltas.get(f"{base}.misses", 0)
+            out[f"{base}.hit_rate"] = deltas[k] / total if total else 0.0
+    return out
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Sink
+# ──────────────────────────────────────────────────────────────────────────
+def configure(path: str | Path) -> Path:
+    global _sink
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        if _sink is not None:
+            _sink.close()
+        _sink = open(path, "a", buffering=1, encoding="utf-8")
+    return path
+
+
+def emit(event: str, **fields) -> None:
+    if _sink is None:
+        return
+    line = json.dumps({"ts": time.time(), "event": event, **fields}, default=float)
+    with _lock:
+        if _sink is not None:
+            _sink.write(line + "\n")
+
+
+@contextlib.contextmanager
+def stage(name: str, **fields):
+    before = counters()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t0
+        emit("stage", name=name, seconds=seconds, **fields, **summarize(delta(before), seconds))
@@ -0,0 +1,174 @@
+"""
+Fixed-capacity, on-disk replay buffer for value-net training.
+
+Rows are kept in ``np.memmap`` backed ``.npy`` files inside one directory, so
+the buffer survives restarts and is paged in by the OS instead of living in
+RAM.  Rows are whatever the backend's compact encoding produces (e.g. 69 bytes
+per chess position via ``state_to_compact``); they are expanded to planes per
+batch with ``compact_to_tensor`` at collation time.
+
+Every row is tagged with the generation it was produced in.  Generations keep
+counting across restarts and drive recency-weighted sampling.
+
+All methods are safe to call from concurrent threads (self-play actor and
+learner share one buffer in pipelined training).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+class ReplayBuffer:
+    def __init__(self, path: str | os.PathLike, capacity: int, row_shape: Sequence[int], row_dtype="uint8"):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        row_shape = tuple(int(d) for d in row_shape)
+        row_dtype = np.dtype(row_dtype).str
+
+        meta = self._read_meta()
+        if meta and (meta["capacity"] != capacity or tuple(meta["row_shape"]) != row_shape or meta["row_dtype"] != row_dtype):
+            raise ValueError(f"replay buffer at {self.path} was created with a different layout: {meta}")
+
+        if meta is None:
+            meta = {"capacity": capacity, "row_shape": list(row_shape), "row_dtype": row_dtype,
+                    "head": 0, "size": 0, "total": 0, "generation": 0}
+        self.meta = meta
+        self._lock = threading.RLock()
+        self._open(create=not (self.path / "rows.npy").exists())
+        self._write_meta()
+
+    # ------------------------------------------------------------------
+    #  Storage
+    # ------------------------------------------------------------------
+    def _open(self, create: bool):
+        mode = "w+" if create else "r+"
+        cap = self.meta["capacity"]
+        shape = (cap,) + tuple(self.meta["row_shape"])
+        open_mm = np.lib.format.open_memmap
+        if create:
+            self.rows = open_mm(self.path / "rows.npy", mode, dtype=self.meta["row_dtype"], shape=shape)
+            self.values = open_mm(self.path / "values.npy", mode, dtype=np.float32, shape=(cap,))
+            self.gens = open_mm(self.path / "gens.npy", mode, dtype=np.int32, shape=(cap,))
+        else:
+            self.rows = open_mm(self.path / "rows.npy", mode)
+            self.values = open_mm(self.path / "values.npy", mode)
+            self.gens = open_mm(self.path / "gens.npy", mode)
+
+    def _read_meta(self) -> Optional[dict]:
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            return None
+        with open(meta_path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def _write_meta(self):
+        tmp = self.path / "meta.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.meta, fh)
+        os.replace(tmp, self.path / "meta.json")
+
+    # Worker processes reopen the files rather than receiving a copy of them.
+    def __getstate__(self):
+        return {"path": self.path, "meta": self.meta}
+
+    def __setstate__(self, st):
+        self.path, self.meta = st["path"], st["meta"]
+        self._lock = threading.RLock()
+        self._open(create=False)
+
+    # ------------------------------------------------------------------
+    #  Writing
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return self.meta["size"]
+
+    @property
+    def capacity(self) -> int:
+        return self.meta["capacity"]
+
+    @property
+    def generation(self) -> int:
+        return self.meta["generation"]
+
+    def new_generation(self) -> int:
+        with self._lock:
+            self.meta["generation"] += 1
+            self._write_meta()
+            return self.meta["generation"]
+
+    def add(self, rows: np.ndarray, values: np.ndarray, gen: Optional[int] = None, *, flush: bool = True) -> None:
+        n = len(rows)
+        if n == 0:
+            return
+        cap = self.capacity
+        if n > cap:
+            rows, values, n = rows[-cap:], values[-cap:], cap
+
+        with self._lock:
+            gen = self.generation if gen is None else gen
+            head = self.meta["head"]
+            first = min(n, cap - head)
+            for lo, hi, dst in ((0, first, head), (first, n, 0)):
+                if hi > lo:
+                    self.rows[dst:dst + hi - lo] = rows[lo:hi]
+                    self.values[dst:dst + hi - lo] = values[lo:hi]
+                    self.gens[dst:dst + hi - lo] = gen
+
+            self.meta["head"] = (head + n) % cap
+            self.meta["size"] = min(cap, self.meta["size"] + n)
+            self.meta["total"] += n
+            if flush:
+                self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            for mm in (self.rows, self.values, self.gens):
+                mm.flush()
+            self._write_meta()
+
+    # ------------------------------------------------------------------
+    #  Reading
+    # ------------------------------------------------------------------
+    def indices(self, gen: Optional[int] = None, *, exclude: bool = False) -> np.ndarray:
+        with self._lock:
+            size = self.meta["size"]
+            if gen is None:
+                return np.arange(size)
+            mask = self.gens[:size] == gen
+        return np.flatnonzero(~mask if exclude else mask)
+
+    def sample(self, n: int, *, decay: float = 1.0, exclude_gen: Optional[int] = None,
+               rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        rng = rng or np.random.default_rng()
+        with self._lock:
+            size = self.meta["size"]
+            gens = np.array(self.gens[:size])
+            current = self.generation
+        candidates = np.arange(size) if exclude_gen is None else np.flatnonzero(gens != exclude_gen)
+        n = min(n, len(candidates))
+        if n <= 0:
+            return candidates[:0]
+        if decay >= 1.0:
+            return rng.choice(candidates, n, replace=False)
+
+        age = current - gens[candidates]
+        weights = np.power(decay, age.astype(np.float64))
+        return rng.choice(candidates, n, replace=False, p=weights / weights.sum())
+
+    def fetch(self, idx: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Sorted gathers keep memmap reads mostly sequential.
+        order = np.argsort(idx, kind="stable")
+        sorted_idx = np.asarray(idx)[order]
+        rows = np.empty((len(idx),) + self.rows.shape[1:], dtype=self.rows.dtype)
+        values = np.empty(len(idx), dtype=np.float32)
+        with self._lock:
+            rows[order] = self.rows[sorted_idx]
+            values[order] = self.values[sorted_idx]
+        return rows, values
@@ -0,0 +1,189 @@
+"""
+One evaluation queue for many concurrent searches.
+
+Each search gets a ``Lane`` from the ``InferenceScheduler`` and passes it to
+MCTS in place of its ``Value``: the search core hands every leaf batch to
+``lane.batch``, which queues it and waits.  A single scheduler thread merges
+the queued leaf batches of all lanes into batches of up to ``batch_size``
+rows for the shared value function, so the network sees full batches however
+many searches are running and however small their own leaf batches are.
+
+Order: lanes of live searches (priority 0) before pondering ones, then the
+earliest deadline, then arrival; a leaf batch that does not fit is split.
+Since a search waits for its leaf batch before it queues the next one,
+arrival order serves the lanes round-robin.  The scheduler dispatches as
+soon as every running lane (``lane.running()``) has something queued, when
+the batch is full, or after ``max_wait`` seconds, sooner if a deadline
+is due; a single search never waits for company.
+
+Values with a native evaluator (``Value.native_evaluator``) are scored by
+the search core without the interpreter and gain nothing from this, so
+callers keep passing those directly.
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from engine import metrics
+
+
+class _Request:
+    __slots__ = ("lane", "states", "values", "taken", "filled", "seq", "error", "done")
+
+    def __init__(self, lane: "Lane", states: list, seq: int):
+        self.lane = lane
+        self.states = states
+        self.values: List[float] = [0.0] * len(states)
+        self.taken = 0          # rows handed to a batch
+        self.filled = 0         # rows with a value
+        self.seq = seq
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+    def key(self):
+        deadline = self.lane.deadline
+        return self.lane.priority, deadline if deadline is not None else math.inf, self.seq
+
+
+class Lane:
+    def __init__(self, scheduler: "InferenceScheduler", *, deadline: Optional[float] = None, priority: int = 0):
+        self.scheduler = scheduler
+        self.deadline = deadline        # time.monotonic() seconds
+        self.priority = priority
+
+    def batch(self, states, **kwargs) -> List[float]:
+        return self.scheduler._submit(self, list(states))
+
+    def __call__(self, state, **kwargs) -> float:
+        return self.batch([state])[0]
+
+    # Marks a search on this lane as running, so the scheduler waits for
+    # its next leaf batch before dispatching a partial batch.
+    @contextmanager
+    def running(self):
+        sched = self.scheduler
+        with sched._cond:
+            sched._running += 1
+        try:
+            yield self
+        finally:
+            with sched._cond:
+                sched._running -= 1
+                sched._cond.notify()
+
+
+class InferenceScheduler:
+    def __init__(self, value, backend, *, batch_size: int = 256, max_wait: float = 0.005):
+        self.value = value
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._pending: List[_Request] = []
+        self._running = 0
+        self._seq = itertools.count()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    def lane(self, *, deadline: Optional[float] = None, priority: int = 0) -> Lane:
+        return Lane(self, deadline=deadline, priority=priority)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _submit(self, lane: Lane, states: list) -> List[float]:
+        if not states:
+            return []
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("inference scheduler is closed")
+            req = _Request(lane, states, next(self._seq))
+            self._pending.append(req)
+            self._cond.notify()
+        req.done.wait()
+        if req.error is not None:
+            raise req.error
+        return req.values
+
+    # ------------------------------------------------------------------
+    #  Scheduler thread
+    # ------------------------------------------------------------------
+    # None to dispatch now, else how long to wait for more rows.
+    def _ready(self, started: float) -> Optional[float]:
+        rows = sum(len(r.states) - r.taken for r in self._pending)
+        if rows >= self.batch_size or len(self._pending) >= self._running:
+            return None
+        now = time.monotonic()
+        wait = self.max_wait - (now - started)
+        deadlines = [r.lane.deadline for r in self._pending if r.lane.deadline is not None]
+        if deadlines:
+            wait = min(wait, min(deadlines) - now)
+        return wait if wait > 0 else None
+
+    def _take(self):
+        self._pending.sort(key=_Request.key)
+        batch, room = [], self.batch_size
+        for req in self._pending:
+            n = min(room, len(req.states) - req.taken)
+            batch.append((req, req.taken, req.taken + n))
+            req.taken += n
+            room -= n
+            if room == 0:
+                break
+        self._pending = [r for r in self._pending if r.taken < len(r.states)]
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    break
+                started = time.monotonic()
+                while not self._closed:
+                    wait = self._ready(started)
+                    if wait is None:
+                        break
+                    self._cond.wait(wait)
+                batch = self._take()
+            self._evaluate(batch)
+
+        with self._cond:
+            pending, self._pending = self._pending, []
+        for req in pending:
+            req.error = RuntimeError("inference scheduler is closed")
+            req.done.set()
+
+    def _evaluate(self, batch) -> None:
+        states = [s for req, lo, hi in batch for s in req.states[lo:hi]]
+        try:
+            values = self.value.batch(states, backend=self.backend)
+        except Exception as exc:
+            values, error = None, exc
+        metrics.add("sched.batches")
+        metrics.add("sched.rows", len(states))
+        metrics.add("sched.slots", self.batch_size)
+        metrics.add("sched.requests", len(batch))
+
+        at = 0
+        for req, lo, hi in batch:
+            if values is None:
+                req.error = error
+                req.done.set()
+                continue
+            req.values[lo:hi] = values[at:at + hi - lo]
+            at += hi - lo
+            req.filled += hi - lo
+            if req.filled == len(req.states):
+                req.done.set()
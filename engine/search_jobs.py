@@ -0,0 +1,389 @@
+"""
+Search jobs: long searches on a bounded pool of threads, with progress.
+
+``SearchJobs.start`` returns a ``SearchJob`` immediately.  The job grows an
+``mcts.Searcher`` tree in slices of at most ``interval`` seconds and, after
+each slice, publishes a snapshot: best move, principal variation, root value
+and the most visited moves.  Readers poll ``job.snapshot()`` or iterate
+``job.events()`` from asyncio (the server's SSE endpoint); neither ties up a
+thread while it waits.  ``stop`` ends a job early and still plays its current
+best move, ``cancel`` ends it without playing.
+
+Jobs run on ``engine.sessions.GameSession`` games: the game is pinned (kept
+from eviction) while its search runs and locked only to read the position and
+to play the move.  Moves are reported by their first element (the
+coordinates the server's move endpoints use).
+
+With ``ponder`` on, a job that plays its move keeps the tree and goes on
+searching the opponent's position on a separate pool of ``ponder_workers``
+threads (``Ponder``), up to ``ponder_simulations`` root visits.  The
+opponent's move stops it, interrupting the search mid-batch, and moves the
+tree down to the reply, so the next job starts from the statistics gathered
+meanwhile and only runs the visits still missing.
+
+Searches whose value function runs in Python (the networks) evaluate their
+leaves through one ``engine.scheduler.InferenceScheduler`` per value, so
+concurrent searches share full batches.  A job's lane carries its deadline
+(with a ``time_limit``); pondering lanes come after live ones.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+import engine.mcts as mcts
+from engine.scheduler import InferenceScheduler
+
+TERMINAL = ("done", "stopped", "cancelled", "failed")
+
+
+def _move_key(move):
+    return move[0] if move is not None else None
+
+
+# Root statistics of a Searcher, reduced to what a client shows.
+def summarize_search(stats: Dict[str, Any], top: int = 5) -> Dict[str, Any]:
+    order = sorted(range(len(stats["moves"])), key=lambda i: -stats["visits"][i])[:top]
+    return \
+    {
+        "simulations": stats["simulations"],
+        "move": _move_key(stats["move"]),
+        "value": stats["root_q"],
+        "pv": [_move_key(m) for m in stats.get("pv", [])],
+        "top": [{"move": _move_key(stats["moves"][i]), "visits": stats["visits"][i], "q": stats["q"][i]}
+                for i in order if stats["visits"][i]],
+    }
+
+
+# Searches a kept tree in the background until stopped or `limit` root
+# visits, after freeing what advance() left behind.  `stop` returns once the
+# search is idle, so the caller may use the tree right away; later calls
+# leave the tree alone, since by then a search job may be running it.
+class Ponder:
+    def __init__(self, searcher, limit: int, lane=None):
+        self.searcher = searcher
+        self.limit = limit
+        self.lane = lane
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._idle = threading.Event()
+        self._idle.set()
+        self._released = threading.Event()
+
+    def run(self) -> None:
+        while True:
+            with self._lock:
+                if self._stopped or self.searcher.simulations >= self.limit:
+                    return
+                self._idle.clear()
+            try:
+                self.searcher.collect()
+                if self.lane is not None:
+                    self.lane.priority, self.lane.deadline = 1, None
+                with self.lane.running() if self.lane is not None else nullcontext():
+                    self.searcher.run(self.limit - self.searcher.simulations)
+            finally:
+                self._idle.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped
+
+    def stop(self):
+        with self._lock:
+            first, self._stopped = not self._stopped, True
+        if first:
+            self.searcher.stop()
+            self._idle.wait()
+            self.searcher.run(0)    # clears a stop that arrived between runs
+            self._released.set()
+        self._released.wait()
+        return self.searcher
+
+    # Stops and lets go of the tree (freed unless a job has taken it).
+    def drop(self) -> None:
+        self.stop()
+        self.searcher = None
+
+
+class SearchJob:
+    def __init__(self, session, *, simulations: int, c: float, time_limit: float, play: bool):
+        self.id = uuid.uuid4().hex
+        self.session = session
+        self.game = session.id
+        self.simulations = simulations
+        self.c = c
+        self.time_limit = time_limit
+        self.play = play
+        self.status = "queued"
+        self.progress: Optional[Dict[str, Any]] = None
+        self.final: Optional[Tuple[str, Dict[str, Any]]] = None
+        self.created = time.time()
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._cancel = False
+        self._searcher = None
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._finished = threading.Event()
+
+    # ------------------------------------------------------------------
+    #  Control
+    # ------------------------------------------------------------------
+    def stop(self) -> None:
+        with self._lock:
+            self._stop.set()
+            if self._searcher is not None:
+                self._searcher.stop()
+
+    def cancel(self) -> None:
+        self._cancel = True
+        self.stop()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    # ------------------------------------------------------------------
+    #  Publishing
+    # ------------------------------------------------------------------
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            if event in TERMINAL:
+                self.status, self.final = event, (event, data)
+                self._finished.set()
+            else:
+                self.status, self.progress = "running", data
+            subscribers = list(self._subscribers)
+        for loop, q in subscribers:
+            loop.call_soon_threadsafe(q.put_nowait, (event, data))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {"job": self.id, "game": self.game, "status": self.status, "progress": self.progress}
+            if self.final is not None:
+                out["result"] = self.final[1]
+            return out
+
+    # The latest progress (if any) first, then every event up to and
+    # including the terminal one.
+    async def events(self):
+        loop = asyncio.get_running_loop()
+        q: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            final = self.final
+            backlog = [("progress", self.progress)] if self.progress is not None else []
+            if final is not None:
+                backlog.append(final)
+            else:
+                self._subscribers.append((loop, q))
+        try:
+            for event in backlog:
+                yield event
+            if final is not None:
+                return
+            while True:
+                event = await q.get()
+                yield event
+                if event[0] in TERMINAL:
+                    return
+        finally:
+            with self._lock:
+                if (loop, q) in self._subscribers:
+                    self._subscribers.remove((loop, q))
+
+    async def wait(self) -> Tuple[str, Dict[str, Any]]:
+        async for _ in self.events():
+            pass
+        return self.final
+
+
+class SearchJobs:
+    def __init__(self, engine, *, workers: int = 4, interval: float = 0.25, batch_size: int = 32, keep: int = 256,
+                 ponder: bool = False, ponder_workers: int = 1, ponder_simulations: int = 100_000,
+                 coalesce: bool = True, coalesce_batch: int = 256, coalesce_wait: float = 0.005):
+        self.engine = engine
+        self.interval = interval
+        self.batch_size = batch_size
+        self.keep = keep
+        # A kept tree carries one value function for both sides.
+        self.ponder = ponder and engine.values[0] is engine.values[1]
+        self.ponder_simulations = ponder_simulations
+        self.coalesce = coalesce
+        self.coalesce_batch = coalesce_batch
+        self.coalesce_wait = coalesce_wait
+        self._schedulers: Dict[int, InferenceScheduler] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search")
+        self._ponder_pool = ThreadPoolExecutor(max_workers=ponder_workers, thread_name_prefix="ponder")
+        self._jobs: "OrderedDict[str, SearchJob]" = OrderedDict()
+        self._active: Dict[Any, SearchJob] = {}
+        self.ponder_workers = ponder_workers
+        self._ponders: "OrderedDict[Any, Ponder]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, session, *, simulations: int = 1000, c: float = 1.4, time_limit: float = 0.0,
+              play: bool = True) -> SearchJob:
+        job = SearchJob(session, simulations=simulations, c=c, time_limit=time_limit, play=play)
+        with self._lock:
+            if job.game in self._active:
+                raise RuntimeError(f"game {job.game} already has a search running")
+            self._active[job.game] = job
+            self._jobs[job.id] = job
+            self._prune()
+        with session.lock:
+            session.pins += 1
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> SearchJob:
+        with self._lock:
+            return self._jobs[job_id]
+
+    def active(self, game) -> Optional[SearchJob]:
+        with self._lock:
+            return self._active.get(game)
+
+    def _prune(self) -> None:
+        while len(self._jobs) > self.keep:
+            oldest = next((jid for jid, j in self._jobs.items() if j.finished), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest]
+
+    def close(self) -> None:
+        with self._lock:
+            jobs = list(self._active.values())
+        for job in jobs:
+            job.cancel()
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            ponders = list(self._ponders.values())
+        for ponder in ponders:
+            ponder.stop()
+        self._ponder_pool.shutdown(wait=True)
+        for scheduler in self._schedulers.values():
+            scheduler.close()
+
+    # The value a new search evaluates with, and its scheduler lane (None
+    # when the value is used directly).
+    def evaluator(self, turn: int):
+        value = self.engine.values[turn]
+        native = getattr(value, "native_evaluator", lambda backend: None)(self.engine.backend)
+        if not self.coalesce or native is not None:
+            return value, None
+        with self._lock:
+            scheduler = self._schedulers.get(id(value))
+            if scheduler is None:
+                scheduler = self._schedulers[id(value)] = InferenceScheduler \
+                (
+                    value, self.engine.backend, batch_size=self.coalesce_batch, max_wait=self.coalesce_wait
+                )
+        lane = scheduler.lane()
+        return lane, lane
+
+    # The newest games ponder: with every ponder thread taken, the game that
+    # has pondered longest stops and drops its tree, so at most
+    # `ponder_workers` pondered trees are kept.  Ponders already stopped,
+    # whose tree a job may have taken, no longer count.
+    def _start_ponder(self, session) -> None:
+        ponder = Ponder(session.tree, self.ponder_simulations, session.lane)
+        session.tree, session.ponder = None, ponder
+        with self._lock:
+            for game in [g for g, p in self._ponders.items() if p.stopped]:
+                del self._ponders[game]
+            self._ponders.pop(session.id, None)
+            self._ponders[session.id] = ponder
+            preempted = list(self._ponders.values())[:-self.ponder_workers]
+        for old in preempted:
+            old.drop()
+
+        def run():
+            try:
+                ponder.run()
+            finally:
+                with self._lock:
+                    if self._ponders.get(session.id) is ponder:
+                        del self._ponders[session.id]
+
+        self._ponder_pool.submit(run)
+
+    # ------------------------------------------------------------------
+    #  Worker
+    # ------------------------------------------------------------------
+    # The game is released before the terminal event goes out, so whoever
+    # waited on the job can start the next search right away.
+    def _run(self, job: SearchJob) -> None:
+        try:
+            event, data = self._search(job)
+        except Exception:
+            event, data = "failed", {"error": traceback.format_exc()}
+        with job.session.lock:
+            job.session.pins -= 1
+        with self._lock:
+            self._active.pop(job.game, None)
+        job.publish(event, data)
+
+    def _search(self, job: SearchJob) -> Tuple[str, Dict[str, Any]]:
+        engine = self.engine
+        session = job.session
+        with session.lock:
+            state, terminal, ply = session.state, session.result, len(session.moves)
+            searcher, lane = session.take_tree(), session.lane
+        if terminal is not None or job._cancel:
+            return "cancelled" if job._cancel else "done", {"move": None, "result": terminal}
+
+        if searcher is not None and searcher.c != job.c:
+            searcher = None         # a kept tree searches with the c it was built with
+        if searcher is None:
+            value, lane = self.evaluator(state.turn)
+            searcher = mcts.Searcher(state, value, engine.policy, engine.backend, job.c, self.batch_size)
+        with job._lock:
+            job._searcher = searcher
+
+        # `simulations` counts root visits, including those of a reused tree.
+        t0 = time.perf_counter()
+        reused = searcher.simulations
+        if lane is not None:
+            lane.priority = 0
+            lane.deadline = time.monotonic() + job.time_limit if job.time_limit > 0 else None
+        with lane.running() if lane is not None else nullcontext():
+            while searcher.simulations < job.simulations and not job._stop.is_set():
+                budget = self.interval
+                if job.time_limit > 0:
+                    budget = min(budget, job.time_limit - (time.perf_counter() - t0))
+                    if budget <= 0:
+                        break
+                searcher.run(job.simulations - searcher.simulations, budget)
+                job.publish("progress", {**summarize_search(searcher.result()), "seconds": time.perf_counter() - t0})
+
+        # Stopped before it started: it still needs a move.  A stop lands on
+        # the next run, so it may take a few tries; a cancel ends them.
+        while searcher.simulations == 0 and not job._cancel:
+            searcher.run(0)
+            searcher.run(1)
+        summary = {**summarize_search(searcher.result()), "seconds": time.perf_counter() - t0, "reused": reused}
+        if job._cancel:
+            return "cancelled", summary
+        best = searcher.result()["move"]
+        result = None
+        if job.play:
+            with session.lock:
+                if len(session.moves) != ply:
+                    raise RuntimeError(f"game {job.game} moved on during the search; its move was not played")
+                if self.ponder:
+                    session.tree, session.lane = searcher, lane     # play() moves it down to the new position
+                result = session.play(best[0])
+                if session.tree is not None:
+                    self._start_ponder(session)
+        return "stopped" if job._stop.is_set() else "done", {**summary, "result": result}
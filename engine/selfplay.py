@@ -0,0 +1,248 @@
+"""
+Self-play drivers.
+
+``play_games`` is the threaded loop used in-process: it keeps ``engine.threads``
+games in flight and hands every finished game to a callback.  ``SelfPlayPool``
+runs that same loop in separate worker processes, one Engine per worker, so
+Python-side search (the connect4 backend, Python value functions, policy
+calls) is no longer limited to one core by the GIL.
+
+Workers own a slice of each request's games and send every finished game back
+as a packed record (compact rows + float16 value targets), not as pickled
+states.  ``SelfPlayPool.reload`` has every worker swap in the weights on disk,
+also in the middle of a task.
+"""
+
+from __future__ import annotations
+
+import copy
+import multiprocessing as mp
+import queue
+import signal
+import struct
+import threading
+import traceback
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from engine import metrics, tracing
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  In-process loop
+# ──────────────────────────────────────────────────────────────────────────
+def play_games(engine, total_games: int, on_game: Optional[Callable] = None,
+               stop: Optional[threading.Event] = None) -> List[Optional[int]]:
+    unfinished = set(range(min(total_games, engine.threads)))
+    final = [None] * min(total_games, engine.threads)
+
+    while unfinished and not (stop and stop.is_set()):
+        sims = engine.config["mcts"]["simulations"]
+        c_val = engine.config["mcts"]["c_puct"]
+        results = engine.play_mcts_parallel(list(unfinished), simulations=sims, c=c_val)
+
+        finished_now = [(results[i], i) for i in unfinished if results[i] is not None]
+        for res, idx in finished_now:
+            unfinished.remove(idx)
+            final[idx] = res
+            metrics.add("games")
+            if on_game is not None:
+                rows, labels = engine.harvest(idx)
+                on_game(rows, labels, sum(r is not None for r in final))
+
+            if len(final) < total_games:
+                final += [None]
+                unfinished.add(engine.add_game())
+
+    return final
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Game records
+# ──────────────────────────────────────────────────────────────────────────
+_HEADER = struct.Struct("<II")
+
+
+def pack_game(rows: np.ndarray, labels: np.ndarray) -> bytes:
+    rows = np.ascontiguousarray(rows)
+    return _HEADER.pack(len(rows), rows[0].nbytes if len(rows) else 0) \
+        + rows.tobytes() + np.asarray(labels, dtype=np.float16).tobytes()
+
+
+def unpack_game(blob: bytes, row_shape, dtype) -> tuple[np.ndarray, np.ndarray]:
+    n, row_bytes = _HEADER.unpack_from(blob)
+    body = _HEADER.size + n * row_bytes
+    rows = np.frombuffer(blob, dtype=dtype, count=n * int(np.prod(row_shape)), offset=_HEADER.size)
+    labels = np.frombuffer(blob, dtype=np.float16, count=n, offset=body)
+    return rows.reshape((n,) + tuple(row_shape)), labels.astype(np.float32)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Process pool
+# ──────────────────────────────────────────────────────────────────────────
+# Reloads the worker's Values on request (Value.reload swaps the model in
+# one assignment, so games in flight keep going) and reports the weights'
+# mtimes back.
+def _reloader(wid, engine, reload_q, ack_q):
+    while reload_q.get() is not None:
+        values = list({id(v): v for v in engine.values}.values())
+        try:
+            for value in values:
+                value.reload()
+            ack_q.put((wid, [getattr(v, "_weights_mtime", None) for v in values]))
+        except Exception:
+            ack_q.put((wid, traceback.format_exc()))
+
+
+def _worker(wid, config, task_q, out_q, stop, reload_q, ack_q, trace=False):
+    # Ctrl-C reaches the whole process group; the parent decides when to stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if trace:
+        tracing.enable()
+    try:
+        from engine.engine import Engine
+        engine = Engine(config)
+    except Exception:
+        out_q.put(("error", wid, traceback.format_exc()))
+        return
+    threading.Thread(target=_reloader, args=(wid, engine, reload_q, ack_q), name="reload", daemon=True).start()
+    out_q.put(("ready", wid, None))
+
+    while True:
+        task = task_q.get()
+        if task is None:
+            break
+        n_games, mcts_params = task
+        before = metrics.counters()
+        try:
+            engine.config["mcts"].update(mcts_params)
+            engine.reset_all_games()
+            play_games \
+            (
+                engine, n_games,
+                on_game=lambda rows, labels, _: out_q.put(("game", wid, pack_game(rows, labels))),
+                stop=stop,
+            )
+        except Exception:
+            out_q.put(("error", wid, traceback.format_exc()))
+            continue
+        if trace:
+            out_q.put(("trace", wid, tracing.drain()))
+        out_q.put(("done", wid, metrics.delta(before)))
+
+
+class SelfPlayPool:
+    def __init__(self, config: dict, workers: int):
+        from engine.engine import Engine
+
+        self.config = copy.deepcopy(config)
+        self.n_workers = workers
+        # Row layout is needed to decode the records the workers send back.
+        probe = Engine(self.config)
+        encode, _, self.row_dtype = probe.row_codec(compact=True)
+        self.row_shape = encode(probe.backend.create_init_state()).shape
+        self._procs: list = []
+
+    def start(self) -> "SelfPlayPool":
+        ctx = mp.get_context("spawn")
+        self._task_qs = [ctx.Queue() for _ in range(self.n_workers)]
+        self._reload_qs = [ctx.Queue() for _ in range(self.n_workers)]
+        self._out_q = ctx.Queue()
+        self._ack_q = ctx.Queue()
+        self._stop = ctx.Event()
+        self._procs = \
+        [
+            ctx.Process(target=_worker, args=(wid, self.config, self._task_qs[wid], self._out_q, self._stop,
+                                              self._reload_qs[wid], self._ack_q, tracing.enabled()),
+                        name=f"self-play-{wid}", daemon=True)
+            for wid in range(self.n_workers)
+        ]
+        for p in self._procs:
+            p.start()
+        for _ in range(self.n_workers):
+            kind, wid, payload = self._next_message()
+            if kind == "error":
+                self.stop()
+                raise RuntimeError(f"self-play worker {wid} failed to start:\n{payload}")
+        return self
+
+    def _next_message(self, stop: Optional[threading.Event] = None):
+        while True:
+            try:
+                return self._out_q.get(timeout=0.5)
+            except queue.Empty:
+                if stop is not None and stop.is_set():
+                    self._stop.set()
+                if not all(p.is_alive() for p in self._procs):
+                    raise RuntimeError("self-play worker process exited unexpectedly")
+
+    # Plays total_games split across the workers and calls
+    # on_game(rows, labels, worker_id) in the parent as each game arrives.
+    def play(self, total_games: int, mcts_params: dict, on_game: Callable,
+             stop: Optional[threading.Event] = None) -> int:
+        self._stop.clear()
+        busy = 0
+        for wid in range(self.n_workers):
+            share = total_games // self.n_workers + (wid < total_games % self.n_workers)
+            if share:
+                self._task_qs[wid].put((share, dict(mcts_params)))
+                busy += 1
+
+        played, errors = 0, []
+        while busy:
+            kind, wid, payload = self._next_message(stop)
+            if kind == "game":
+                rows, labels = unpack_game(payload, self.row_shape, self.row_dtype)
+                played += 1
+                on_game(rows, labels, wid)
+            elif kind == "trace":
+                # Worker spans join this process's timeline (engine/tracing.py).
+                tracing.extend(payload)
+            elif kind == "done":
+                # Worker counters (games, plies, simulations, NN batches)
+                # join this process's totals once its share is finished.
+                metrics.merge(payload)
+                busy -= 1
+            elif kind == "error":
+                busy -= 1
+                errors.append(f"worker {wid}:\n{payload}")
+        if errors:
+            raise RuntimeError("self-play worker failed\n" + "\n".join(errors))
+        return played
+
+    # Every worker reloads its Values from disk; returns {worker id: weight
+    # mtimes} once all have.  Safe to call while play() runs on another thread.
+    def reload(self, timeout: float = 60.0) -> dict:
+        for q in self._reload_qs:
+            q.put(True)
+        acks, errors = {}, []
+        for _ in range(self.n_workers):
+            try:
+                wid, payload = self._ack_q.get(timeout=timeout)
+            except queue.Empty:
+                raise RuntimeError("self-play workers did not confirm the reload") from None
+            if isinstance(payload, str):
+                errors.append(f"worker {wid}:\n{payload}")
+            else:
+                acks[wid] = payload
+        if errors:
+            raise RuntimeError("self-play worker failed to reload\n" + "\n".join(errors))
+        return acks
+
+    def stop(self):
+        for q in getattr(self, "_reload_qs", []):
+            q.put(None)
+        for q in getattr(self, "_task_qs", []):
+            q.put(None)
+        for p in self._procs:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        self._procs = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
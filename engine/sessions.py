@@ -0,0 +1,225 @@
+"""
+Game sessions for the server: opaque ids, one lock per game, bounded memory.
+
+``SessionStore`` holds the games being played, each a ``GameSession`` with its
+current state, the moves played so far and a lock that every read and move
+takes, so concurrent requests on one game are serialised while different games
+proceed in parallel.  Games are kept in least-recently-used order; the store
+evicts a game once it has been idle for ``idle_timeout`` seconds, or the
+least recently used ones when there are more than ``max_sessions``.  A game
+that is locked or pinned (a search is running on it) is never evicted.
+
+A session may also keep a search tree for its current position (``tree``)
+or be pondering on one (``ponder``, see ``engine.search_jobs``); moves played
+through ``play`` stop the pondering and move the tree along.  Eviction drops
+both.
+
+With ``persist_dir`` set, an evicted game is written there in compact form,
+its move keys (``move[0]``) and nothing else, and is replayed from the
+initial position the next time its id is used.  Without it, evicted ids are
+simply gone.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, List, Optional
+
+_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _to_json(key):
+    return list(key) if isinstance(key, tuple) else key
+
+
+def _from_json(key):
+    return tuple(key) if isinstance(key, list) else key
+
+
+class GameSession:
+    def __init__(self, sid: str, engine):
+        self.id = sid
+        self.engine = engine
+        self.state = engine.backend.create_init_state()
+        self.moves: List[Any] = []
+        self.result: Optional[int] = engine._evaluate(self.state)
+        self._index = None      # engine.move_index of the current state
+        self.tree = None
+        self.lane = None        # the tree's engine.scheduler lane, if any
+        self.ponder = None
+        self.lock = threading.RLock()
+        self.pins = 0
+        self.evicted = False
+        self.last_used = time.monotonic()
+
+    def legal_moves(self):
+        return list(self.move_index().values())
+
+    # Legal moves by key, kept until the next move so /legal_moves and
+    # /play_move on one position generate them once.
+    def move_index(self) -> dict:
+        if self._index is None:
+            self._index = self.engine.move_index(self.state)
+        return self._index
+
+    # The search tree kept for the current position, or None; pondering on
+    # it stops first.
+    def take_tree(self):
+        if self.ponder is not None:
+            self.tree, self.ponder = self.ponder.stop(), None
+        tree, self.tree = self.tree, None
+        return tree
+
+    # `key` is the first element of a legal move: (r0, c0, r1, c1) for
+    # chess, the column for connect4.
+    def play(self, key) -> Optional[int]:
+        if self.result is not None:
+            raise ValueError("Game is over")
+        key = _from_json(key)
+        try:
+            move = self.move_index().get(key)
+        except TypeError:       # unhashable, so not a move key
+            move = None
+        if move is None:
+            raise ValueError("Illegal move")
+        tree = self.take_tree()
+        self.state = self.engine.backend.play_move(self.state, move)
+        self._index = None
+        self.moves.append(move[0])
+        self.result = self.engine._evaluate(self.state)
+        if tree is not None and self.result is None:
+            tree.advance(move, collect=False)       # the old tree is freed while pondering
+            self.tree = tree
+        return self.result
+
+    def to_record(self) -> dict:
+        return {"id": self.id, "moves": [_to_json(k) for k in self.moves], "result": self.result}
+
+    @classmethod
+    def from_record(cls, engine, record: dict) -> "GameSession":
+        session = cls(record["id"], engine)
+        for key in record["moves"]:
+            session.play(key)
+        return session
+
+
+class SessionStore:
+    def __init__(self, engine, *, max_sessions: int = 1000, idle_timeout: float = 1800.0,
+                 persist_dir: Optional[str | os.PathLike] = None):
+        self.engine = engine
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        if self.persist_dir:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+        self._sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self) -> GameSession:
+        session = GameSession(secrets.token_urlsafe(12), self.engine)
+        with self._lock:
+            self._sessions[session.id] = session
+            self._sweep(keep=session)
+        return session
+
+    # Looks a game up (restoring it from persist_dir if it was evicted)
+    # without locking it.  KeyError for unknown ids.
+    def get(self, sid: str) -> GameSession:
+        with self._lock:
+            session = self._sessions.get(sid)
+            if session is None:
+                session = self._restore(sid)
+                self._sessions[sid] = session
+            else:
+                self._sessions.move_to_end(sid)
+            session.last_used = time.monotonic()
+            self._sweep(keep=session)
+            return session
+
+    # Returns the game with its lock held; the caller releases
+    # `session.lock`.  Retries if the game was evicted between the lookup
+    # and the lock.
+    def acquire(self, sid: str) -> GameSession:
+        while True:
+            session = self.get(sid)
+            session.lock.acquire()
+            if not session.evicted:
+                return session
+            session.lock.release()
+
+    @contextmanager
+    def use(self, sid: str):
+        session = self.acquire(sid)
+        try:
+            yield session
+        finally:
+            session.last_used = time.monotonic()
+            session.lock.release()
+
+    def sweep(self) -> None:
+        with self._lock:
+            self._sweep()
+
+    # Persists every game still in memory (with persist_dir set).
+    def close(self) -> None:
+        with self._lock:
+            for session in list(self._sessions.values()):
+                with session.lock:
+                    self._evict(session)
+            self._sessions.clear()
+
+    # ------------------------------------------------------------------
+    #  Eviction
+    # ------------------------------------------------------------------
+    # Oldest first: evict while over capacity or idle, skipping games that
+    # are in use and `keep` (the one being handed out).  Callers hold
+    # self._lock.
+    def _sweep(self, keep: Optional[GameSession] = None) -> None:
+        now = time.monotonic()
+        excess = len(self._sessions) - self.max_sessions
+        for session in list(self._sessions.values()):
+            if excess <= 0 and now - session.last_used < self.idle_timeout:
+                break
+            if session is keep or session.pins or not session.lock.acquire(blocking=False):
+                continue
+            try:
+                self._evict(session)
+            finally:
+                session.lock.release()
+            del self._sessions[session.id]
+            excess -= 1
+
+    def _evict(self, session: GameSession) -> None:
+        session.evicted = True
+        session.take_tree()
+        if self.persist_dir is None:
+            return
+        path = self.persist_dir / f"{session.id}.json"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(session.to_record(), fh, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def _restore(self, sid: str) -> GameSession:
+        if self.persist_dir is None or not _ID.match(sid):
+            raise KeyError(sid)
+        path = self.persist_dir / f"{sid}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                record = json.load(fh)
+        except FileNotFoundError:
+            raise KeyError(sid) from None
+        session = GameSession.from_record(self.engine, record)
+        path.unlink()
+        return session
@@ -0,0 +1,173 @@
+"""
+Position suites for search benchmarks.
+
+One position per line, EPD style: the position, then ``;``-terminated
+operations, of which ``bm`` (best moves), ``am`` (moves to avoid) and ``id``
+are used.  Blank lines and ``#`` comments are skipped::
+
+    6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - bm Ra8#; id "back rank";
+    121212 bm 1; id "vertical";
+
+Chess positions are FEN (the move counters may be left out, as in EPD) and
+moves are SAN or UCI.  Connect4 positions are the columns played so far,
+1-7 from the left (the usual notation for connect4 test sets, ``-`` for the
+empty board), and moves are columns.  Moves are resolved against the
+backend's legal moves when the suite is loaded, so a search result can be
+checked with ``pos.solved_by(result["move"])``.
+"""
+
+from __future__ import annotations
+
+import re
+import shlex
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+@dataclass
+class SuitePosition:
+    id: str
+    state: Any
+    best_moves: List[Any] = field(default_factory=list)
+    avoid_moves: List[Any] = field(default_factory=list)
+    text: str = ""
+
+    # A search result is correct if it plays a best move (when any are
+    # given) and avoids every `am` move.
+    def solved_by(self, move) -> bool:
+        if self.best_moves and move not in self.best_moves:
+            return False
+        return move not in self.avoid_moves
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Chess
+# ──────────────────────────────────────────────────────────────────────────
+_FEN = re.compile(r"^(\S+\s+[wb]\s+\S+\s+\S+)(?:\s+(\d+)\s+(\d+))?\s*(.*)$")
+_SAN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?[QRBN])?$")
+_UCI = re.compile(r"^([a-h][1-8])([a-h][1-8])[qrbn]?$")
+
+
+# Board index 0 is a8: row 0 is rank 8, column 0 the a-file.
+def _square(name: str):
+    return 8 - int(name[1]), ord(name[0]) - ord("a")
+
+
+def _chess_position(backend, line: str):
+    m = _FEN.match(line)
+    if not m:
+        raise ValueError("expected a FEN/EPD position")
+    fen, half, full, ops = m.groups()
+    return backend.state_from_fen(f"{fen} {half or 0} {full or 1}"), ops
+
+
+def _chess_move(backend, state, text: str):
+    text = text.rstrip("+#!?")
+    legal = list(backend.get_legal_moves(state))
+    uci = _UCI.match(text)
+    if uci:
+        want = _square(uci.group(1)) + _square(uci.group(2))
+        found = [mv for mv in legal if tuple(mv[0]) == want]
+    else:
+        san = _SAN.match(text)
+        if not san:
+            raise ValueError(f"cannot parse move {text!r}")
+        piece, file, rank, dest = san.groups()
+        piece = piece or "P"
+        found = []
+        for mv in legal:
+            fr, fc, tr, tc = mv[0]
+            if (tr, tc) != _square(dest) or chr(state.board[fr * 8 + fc]).upper() != piece:
+                continue
+            if file and fc != ord(file) - ord("a"):
+                continue
+            if rank and fr != 8 - int(rank):
+                continue
+            found.append(mv)
+    if len(found) != 1:
+        raise ValueError(f"{text!r} is {'ambiguous' if found else 'not a legal move'}")
+    return found[0]
+
+
+def _chess_text(move) -> str:
+    fr, fc, tr, tc = move[0]
+    return f"{chr(97 + fc)}{8 - fr}{chr(97 + tc)}{8 - tr}"
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Connect4
+# ──────────────────────────────────────────────────────────────────────────
+def _c4_position(backend, line: str):
+    moves, _, ops = line.partition(" ")
+    state = backend.create_init_state()
+    for col in moves.strip("-"):
+        state = backend.play_move(state, _c4_move(backend, state, col))
+    return state, ops
+
+
+def _c4_move(backend, state, text: str):
+    move = (int(text) - 1, 0)
+    if move not in backend.get_legal_moves(state):
+        raise ValueError(f"column {text} is full or out of range")
+    return move
+
+
+def _c4_text(move) -> str:
+    return str(move[0] + 1)
+
+
+_GAMES = \
+{
+    "chess_backend": (_chess_position, _chess_move, _chess_text),
+    "c4_backend":    (_c4_position, _c4_move, _c4_text),
+}
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Loading
+# ──────────────────────────────────────────────────────────────────────────
+def _operations(text: str) -> Dict[str, List[str]]:
+    ops = {}
+    for chunk in text.split(";"):
+        words = shlex.split(chunk)
+        if words:
+            ops[words[0]] = words[1:]
+    return ops
+
+
+def _game(backend):
+    key = backend.__name__.rsplit(".", 1)[-1]
+    if key not in _GAMES:
+        raise ValueError(f"no suite format for backend {key}")
+    return _GAMES[key]
+
+
+# UCI for chess, the column for connect4.
+def move_text(backend, move) -> str:
+    return _game(backend)[2](move)
+
+
+def load_suite(path: str | Path, backend) -> List[SuitePosition]:
+    parse_position, parse_move, _ = _game(backend)
+
+    positions = []
+    with open(path, "r", encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                state, rest = parse_position(backend, line)
+                ops = _operations(rest)
+                positions.append(SuitePosition \
+                (
+                    id=" ".join(ops.get("id", [])) or f"{Path(path).stem}.{len(positions) + 1}",
+                    state=state,
+                    best_moves=[parse_move(backend, state, m) for m in ops.get("bm", [])],
+                    avoid_moves=[parse_move(backend, state, m) for m in ops.get("am", [])],
+                    text=line,
+                ))
+            except ValueError as exc:
+                raise ValueError(f"{path}:{lineno}: {exc}") from None
+    return positions
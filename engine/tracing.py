@@ -0,0 +1,164 @@
+"""
+Opt-in timeline of spans in Chrome trace format (chrome://tracing, Perfetto).
+
+``span(name, **args)`` times a block on the calling thread: the engine marks
+``Engine.play_mcts``, each MCTS leaf-batch evaluation (``Value.batch``, one
+per flush when the value function runs in Python), the value net's batching
+thread, dataset builds, and training batches and steps.  Every span carries
+its process and thread ids and the thread's CPU time (``cpu_ms``); a span
+whose CPU time is well below its wall time was waiting, on the GIL, a queue
+or I/O.  Thread and process names are recorded once, so the ten self-play
+threads and each worker process get their own labelled track.
+
+Nothing is recorded until ``enable`` or ``configure``; disabled spans cost
+one global lookup.  Self-play worker processes ``drain`` their events and
+send them to the parent, which ``extend``s its own, so one file holds the
+whole run.  ``write`` dumps everything as ``{"traceEvents": [...]}``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import multiprocessing as mp
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_lock = threading.Lock()
+_events: Optional[List[Dict[str, Any]]] = None
+_named: set = set()
+_path: Optional[Path] = None
+_max_events = 0
+_dropped = 0
+
+# perf_counter for spans, shifted to the wall clock so that the timelines of
+# different processes line up.
+_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+
+_NULL = contextlib.nullcontext()
+
+
+def _now_us() -> float:
+    return (time.perf_counter_ns() + _OFFSET_NS) / 1000
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "t0", "cpu0")
+
+    def __init__(self, name: str, cat: str, args: Dict[str, Any]):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.t0 = _now_us()
+        self.cpu0 = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        cpu_ms = (time.thread_time() - self.cpu0) * 1000
+        self.args["cpu_ms"] = round(cpu_ms, 3)
+        _record({"ph": "X", "name": self.name, "cat": self.cat, "ts": self.t0, "dur": _now_us() - self.t0,
+                 "args": self.args})
+        return False
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Recording
+# ──────────────────────────────────────────────────────────────────────────
+def enabled() -> bool:
+    return _events is not None
+
+
+def span(name: str, cat: str = "engine", **args):
+    if _events is None:
+        return _NULL
+    return _Span(name, cat, args)
+
+
+def _record(event: Dict[str, Any]) -> None:
+    global _dropped
+    pid, tid = os.getpid(), threading.get_native_id()
+    event["pid"], event["tid"] = pid, tid
+    with _lock:
+        if _events is None:
+            return
+        if (pid, tid) not in _named:
+            _named.add((pid, tid))
+            _events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                            "args": {"name": threading.current_thread().name}})
+        if _max_events and len(_events) >= _max_events:
+            _dropped += 1
+            return
+        _events.append(event)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Setup and output
+# ──────────────────────────────────────────────────────────────────────────
+# A new event list, opening with this process's name.  Callers hold _lock.
+def _started() -> List[Dict[str, Any]]:
+    _named.clear()
+    return [{"ph": "M", "name": "process_name", "pid": os.getpid(), "tid": 0,
+             "args": {"name": mp.current_process().name}}]
+
+
+# Starts recording in memory; `max_events` (0 = no limit) caps a long run,
+# later spans are counted as dropped.
+def enable(max_events: int = 2_000_000) -> None:
+    global _events, _max_events
+    with _lock:
+        if _events is None:
+            _events = _started()
+        _max_events = max_events
+
+
+# Records from now on and makes `path` the default for `write`.
+def configure(path: str | Path, max_events: int = 2_000_000) -> Path:
+    global _path
+    _path = Path(path)
+    _path.parent.mkdir(parents=True, exist_ok=True)
+    enable(max_events)
+    return _path
+
+
+def disable() -> None:
+    global _events, _path, _dropped
+    with _lock:
+        _events, _path, _dropped = None, None, 0
+        _named.clear()
+
+
+# Takes the events recorded so far (a worker process hands them to its
+# parent); process and thread names are sent again with the next events.
+def drain() -> List[Dict[str, Any]]:
+    global _events
+    with _lock:
+        if _events is None:
+            return []
+        events, _events = _events, _started()
+    return events
+
+
+def extend(events: List[Dict[str, Any]]) -> None:
+    with _lock:
+        if _events is not None:
+            _events.extend(events)
+
+
+def write(path: str | Path | None = None) -> Optional[Path]:
+    path = Path(path) if path is not None else _path
+    if path is None or _events is None:
+        return None
+    with _lock:
+        events = list(_events)
+        dropped = _dropped
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped_events": dropped}}, fh,
+                  separators=(",", ":"), default=float)
+    os.replace(tmp, path)
+    return path
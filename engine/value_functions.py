@@ -1,9 +1,18 @@
+import functools
+import os
 import threading
 import queue
-import torch
+import time
 
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-DTYPE = torch.float16 if DEVICE == "cuda" else torch.float32
+from engine import metrics, tracing
+
+# torch (and the CUDA probe) load with the first network value function;
+# native and rollout evaluators never import it.
+@functools.lru_cache(maxsize=None)
+def _device():
+    import torch
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return device, torch.float16 if device == "cuda" else torch.float32
 
 class Value:
     def __init__(self, name, **kwargs):
@@ -14,13 +23,25 @@ class Value:
             init_ref()
 
     def __call__(self, state, **kwargs):
-        method_ref = getattr(self, self.name)
+        method_ref = getattr(self, self.name, None)
+        if method_ref is None:
+            return kwargs['backend'].evaluate(self.name, state)
         return method_ref(state, self.init_args | kwargs)
     
+    # MCTS calls this once per leaf-batch flush.
     def batch(self, states, **kwargs):
+        with tracing.span("value.batch", cat="mcts", rows=len(states)):
+            return self._batch(states, **kwargs)
+
+    def _batch(self, states, **kwargs):
+        if self.native_evaluator(kwargs.get("backend")) is not None:
+            return kwargs["backend"].evaluate_batch(self.name, states)
+        if hasattr(self, "_server_args"):
+            return self._remote_batch(states, kwargs["backend"])
         if not hasattr(self, "_req_q"):
             return [self(state, **kwargs) for state in states]
 
+        self._wait_ready()
         backend = kwargs["backend"]
         out_qs  = []
         for s in states:
@@ -32,6 +53,19 @@ class Value:
         return [q.get()[0] for q in out_qs]
 
 
+    # Backends may register C++ evaluators (chess: material, pst, mobility,
+    # crude_chess_score).  MCTS calls these directly without the GIL; the
+    # Python methods below remain the fallback for other backends.
+    def native_evaluator(self, backend):
+        if backend is None or hasattr(self, "_req_q") or hasattr(self, "_server_args"):
+            return None
+        cache = self.__dict__.setdefault("_native", {})
+        key = backend.__name__
+        if key not in cache:
+            names = getattr(backend, "list_evaluators", lambda: [])()
+            cache[key] = backend.get_evaluator(self.name) if self.name in names else None
+        return cache[key]
+
     def random_rollout(self, state, args):
         import random
         backend = args['backend']
@@ -58,57 +92,133 @@ class Value:
     # ================================================================== #
     #  Neural-network modes (batched on a background thread)
     # ================================================================== #
-    def _nn_setup(self, model, batch_size: int):
-        self.model = model
-        self.device = DEVICE
-        self.dtype = DTYPE
-        self.model.to(device=self.device, dtype=self.dtype).eval()
+    # `load()` builds the model.  With `warm_start` (config `value:`) the
+    # batching thread loads it, torch import included, so construction
+    # returns at once and evaluations wait until the model is ready.
+    def _nn_setup(self, load, batch_size: int, weights_path=None):
         self.batch_size = batch_size
+        self._weights_path = str(weights_path) if weights_path else None
+        self._weights_mtime = self._mtime()
+        self._reload_interval = self.init_args.get('reload_interval')
+        self._next_reload = time.monotonic() + (self._reload_interval or 0)
+        self._ready = threading.Event()
+        self._load_error = None
         self._req_q = queue.Queue()
-        t = threading.Thread(target=self._batch_worker, daemon=True)
+        if not self.init_args.get('warm_start'):
+            self._load(load)
+        t = threading.Thread(target=self._batch_worker, args=(load,), name="value-batch", daemon=True)
         t.start()
 
+    def _load(self, load):
+        with tracing.span("value.load", cat="value"):
+            self.device, self.dtype = _device()
+            self.model = load().to(device=self.device, dtype=self.dtype).eval()
+        self._ready.set()
+
+    def _wait_ready(self):
+        self._ready.wait()
+        if self._load_error is not None:
+            raise RuntimeError("value network failed to load") from self._load_error
+
     def _nn_forward(self, state, args):
+        self._wait_ready()
         arr = args['backend'].state_to_tensor(state)
-        tens = torch.tensor(arr, device=self.device, dtype=self.dtype)
         out_q = queue.Queue()
-        self._req_q.put((tens, out_q))
+        self._req_q.put((arr, out_q))
         return out_q.get()[0]
 
-    def _batch_worker(self):
+    # Stops the batching thread so the model can be freed, or the inference
+    # server this value started.
+    def close(self):
+        if hasattr(self, "_req_q"):
+            self._req_q.put(None)
+        server = getattr(self, "_server", None)
+        if server is not None:
+            self._server, self._client = None, None
+            server.stop()
+
+    # Runs one full batch through the network (or starts the inference
+    # server), so the first search does not pay torch's lazy initialisation.
+    # Native and rollout evaluators have nothing to warm.
+    def warm_up(self, backend):
+        if not (hasattr(self, "_req_q") or hasattr(self, "_server_args")):
+            return
+        with tracing.span("value.warm_up", cat="value"):
+            self.batch([backend.create_init_state()], backend=backend)
+
+    def _batch_worker(self, load):
+        if not self._ready.is_set():
+            try:
+                self._load(load)
+            except Exception as exc:
+                self._load_error = exc
+                self._ready.set()
+                return
+        import numpy as np
+        import torch
         while True:
-            arr, out_q = self._req_q.get()
-            batch = [(arr, out_q)]
+            req = self._req_q.get()
+            if req is None:
+                break
+            batch = [req]
 
             for _ in range(self.batch_size - 1):
                 try:
-                    batch.append(self._req_q.get_nowait())
+                    nxt = self._req_q.get_nowait()
                 except queue.Empty:
                     break
-
-            import numpy as np
+                if nxt is None:
+                    self._req_q.put(None)
+                    break
+                batch.append(nxt)
 
             arrays, out_queues = zip(*batch)
-            batch_np = np.stack(arrays, axis=0)
-            batch_tensor = torch.from_numpy(batch_np).to(device=self.device, dtype=self.dtype)
+            metrics.add("nn.batches")
+            metrics.add("nn.rows", len(batch))
+            metrics.add("nn.slots", self.batch_size)
+            with tracing.span("nn.batch", cat="value", rows=len(batch), slots=self.batch_size):
+                batch_np = np.stack(arrays, axis=0)
+                batch_tensor = torch.from_numpy(batch_np).to(device=self.device, dtype=self.dtype)
 
-            with torch.no_grad():
-                outputs = self.model(batch_tensor).cpu().tolist()
+                with torch.no_grad():
+                    outputs = self.model(batch_tensor).cpu().tolist()
 
             for q, out in zip(out_queues, outputs):
                 q.put(out)
 
+            if self._reload_interval and time.monotonic() >= self._next_reload:
+                self._next_reload = time.monotonic() + self._reload_interval
+                if self._mtime() != self._weights_mtime:
+                    self.reload()
+
+    def _mtime(self):
+        try:
+            return os.stat(self._weights_path).st_mtime if self._weights_path else None
+        except OSError:
+            return None
+
+    # Swap in the weights currently on disk without restarting the batch
+    # worker; the new module replaces self.model in a single assignment, so an
+    # in-flight batch finishes on the old one.  Out-of-process servers reload
+    # on their own and non-NN values have nothing to swap.
+    def reload(self) -> bool:
+        path = getattr(self, "_weights_path", None)
+        if path is None or not os.path.exists(path):
+            return False
+        self._wait_ready()
+        import models.core as core
+        mtime = self._mtime()
+        model = core.load_model(self.init_args['model_type'], path, self.device)
+        self.model = model.to(device=self.device, dtype=self.dtype).eval()
+        self._weights_mtime = mtime
+        return True
+
 
     def init_network_latest(self):
-        import os
         import models.core as core
-        import torch
-        module, latest_path = core.get_value_network(self.init_args['model_type'])
-        ValueNetwork = getattr(module, "ValueNetwork")
-        globals_fn = getattr(module, "add_safe_globals")
-        globals_fn()
-        model = ValueNetwork() if not os.path.exists(latest_path) else torch.load(latest_path, map_location=DEVICE)
-        self._nn_setup(model, self.init_args.get('batch_size', 1))
+        latest_path = core.latest_path(self.init_args['model_type'])
+        load = lambda: core.load_model(self.init_args['model_type'], latest_path, _device()[0])
+        self._nn_setup(load, self.init_args.get('batch_size', 1), latest_path)
 
     def network_latest(self, state, args):
         return self._nn_forward(state, args)
@@ -116,15 +226,46 @@ class Value:
 
     
     def init_network_at_path(self):
-        import os, models.core as core
+        import models.core as core
         path = self.init_args['path']
-        module, _ = core.get_value_network(self.init_args['model_type'])
-        getattr(module, "add_safe_globals")()
-        ValueNetwork = getattr(module, "ValueNetwork")
-
-        model = ValueNetwork() if not os.path.exists(path) else torch.load(path, map_location=DEVICE)
-        self._nn_setup(model, self.init_args.get('batch_size', 1))
+        load = lambda: core.load_model(self.init_args['model_type'], path, _device()[0])
+        self._nn_setup(load, self.init_args.get('batch_size', 1), path)
     
     def network_at_path(self, state, args):
         return self._nn_forward(state, args)
-        
+
+
+    # ================================================================== #
+    #  Out-of-process inference (engine/inference_server.py)
+    # ================================================================== #
+    def init_network_server(self):
+        self._server_args = {k: v for k, v in self.init_args.items() if k != 'client'}
+        self._client = self.init_args.get('client')
+        self._server = None
+        self._server_lock = threading.Lock()
+
+    def _remote_client(self, backend):
+        if self._client is None:
+            with self._server_lock:
+                if self._client is None:
+                    from engine.inference_server import InferenceServer
+                    shape = backend.state_to_tensor(backend.create_init_state()).shape
+                    a = self._server_args
+                    self._server = InferenceServer \
+                    (
+                        a['model_type'], shape,
+                        path=a.get('path'),
+                        slots=a.get('slots', 1024),
+                        batch_size=a.get('batch_size', 256),
+                        reload_interval=a.get('reload_interval', 5.0),
+                    ).start()
+                    self._client = self._server.client(0)
+        return self._client
+
+    def _remote_batch(self, states, backend):
+        import numpy as np
+        arrays = np.stack([backend.state_to_tensor(s) for s in states], axis=0)
+        return self._remote_client(backend).evaluate(arrays).tolist()
+
+    def network_server(self, state, args):
+        return self._remote_batch([state], args['backend'])[0]
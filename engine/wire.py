@@ -0,0 +1,159 @@
+"""
+Compact position text and response encoding for the server.
+
+A position travels as one short string: FEN for chess (no en passant in this
+backend, so that field is always ``-``) and, for connect4, the seven columns
+from the left, each as its discs from the bottom up, separated by ``/``
+(``XO/X/////`` after three moves; ``//////`` is the empty board).  The
+column string carries the heights and the side to move follows from the
+disc count.  ``parse_position`` reads both back, and also takes a connect4
+game as the columns played, 1-7 (the ``engine.suites`` notation).
+
+``compact_state`` is the small response body: the position, the last move,
+the ply and the result, or with ``since`` only the moves played after that
+ply.  ``encode`` returns JSON, or msgpack when the ``msgpack`` package is
+installed and the client asks for it.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:     # optional: JSON only
+    msgpack = None
+
+MSGPACK = "application/msgpack"
+
+_C4_TOKENS = ("X", "O")
+
+
+def _key_json(key):
+    return list(key) if isinstance(key, tuple) else key
+
+
+def _game(backend) -> str:
+    return backend.__name__.rsplit(".", 1)[-1]
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Chess
+# ──────────────────────────────────────────────────────────────────────────
+def chess_fen(state, ply: int = 0) -> str:
+    squares = bytes(state.board).decode("ascii")
+    ranks = "/".join(squares[i:i + 8] for i in range(0, 64, 8))
+    for run in range(8, 0, -1):         # longest runs of empty squares first
+        ranks = ranks.replace(" " * run, str(run))
+    castling = "".join(f for f, ok in zip("KQkq", (state.w_ck, state.w_cq, state.b_ck, state.b_cq)) if ok) or "-"
+    return f"{ranks} {'wb'[state.turn]} {castling} - {state.fifty_move_rule_counter} {ply // 2 + 1}"
+
+
+_PIECES = set("PNBRQKpnbrqk")
+
+
+# state_from_fen trusts its input (a long rank writes past the board), so
+# the placement, castling and counters are checked here.
+def _chess_parse(backend, text: str):
+    fields = text.split()
+    if len(fields) == 4:
+        fields += ["0", "1"]
+    if len(fields) != 6 or fields[1] not in ("w", "b") or len(fields[0].split("/")) != 8:
+        raise ValueError(f"not a FEN: {text!r}")
+    for rank in fields[0].split("/"):
+        if set(rank) - _PIECES - set("12345678") \
+                or sum(int(ch) if ch.isdigit() else 1 for ch in rank) != 8:
+            raise ValueError(f"bad rank {rank!r} in FEN {text!r}")
+    if fields[0].count("K") != 1 or fields[0].count("k") != 1:
+        raise ValueError(f"FEN needs one king per side: {text!r}")
+    castling = fields[2]
+    if castling != "-" and (set(castling) - set("KQkq") or len(set(castling)) != len(castling)):
+        raise ValueError(f"bad castling field {castling!r} in FEN {text!r}")
+    if not (fields[4].isdigit() and fields[5].isdigit()):
+        raise ValueError(f"bad move counters in FEN {text!r}")
+    return backend.state_from_fen(" ".join(fields))
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Connect4
+# ──────────────────────────────────────────────────────────────────────────
+def c4_columns(state) -> str:
+    rows = len(state.board)
+    return "/".join("".join(state.board[r][c] for r in reversed(range(rows)) if state.board[r][c] != " ")
+                    for c in range(len(state.board[0])))
+
+
+def _c4_parse(backend, text: str):
+    if "/" not in text:
+        state = backend.create_init_state()
+        for col in text.strip("-"):
+            move = (int(col) - 1, 0)
+            if move not in backend.get_legal_moves(state):
+                raise ValueError(f"column {col} is full or out of range")
+            state = backend.play_move(state, move)
+        return state
+
+    columns = text.split("/")
+    rows, cols = backend.ROWS, backend.COLS
+    if len(columns) != cols or any(len(c) > rows or set(c) - set(_C4_TOKENS) for c in columns):
+        raise ValueError(f"not a connect4 position: {text!r}")
+    board = [[" "] * cols for _ in range(rows)]
+    for c, discs in enumerate(columns):
+        for k, disc in enumerate(discs):
+            board[rows - 1 - k][c] = disc
+    x, o = text.count("X"), text.count("O")
+    if x - o not in (0, 1):
+        raise ValueError(f"impossible disc counts in {text!r}")
+    return backend.State(board, x - o)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Dispatch
+# ──────────────────────────────────────────────────────────────────────────
+def position_text(backend, state, ply: int = 0) -> str:
+    game = _game(backend)
+    if game == "chess_backend":
+        return chess_fen(state, ply)
+    if game == "c4_backend":
+        return c4_columns(state)
+    raise ValueError(f"no position text for backend {game}")
+
+
+def parse_position(backend, text: str):
+    game = _game(backend)
+    if game == "chess_backend":
+        return _chess_parse(backend, text.strip())
+    if game == "c4_backend":
+        return _c4_parse(backend, text.strip())
+    raise ValueError(f"no position text for backend {game}")
+
+
+# `session` is an engine.sessions.GameSession (held locked by the caller).
+def compact_state(session, since: Optional[int] = None) -> Dict[str, Any]:
+    ply = len(session.moves)
+    out: Dict[str, Any] = {"ply": ply, "result": session.result}
+    if since is not None:
+        if not 0 <= since <= ply:
+            raise ValueError(f"since must be between 0 and {ply}")
+        out["moves"] = [_key_json(k) for k in session.moves[since:]]
+        return out
+    out["position"] = position_text(session.engine.backend, session.state, ply)
+    out["last"] = _key_json(session.moves[-1]) if session.moves else None
+    return out
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Encoding
+# ──────────────────────────────────────────────────────────────────────────
+def wants_msgpack(accept: Optional[str]) -> bool:
+    return bool(accept) and MSGPACK in accept
+
+
+# (body, media type); LookupError when msgpack is asked for but missing.
+def encode(payload: Any, accept: Optional[str] = None) -> Tuple[bytes, str]:
+    if wants_msgpack(accept):
+        if msgpack is None:
+            raise LookupError("msgpack is not installed on the server")
+        return msgpack.packb(payload, use_bin_type=True), MSGPACK
+    return json.dumps(payload, separators=(",", ":")).encode(), "application/json"
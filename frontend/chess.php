@@ -77,7 +77,7 @@ function glyph(string $c, bool $isWhite):string
 $msg=$result=== 1?"♔ White wins!":($result===-1?"♚ Black wins!":($result===0?"½–½ Draw":null));
 ?>
 <!DOCTYPE html><html><head><meta charset="UTF-8">
-<title>Chess game <?= $idx ?> (uid <?=htmlspecialchars($uid)?>)</title>
+<title>Chess game <?= htmlspecialchars($idx) ?> (uid <?=htmlspecialchars($uid)?>)</title>
 <style>
   body{font-family:Segoe UI,Arial;text-align:center}
   table{border-collapse:collapse;margin:1rem auto}
@@ -123,7 +123,7 @@ $msg=$result=== 1?"♔ White wins!":($result===-1?"♚ Black wins!":($result===0
 
 <script>
 const uid      = "<?= htmlspecialchars($uid) ?>";
-const gameIdx  = <?= $idx ?>;
+const gameIdx  = <?= json_encode($idx) ?>;
 const finished = <?= $result===null?'false':'true' ?>;
 const myTurn   = <?= $turn ?>===0;
 
@@ -136,7 +136,7 @@ function key(r,c){ return `${r},${c}`; }
 async function fetchMoves(r,c)
 {
     if(cache[key(r,c)]) return cache[key(r,c)];
-    const res = await fetch(`proxy_moves.php?idx=${gameIdx}`);
+    const res = await fetch(`proxy_moves.php?idx=${encodeURIComponent(gameIdx)}`);
     const data= await res.json();
     data.moves.forEach(m=>{const k = key(m[0],m[1]); (cache[k]??=[]).push([m[2],m[3]]);});
     return cache[key(r,c)]??[];
@@ -1,7 +1,7 @@
 <?php
 header('Content-Type: application/json');
 
-$idx = isset($_GET['idx']) ? (int)$_GET['idx'] : 0;
+$idx = rawurlencode($_GET['idx'] ?? '');
 $url = "http://localhost:8000/legal_moves/$idx";
 
 $ch  = curl_init($url);
@@ -1,3 +1,6 @@
+import contextlib
+import time
+
 import torch
 import torch.nn as nn
 import torch.optim as optim
@@ -24,6 +27,7 @@ class ResidualBlock(nn.Module):
 class ValueNetwork(nn.Module):
     def __init__(self, channels=128, blocks=8):
         super().__init__()
+        self.arch = {"channels": channels, "blocks": blocks}
         self.stem = nn.Sequential \
         (
             nn.Conv2d(17, channels, 3, padding=1, bias=False),
@@ -72,30 +76,57 @@ def add_safe_globals():
 
 
 
-def train(model, dataloader, epochs=10, lr=1e-3, device=None):
+def make_optimizer(model, lr=1e-3):
+    return optim.Adam(model.parameters(), lr=lr)
+
+
+# `batches` is any re-iterable of (states, targets) tensors.  The running loss
+# stays on the device and is read back once per epoch, so the loop never waits
+# on a per-step sync.  Pass `optimizer` to carry its state across calls; its
+# learning rate is reset to `lr`.  The trainer's instrumentation comes in
+# as hooks: `span(name, **args)` is a context manager around each step (e.g.
+# engine.tracing.span) and `on_epoch(samples, steps)` is called after each
+# epoch.
+def train(model, batches, epochs=10, lr=1e-3, device=None, *, compile=False, bf16=False, optimizer=None,
+          span=None, on_epoch=None):
     if device is None:
         device = 'cuda' if torch.cuda.is_available() else 'cpu'
     model.to(device)
-    optimizer = optim.Adam(model.parameters(), lr=lr)
+    if optimizer is None:
+        optimizer = make_optimizer(model, lr)
+    for group in optimizer.param_groups:
+        group['lr'] = lr
     criterion = nn.MSELoss()
+    step_model = torch.compile(model) if compile else model
+    span = span or (lambda *args, **kwargs: contextlib.nullcontext())
+    device_type = torch.device(device).type
 
-    loss = 0
+    total = 0.0
     for epoch in range(1, epochs + 1):
         model.train()
-        running_loss = 0.0
-        for states, targets in dataloader:
-            states = states.to(device)
-            targets = targets.to(device).unsqueeze(1)
-
-            optimizer.zero_grad()
-            outputs = model(states)
-            loss = criterion(outputs, targets)
-            loss.backward()
-            optimizer.step()
-
-            running_loss += loss.item() * states.size(0)
-
-        avg_loss = running_loss / len(dataloader.dataset)
-        loss += avg_loss
-        print(f"Epoch {epoch}/{epochs} — Loss: {avg_loss:.4f}")
-    return loss / epochs
+        running_loss = torch.zeros((), device=device)
+        seen = steps = 0
+        t0 = time.perf_counter()
+        for states, targets in batches:
+            with span("train.step", cat="train", rows=states.size(0), epoch=epoch):
+                states = states.to(device, non_blocking=True)
+                targets = targets.to(device, non_blocking=True).unsqueeze(1)
+
+                optimizer.zero_grad(set_to_none=True)
+                with torch.autocast(device_type=device_type, dtype=torch.bfloat16, enabled=bf16):
+                    outputs = step_model(states)
+                loss = criterion(outputs.float(), targets)
+                loss.backward()
+                optimizer.step()
+
+            running_loss += loss.detach() * states.size(0)
+            seen += states.size(0)
+            steps += 1
+
+        avg_loss = running_loss.item() / max(seen, 1)
+        if on_epoch is not None:
+            on_epoch(seen, steps)
+        rate = seen / max(time.perf_counter() - t0, 1e-9)
+        total += avg_loss
+        print(f"Epoch {epoch}/{epochs} — Loss: {avg_loss:.4f} — {rate:,.0f} samples/s")
+    return total / epochs
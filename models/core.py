@@ -1,20 +1,157 @@
 """
 Global helpers for loading value-net modules and enumerating checkpoints.
+
+Checkpoints are ``{"state_dict", "arch", "meta"}`` dicts (plus the trainer's
+``"optimizer"`` state) written with ``torch.save`` and read back with
+``mmap=True``, so loading a net never unpickles module objects.  ``models/<type>/checkpoints/index.json`` records
+every checkpoint with its metadata (cycle, loss, games, timestamp) and which
+one ``latest.pth`` points at, so callers can pick checkpoints without opening
+them.  Whole-module pickles from older runs still load.
 """
 
-from pathlib import Path
-from typing import List, Tuple
 import importlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 
 def get_value_network(model_type: str) -> Tuple[object, Path]:
     module = importlib.import_module(f"models.{model_type}.network")
-    latest_path = Path(__file__).resolve().parent / model_type / "latest.pth"
-    return module, latest_path
+    return module, latest_path(model_type)
+
+
+# Without importing the network module (and torch).
+def latest_path(model_type: str) -> Path:
+    return Path(__file__).resolve().parent / model_type / "latest.pth"
+
+
+def checkpoint_dir(model_type: str) -> Path:
+    return Path(__file__).resolve().parent / model_type / "checkpoints"
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Index
+# ──────────────────────────────────────────────────────────────────────────
+def read_index(model_type: str) -> Dict[str, Any]:
+    path = checkpoint_dir(model_type) / "index.json"
+    if not path.exists():
+        return {"latest": None, "checkpoints": []}
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _write_index(model_type: str, index: Dict[str, Any]) -> None:
+    path = checkpoint_dir(model_type) / "index.json"
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, indent=1)
+    os.replace(tmp, path)
 
 
 def list_checkpoints(model_type: str) -> List[Path]:
-    cdir = Path(__file__).resolve().parent / model_type / "checkpoints"
+    cdir = checkpoint_dir(model_type)
     if not cdir.exists():
         return []
+    entries = read_index(model_type)["checkpoints"]
+    if entries:
+        return [cdir / e["file"] for e in entries]
     return sorted(cdir.glob("*.pth"))
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Save / load
+# ──────────────────────────────────────────────────────────────────────────
+def save_checkpoint(model_type: str, model, optimizer=None, **meta) -> Path:
+    import torch
+
+    cdir = checkpoint_dir(model_type)
+    cdir.mkdir(parents=True, exist_ok=True)
+    meta.setdefault("timestamp", time.time())
+    stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(meta["timestamp"]))
+    path = cdir / f"{stamp}.pth"
+    n = 1
+    while path.exists():
+        path, n = cdir / f"{stamp}_{n}.pth", n + 1
+
+    state = {k: v.detach().cpu() for k, v in model.state_dict().items()}
+    tmp = path.with_suffix(".pth.tmp")
+    ckpt = {"state_dict": state, "arch": getattr(model, "arch", {}), "meta": meta}
+    if optimizer is not None:
+        ckpt["optimizer"] = optimizer.state_dict()
+    torch.save(ckpt, tmp)
+    os.replace(tmp, path)
+
+    index = read_index(model_type)
+    index["checkpoints"].append({"file": path.name, **meta})
+    _write_index(model_type, index)
+    return path
+
+
+def update_index(model_type: str, file: str, **fields) -> None:
+    index = read_index(model_type)
+    for entry in index["checkpoints"]:
+        if entry["file"] == file:
+            entry.update(fields)
+    _write_index(model_type, index)
+
+
+# Readers (self-play Values, the inference server) may open latest.pth at any
+# moment, so it is never absent or half-written: the checkpoint is hard-linked
+# (or copied) next to it and renamed over it.
+def publish_latest(model_type: str, path: Path) -> Path:
+    import shutil
+
+    _, latest_path = get_value_network(model_type)
+    tmp = latest_path.with_suffix(".pth.tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(path, tmp)
+    except OSError:
+        shutil.copy2(path, tmp)
+    os.replace(tmp, latest_path)
+
+    index = read_index(model_type)
+    index["latest"] = Path(path).name
+    _write_index(model_type, index)
+    return latest_path
+
+
+def load_checkpoint(path, device: str = "cpu") -> Dict[str, Any]:
+    import torch
+    return torch.load(path, map_location=device, mmap=True, weights_only=True)
+
+
+# Optimizer state saved with a checkpoint, or None (no file, none saved, or a
+# whole-module pickle).
+def load_optimizer_state(path, device: str = "cpu") -> Optional[Dict[str, Any]]:
+    if not Path(path).exists():
+        return None
+    try:
+        return load_checkpoint(path, device).get("optimizer")
+    except Exception:
+        return None
+
+
+# Build a net for `model_type` from `path` (default latest.pth); a fresh,
+# untrained net when the file does not exist yet.
+def load_model(model_type: str, path: Optional[os.PathLike] = None, device: str = "cpu"):
+    import torch
+
+    module, latest_path = get_value_network(model_type)
+    path = Path(path) if path else latest_path
+    ValueNetwork = getattr(module, "ValueNetwork")
+    if not path.exists():
+        return ValueNetwork().to(device)
+
+    try:
+        ckpt = load_checkpoint(path, device)
+    except Exception:
+        # Whole-module pickle written before state-dict checkpoints.
+        getattr(module, "add_safe_globals")()
+        return torch.load(path, map_location=device)
+
+    model = ValueNetwork(**ckpt.get("arch", {}))
+    model.load_state_dict(ckpt["state_dict"], assign=True)
+    return model.to(device)
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, List, Tuple
+
+import numpy as np
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+CONFIG_DIR = ROOT / "configs"
+RESULTS_DIR = ROOT / "benchmarks"
+
+# A case is (name, fn): fn() runs one operation.
+Case = Tuple[str, Callable[[], object]]
+
+
+# --------------------------------------------------------------------- #
+#  Fixtures                                                             #
+# --------------------------------------------------------------------- #
+def _load_config(name: str) -> dict:
+    with open(CONFIG_DIR / f"{name}.yaml", "r", encoding="utf-8") as fh:
+        return yaml.safe_load(fh)
+
+
+def _backend(game: str, module: str):
+    return importlib.import_module(f"engine.games.{game}.{module}")
+
+
+# Positions from seeded random games, so every run times the same states.
+def _sample_states(backend, n: int = 64, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    states = []
+    while len(states) < n:
+        state = backend.create_init_state()
+        for _ in range(rng.randint(0, 60)):
+            moves = sorted(backend.get_legal_moves(state))
+            if not moves or backend.check_win(state) or backend.check_draw(state):
+                break
+            state = backend.play_move(state, rng.choice(moves))
+        states.append(state)
+    return states
+
+
+# --------------------------------------------------------------------- #
+#  Benchmarks                                                           #
+# --------------------------------------------------------------------- #
+def bench_backend(args) -> Iterator[Case]:
+    for game, module in (("chess", "chess_backend"), ("connect4", "c4_backend")):
+        backend = _backend(game, module)
+        states = _sample_states(backend)
+        pairs = [(s, m) for s in states for m in sorted(backend.get_legal_moves(s))[:1]]
+        yield f"{game}.get_legal_moves", lambda b=backend, s=states: [b.get_legal_moves(x) for x in s]
+        yield f"{game}.play_move",       lambda b=backend, p=pairs: [b.play_move(s, m) for s, m in p]
+        yield f"{game}.state_to_tensor", lambda b=backend, s=states: [b.state_to_tensor(x) for x in s]
+
+
+def bench_value_batch(args) -> Iterator[Case]:
+    from engine.value_functions import Value
+
+    backend = _backend("chess", "chess_backend")
+    states = _sample_states(backend, max(args.batch_sizes))
+    for bs in args.batch_sizes:
+        value = Value("network_latest", model_type="chess_value", batch_size=bs)
+        try:
+            yield f"value.batch[{bs}]", lambda v=value, s=states[:bs]: v.batch(s, backend=backend)
+        finally:
+            value.close()
+
+
+def bench_get_move(args) -> Iterator[Case]:
+    from engine.mcts import get_move
+    from engine.policy_functions import Policy
+    from engine.value_functions import Value
+
+    for name in args.configs:
+        cfg = _load_config(name)
+        backend = _backend(cfg["game"], cfg["backend"])
+        policy = Policy(name=cfg.get("policy_function", "random"), **cfg.get("policy", {}))
+        value = Value(cfg["value_function"], **cfg.get("value", {}))
+        state = backend.create_init_state()
+        c = cfg["mcts"]["c_puct"]
+        try:
+            yield f"get_move[{name}]", lambda v=value, p=policy, b=backend, st=state, c=c: \
+                get_move(st, v, p, b, simulations=args.sims, c=c, batch_size=32)
+        finally:
+            value.close()
+
+
+def bench_dataset(args) -> Iterator[Case]:
+    from engine.engine import Engine
+    from engine.selfplay import play_games
+
+    cfg = _load_config("crude_chess")
+    cfg.update(threads=4, mcts={"simulations": 16, "c_puct": 1.4})
+    random.seed(0)
+    engine = Engine(cfg)
+    play_games(engine, 4)
+    yield "engine.get_dataset",         lambda: engine.get_dataset()
+    yield "engine.get_dataset[compact]", lambda: engine.get_dataset(compact=True)
+
+
+def bench_train_epoch(args) -> Iterator[Case]:
+    import torch
+    from engine.games.chess import chess_backend as cb
+    import models.core as core
+
+    module, _ = core.get_value_network("chess_value")
+    rng = np.random.default_rng(0)
+    states = _sample_states(cb, 256)
+    rows = np.stack([cb.state_to_compact(states[i]) for i in rng.integers(0, len(states), args.train_rows)])
+    values = rng.uniform(-1, 1, len(rows)).astype(np.float32)
+    batches = \
+    [
+        (torch.from_numpy(np.asarray(cb.compact_to_tensor(rows[lo:lo + 256]), dtype=np.float32)),
+         torch.from_numpy(values[lo:lo + 256]))
+        for lo in range(0, len(rows), 256)
+    ]
+    torch.manual_seed(0)
+    model = module.ValueNetwork()
+
+    def epoch():
+        with contextlib.redirect_stdout(io.StringIO()):
+            module.train(model, batches, epochs=1, lr=1e-4, device="cpu")
+
+    yield f"train.epoch[{args.train_rows}]", epoch
+
+
+# Server startup in a fresh interpreter per sample, timed up to the first
+# reply (/add_game) or the first move (/play_mcts).
+_SERVER_START = """
+import os, sys
+sys.path[:0] = [{root!r}, {server!r}]
+os.environ["CONFIG_PATH"] = {config!r}
+from fastapi.testclient import TestClient
+import main
+with TestClient(main.app) as client:
+    idx = client.post("/add_game").json()["idx"]
+    if {move!r}:
+        client.post("/play_mcts", json={{"idx": idx, "simulations": {sims}}}).raise_for_status()
+"""
+
+
+def _python(code: str) -> None:
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, check=True)
+
+
+def bench_startup(args) -> Iterator[Case]:
+    yield "startup.import[engine]", lambda: _python("import engine.engine")
+    tmp = Path(tempfile.mkdtemp(prefix="startup-"))
+    for name in args.configs:
+        cfg = _load_config(name)
+        variants = [(name, cfg)]
+        if "value" in cfg:          # network values: also with value warm_start
+            variants.append((f"{name},warm", {**cfg, "value": {**cfg["value"], "warm_start": True}}))
+        for tag, variant in variants:
+            path = tmp / f"{tag}.yaml"
+            path.write_text(yaml.safe_dump(variant))
+            for case, move in (("first_reply", False), ("first_move", True)):
+                code = _SERVER_START.format(root=str(ROOT), server=str(ROOT / "server"), config=str(path),
+                                            move=move, sims=args.sims)
+                yield f"startup.{case}[{tag}]", lambda c=code: _python(c)
+
+
+BENCHMARKS = \
+{
+    "backend":     ("micro", bench_backend),
+    "value_batch": ("micro", bench_value_batch),
+    "get_move":    ("macro", bench_get_move),
+    "dataset":     ("macro", bench_dataset),
+    "train_epoch": ("macro", bench_train_epoch),
+    "startup":     ("macro", bench_startup),
+}
+
+
+# --------------------------------------------------------------------- #
+#  Measurement                                                          #
+# --------------------------------------------------------------------- #
+# timeit-style: grow the loop count until one sample takes min_time (this
+# doubles as warm-up), then take `repeat` samples of seconds per operation.
+def measure(fn: Callable, *, repeat: int, min_time: float) -> List[float]:
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed > min_time / 10 else 10
+
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - t0) / loops)
+    return samples
+
+
+def summarize(samples: List[float]) -> dict:
+    median = statistics.median(samples)
+    if len(samples) >= 4:
+        q1, _, q3 = statistics.quantiles(samples, n=4)
+    else:
+        q1, q3 = min(samples), max(samples)
+    return \
+    {
+        "median": median,
+        "min": min(samples),
+        "spread": (q3 - q1) / median if median else 0.0,     # relative IQR
+        "samples": samples,
+    }
+
+
+def machine_info() -> dict:
+    cpu = platform.processor()
+    with contextlib.suppress(OSError):
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as fh:
+            cpu = next((l.split(":", 1)[1].strip() for l in fh if l.startswith("model name")), cpu)
+    import torch
+    return \
+    {
+        "host": platform.node(),
+        "cpu": cpu,
+        "cores": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def machine_tag(info: dict) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{info['host']}-{info['cores']}c")
+
+
+def git_revision() -> dict:
+    def git(*cmd):
+        out = subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() if out.returncode == 0 else None
+    return {"commit": git("rev-parse", "--short", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+# --------------------------------------------------------------------- #
+#  Commands                                                             #
+# --------------------------------------------------------------------- #
+def run(args) -> None:
+    selected = [name for name, (group, _) in BENCHMARKS.items()
+                if (not args.only or name in args.only) and (not args.group or group == args.group)]
+    info = machine_info()
+    out = \
+    {
+        "machine": info,
+        "tag": machine_tag(info),
+        "git": git_revision(),
+        "timestamp": time.time(),
+        "settings": {"repeat": args.repeat, "min_time": args.min_time, "sims": args.sims},
+        "results": {},
+    }
+    for name in selected:
+        group, setup = BENCHMARKS[name]
+        for case, fn in setup(args):
+            stats = summarize(measure(fn, repeat=args.repeat, min_time=args.min_time))
+            out["results"][case] = {"group": group, **stats}
+            print(f"{case:<32}{stats['median'] * 1e3:12.3f} ms  ± {stats['spread']:5.1%}", flush=True)
+
+    path = Path(args.output) if args.output else \
+        RESULTS_DIR / out["tag"] / f"{datetime.now():%Y%m%d_%H%M%S}_{out['git']['commit'] or 'nogit'}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(out, fh, indent=1)
+    print("\nWrote", path)
+
+
+# A change counts only beyond the noise: the larger of the threshold and
+# either run's relative spread.
+def compare(args) -> int:
+    with open(args.old, "r", encoding="utf-8") as fh:
+        old = json.load(fh)
+    with open(args.new, "r", encoding="utf-8") as fh:
+        new = json.load(fh)
+    if old.get("tag") != new.get("tag"):
+        print(f"⚠️  different machines: {old.get('tag')} vs {new.get('tag')}\n")
+
+    print(f"{'benchmark':<32}{'old ms':>11}{'new ms':>11}{'change':>9}{'noise':>8}")
+    print("-" * 79)
+    regressions = 0
+    for case in sorted(set(old["results"]) | set(new["results"])):
+        a, b = old["results"].get(case), new["results"].get(case)
+        if a is None or b is None:
+            print(f"{case:<32}{'only in ' + ('new' if a is None else 'old'):>22}")
+            continue
+        change = b["median"] / a["median"] - 1
+        noise = max(args.threshold, a["spread"], b["spread"])
+        verdict = ""
+        if change > noise:
+            verdict, regressions = "REGRESSION", regressions + 1
+        elif change < -noise:
+            verdict = "faster"
+        print(f"{case:<32}{a['median'] * 1e3:11.3f}{b['median'] * 1e3:11.3f}{change:+9.1%}{noise:8.1%}  {verdict}")
+    print(f"\n{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Micro/macro benchmarks with machine-tagged JSON results")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    rp = sub.add_parser("run", help="Run benchmarks and store the results")
+    rp.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run (default all)")
+    rp.add_argument("--group", choices=["micro", "macro"], default=None)
+    rp.add_argument("--repeat", type=int, default=7, help="Samples per case")
+    rp.add_argument("--min-time", type=float, default=0.2, help="Seconds per sample")
+    rp.add_argument("--sims", type=int, default=256, help="get_move playouts")
+    rp.add_argument("--configs", nargs="+", default=sorted(p.stem for p in CONFIG_DIR.glob("*.yaml")),
+                    help="Configs for get_move (default all in configs/)")
+    rp.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64, 256], help="Value.batch sizes")
+    rp.add_argument("--train-rows", type=int, default=512, help="Rows in the training epoch")
+    rp.add_argument("-o", "--output", default=None, help=f"Result file (default {RESULTS_DIR.name}/<machine>/<time>_<commit>.json)")
+
+    cp = sub.add_parser("compare", help="Compare two result files")
+    cp.add_argument("old")
+    cp.add_argument("new")
+    cp.add_argument("--threshold", type=float, default=0.05, help="Minimum relative change to flag")
+
+    args = ap.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,48 @@
 from __future__ import annotations
 
 import argparse, importlib, yaml
-from typing import Callable, Sequence
 
-from engine.engine import Engine
-from engine.value_functions import Value
+from engine.arena import Tournament
 import models.core as mcore
 
 # --------------------------------------------------------------------- #
 #  Helpers                                                              #
 # --------------------------------------------------------------------- #
 
-def simulate(engine: Engine, total: int) -> Sequence[int]:
-    unfinished = set(range(min(total, engine.threads)))
-    results = [None] * min(total, engine.threads)
-
-    while unfinished:
-        sims = engine.config['mcts']['simulations']
-        c = engine.config['mcts']['c_puct']
-        partial = engine.play_mcts_parallel(list(unfinished), sims, c)
-
-        for idx in list(unfinished):
-            if partial[idx] is not None:
-                print("Game finished")
-                results[idx] = partial[idx]
-                unfinished.remove(idx)
-                if len(results) < total:
-                    results += [None]
-                    unfinished.add(engine.add_game())
-    return results
-
-def win_rate(results: Sequence[int], latest_is_white: bool) -> float:
-    wins = draws = 0
-    for r in results:
-        if (latest_is_white and r == 1) or (not latest_is_white and r == -1):
-            wins += 1
-        elif r == 0:
-            draws += 1
-    return (wins + 0.5 * draws) / len(results)
-
-def evaluate_pair(cfg: dict, latest_v: Callable, other_v: Callable, games: int) -> float:
-    g_white = games // 2
-    g_black = games - g_white
-
-    eng_w = Engine(cfg, value_functions=[latest_v, other_v])
-    wr_w  = win_rate(simulate(eng_w, g_white), latest_is_white=True)
-
-    eng_b = Engine(cfg, value_functions=[other_v, latest_v])
-    wr_b  = win_rate(simulate(eng_b, g_black), latest_is_white=False)
-
-    return (wr_w * g_white + wr_b * g_black) / games
+def checkpoint_players(model_type: str, batch_size: int, last: int | None) -> dict:
+    ckpts = mcore.list_checkpoints(model_type)
+    if not ckpts:
+        raise RuntimeError(f"No checkpoints found for {model_type}")
+    # The first checkpoint stays in as a fixed reference point.
+    if last and len(ckpts) > last + 1:
+        ckpts = [ckpts[0]] + ckpts[-last:]
+    return \
+    {
+        p.stem: {"name": "network_at_path", "model_type": model_type, "path": str(p), "batch_size": batch_size}
+        for p in ckpts
+    }
+
+def print_ratings(table: dict, games: dict) -> None:
+    played = {}
+    for (white, black), scores in games.items():
+        played[white] = played.get(white, 0) + len(scores)
+        played[black] = played.get(black, 0) + len(scores)
+
+    print(f"{'player':<28}{'elo':>8}{'± 95%':>9}{'games':>8}")
+    print("-" * 53)
+    for name, (elo, ci) in sorted(table.items(), key=lambda kv: -kv[1][0]):
+        print(f"{name:<28}{elo:8.0f}{ci:9.0f}{played.get(name, 0):8d}")
 
 # --------------------------------------------------------------------- #
 #  Main                                                                 #
 # --------------------------------------------------------------------- #
 def main() -> None:
-    ap = argparse.ArgumentParser()
+    ap = argparse.ArgumentParser(description="Round-robin tournament across checkpoints with Elo ratings")
     ap.add_argument("-c", "--config", required=True, help="YAML config")
-    ap.add_argument("-n", "--games",  type=int, default=10, help="Games per match-up")
+    ap.add_argument("-n", "--games",  type=int, default=10, help="Games per pairing (split between colours)")
+    ap.add_argument("-w", "--workers", type=int, default=1, help="Worker processes")
+    ap.add_argument("--last", type=int, default=None, help="Only the first and the last N checkpoints")
+    ap.add_argument("--baseline", action="append", default=[], help="Add a non-network value function as a player (repeatable)")
     args = ap.parse_args()
 
     with open(args.config, "r", encoding="utf-8") as fh:
@@ -68,24 +53,28 @@ def main() -> None:
     model_type = cfg["value"]["model_type"]
     batch_size = cfg["value"].get("batch_size", 1)
 
-    ckpts = mcore.list_checkpoints(model_type)
-    if not ckpts:
-        raise RuntimeError(f"No checkpoints found for {model_type}")
-
-    first_ckpt, prev_ckpt = ckpts[0], ckpts[-1]
-
-    v_latest = Value("network_latest", model_type=model_type, batch_size=batch_size)
-    v_first = Value("network_at_path", model_type=model_type, path=str(first_ckpt), batch_size=batch_size)
-    v_prev = Value("network_at_path", model_type=model_type, path=str(prev_ckpt), batch_size=batch_size)
-
-    print(f"Evaluating {model_type}  –  {args.games} games each match-up\n")
-    wr_first = evaluate_pair(cfg, v_latest, v_first, args.games)
-    wr_prev = evaluate_pair(cfg, v_latest, v_prev,  args.games)
-
-    print("Win-rates for *latest* network")
-    print("--------------------------------")
-    print(f"vs first checkpoint : {wr_first:.2%}")
-    print(f"vs prev  checkpoint : {wr_prev :.2%}")
+    players = checkpoint_players(model_type, batch_size, args.last)
+    players.update({name: {"name": name} for name in args.baseline})
+
+    tournament = Tournament \
+    (
+        cfg, players,
+        games_per_pair=args.games,
+        workers=args.workers,
+        cache_path=mcore.checkpoint_dir(model_type) / "tournament.json",
+    )
+    todo = sum(n for _, _, n in tournament.schedule())
+    print(f"Tournament for {model_type}  –  {len(players)} players, {todo} new games\n")
+
+    done = 0
+    def progress(white, black, scores):
+        nonlocal done
+        done += len(scores)
+        print(f"[{done}/{todo}] {white} (white) vs {black}: {sum(scores):g}/{len(scores)}")
+
+    table = tournament.run(on_result=progress)
+    print()
+    print_ratings(table, tournament.games)
 
 if __name__ == "__main__":
     main()
@@ -2,13 +2,17 @@ from __future__ import annotations
 
 import argparse
 import importlib
+import json
 import time
+from collections import Counter
 from pathlib import Path
 
 import yaml
 
-from engine.mcts import get_move
+from engine import metrics
+from engine.mcts import get_move, search
 from engine.policy_functions import Policy
+from engine.suites import load_suite, move_text
 from engine.value_functions import Value
 
 
@@ -18,12 +22,89 @@ def run_once(state, backend, value_fn, policy, sims: int, batch: int) -> float:
     return time.perf_counter() - t0
 
 
+# --------------------------------------------------------------------- #
+#  Position suites                                                      #
+# --------------------------------------------------------------------- #
+# One search per position and repeat under a node budget (`sims`) and/or a
+# time budget.  Time to solution is when the returned move became and stayed
+# the most visited one, counted only if that move is correct.
+def run_suite(positions, backend, value_fn, policy, *, sims: int, time_limit: float, batch: int, repeat: int = 1,
+              profile: bool = False) -> dict:
+    rows = []
+    totals, deepest = Counter(), 0
+    for pos in positions:
+        for _ in range(repeat):
+            before = metrics.counters()
+            res = search(pos.state, value_fn, policy, backend, simulations=sims, c=1.4, batch_size=batch,
+                         time_limit=time_limit, profile=profile)
+            if profile:
+                totals.update(res["profile"])
+                deepest = max(deepest, res["profile"]["max_depth"])
+            solved = pos.solved_by(res["move"])
+            rows.append \
+            ({
+                "id": pos.id,
+                "move": move_text(backend, res["move"]),
+                "solved": solved,
+                "simulations": res["simulations"],
+                "seconds": res["seconds"],
+                "nn_evals": metrics.delta(before).get("nn.rows", 0),
+                "nodes_to_solution": res["settled_simulations"] if solved else None,
+                "time_to_solution": res["settled_seconds"] if solved else None,
+            })
+
+    seconds = sum(r["seconds"] for r in rows)
+    solved = [r for r in rows if r["solved"]]
+    summary = \
+    {
+        "searches": len(rows),
+        "solved": len(solved),
+        "accuracy": len(solved) / len(rows) if rows else 0.0,
+        "nodes_per_s": sum(r["simulations"] for r in rows) / seconds if seconds else 0.0,
+        "nn_evals_per_s": sum(r["nn_evals"] for r in rows) / seconds if seconds else 0.0,
+        "mean_time_to_solution": sum(r["time_to_solution"] for r in solved) / len(solved) if solved else None,
+        "mean_nodes_to_solution": sum(r["nodes_to_solution"] for r in solved) / len(solved) if solved else None,
+    }
+    if profile:
+        summary["profile"] = {**totals, "max_depth": deepest}
+    return {"summary": summary, "positions": rows}
+
+
+def print_suite(name: str, report: dict) -> None:
+    s = report["summary"]
+    print(f"--- {name} ---")
+    for r in report["positions"]:
+        tts = f"{r['time_to_solution']:.3f} s" if r["solved"] else "–"
+        print(f"{r['id']:<28}{r['move']:>7}  {'ok ' if r['solved'] else 'BAD'}"
+              f"{r['simulations']:>9} nodes{r['seconds']:>8.3f} s   solved at {tts}")
+    tts = f"{s['mean_time_to_solution']:.3f} s" if s["solved"] else "–"
+    print(f"solved      : {s['solved']}/{s['searches']} ({s['accuracy']:.0%})")
+    print(f"nodes/s     : {s['nodes_per_s']:.0f}")
+    print(f"NN evals/s  : {s['nn_evals_per_s']:.0f}")
+    print(f"mean tts    : {tts}")
+    if "profile" in s:
+        p = s["profile"]
+        phases = {k[:-2]: v for k, v in p.items() if k.endswith("_s")}
+        busy = sum(v for k, v in phases.items() if k != "gil_wait") or 1.0
+        print("phases      : " + "  ".join(f"{k} {v / busy:.0%}" for k, v in phases.items() if k != "gil_wait")
+              + f"   (GIL wait {phases['gil_wait']:.3f} s)")
+        print(f"tree        : {p['nodes']:,} nodes, {p['expansions']:,} expansions, {p['flushes']:,} flushes, "
+              f"fill {p['leaves'] / max(p['slots'], 1):.0%}, max depth {p['max_depth']}")
+    print()
+
+
 def main() -> None:
-    ap = argparse.ArgumentParser(description="Time get_move() end-to-end")
+    ap = argparse.ArgumentParser(description="Time get_move() end-to-end, or benchmark search on a position suite")
     ap.add_argument("-c", "--config", required=True, help="YAML config file")
     ap.add_argument("--sims",  type=int, default=2048, help="MCTS playouts")
     ap.add_argument("--batch", type=int, default=32,   help="Leaf batch size")
     ap.add_argument("--loops", type=int, default=10,   help="Number of moves to time")
+    ap.add_argument("--suite", default=None, help="EPD-style position suite (see engine/suites.py)")
+    ap.add_argument("--time",  type=float, default=0.0, help="Suite: seconds per search (--sims becomes a cap)")
+    ap.add_argument("--value", action="append", default=[], help="Suite: value function to compare (repeatable; default from config)")
+    ap.add_argument("--repeat", type=int, default=1, help="Suite: searches per position")
+    ap.add_argument("--json",  default=None, help="Suite: write results to this JSON file")
+    ap.add_argument("--profile", action="store_true", help="Suite: collect MCTS phase timers and tree counters")
     args = ap.parse_args()
 
     cfg_path = Path(args.config).expanduser()
@@ -34,14 +115,38 @@ def main() -> None:
     module = cfg["backend"]
     backend = importlib.import_module(f"engine.games.{game}.{module}")
 
-    v_cfg  = cfg["value"]
+    v_cfg  = cfg.get("value", {})
+    policy = Policy(name=cfg.get("policy_function", "random"), **cfg.get("policy", {}))
+
+    if args.suite:
+        positions = load_suite(args.suite, backend)
+        out = \
+        {
+            "config": str(cfg_path),
+            "suite": args.suite,
+            "budget": {"simulations": args.sims, "time": args.time, "batch": args.batch, "repeat": args.repeat},
+            "values": {},
+        }
+        for name in args.value or [cfg["value_function"]]:
+            value_fn = Value(name, **v_cfg)
+            try:
+                report = run_suite(positions, backend, value_fn, policy, sims=args.sims, time_limit=args.time,
+                                   batch=args.batch, repeat=args.repeat, profile=args.profile)
+            finally:
+                value_fn.close()
+            out["values"][name] = report
+            print_suite(name, report)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as fh:
+                json.dump(out, fh, indent=1)
+            print("Wrote", args.json)
+        return
+
     model_type  = v_cfg["model_type"]
     v_batchsize = v_cfg.get("batch_size", 1)
 
     value_fn = Value("network_latest", model_type=model_type, batch_size=v_batchsize)
 
-    policy = Policy(name=cfg.get("policy_function", "random"), **cfg.get("policy", {}))
-
     init_state = backend.create_init_state()
 
     run_once(init_state, backend, value_fn, policy, args.sims, args.batch)
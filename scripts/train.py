@@ -4,50 +4,85 @@ import argparse
 import contextlib
 import csv
 import os
+import random
+import signal
 import sys
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Tuple
 
 import torch
-from torch.utils.data import DataLoader
 import numpy as np
+import yaml
 
+from engine import arena, metrics, tracing
 from engine.engine import Engine
+from engine.replay_buffer import ReplayBuffer
+from engine.selfplay import SelfPlayPool, play_games
 import models.core as core
 
 
 # ────────────────────────────────────────────────────────────────────────
 #  Replay-buffer helper – all fresh data + % of the older pool
 # ────────────────────────────────────────────────────────────────────────
-_REPLAY_STATES: list[np.ndarray] = []
-_REPLAY_VALUES: list[np.ndarray] = []
-
-def _update_replay(states_new: np.ndarray, values_new: np.ndarray, *, frac_old: float = 0.30) -> tuple[np.ndarray, np.ndarray]:
-    if not _REPLAY_STATES:
-        _REPLAY_STATES.append(states_new)
-        _REPLAY_VALUES.append(values_new)
-        return states_new, values_new
-
-    old_states = np.concatenate(_REPLAY_STATES, axis=0)
-    old_values = np.concatenate(_REPLAY_VALUES, axis=0)
-
-    k = int(frac_old * len(old_states))
-    if k > 0:
-        idx = np.random.choice(len(old_states), k, replace=False)
-        sample_states = old_states[idx]
-        sample_values = old_values[idx]
-    else:
-        sample_states = old_states[:0]
-        sample_values = old_values[:0]
-
-    _REPLAY_STATES.append(states_new)
-    _REPLAY_VALUES.append(values_new)
-
-    train_states = np.concatenate([sample_states, states_new], axis=0)
-    train_values = np.concatenate([sample_values, values_new], axis=0)
-    return train_states, train_values
+def _open_replay(engine: Engine, path: Path, capacity: int) -> ReplayBuffer:
+    encode, _, dtype = engine.row_codec(compact=True)
+    row_shape = encode(engine.backend.create_init_state()).shape
+    return ReplayBuffer(path, capacity, row_shape, dtype)
+
+
+def _replay_indices(replay: ReplayBuffer, gen: int, *, frac_old: float = 0.30, decay: float = 0.9,
+                    max_fresh: int | None = None) -> np.ndarray:
+    fresh = replay.indices(gen)
+    k = int(frac_old * (len(replay) - len(fresh)))
+    if max_fresh is not None and len(fresh) > max_fresh:
+        fresh = np.random.choice(fresh, max_fresh, replace=False)
+    old = replay.sample(k, decay=decay, exclude_gen=gen)
+    return np.concatenate([old, fresh])
+
+
+class ReplayBatches:
+    """
+    Shuffled mini-batches over a slice of the replay buffer.
+
+    The selected compact rows are gathered into memory once; every epoch then
+    walks a fresh index permutation and expands one batch at a time, with the
+    next batch decoded on a helper thread while the current one trains.
+    """
+
+    def __init__(self, replay: ReplayBuffer, indices: np.ndarray, decode: Callable, *,
+                 batch_size: int = 256, shuffle: bool = True):
+        with tracing.span("dataset.fetch", cat="dataset", rows=len(indices)):
+            self.rows, self.values = replay.fetch(indices)
+        self.decode = decode
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+
+    def __len__(self):
+        return len(self.values)
+
+    def _batch(self, idx):
+        with tracing.span("train.batch", cat="train", rows=len(idx)):
+            states = np.ascontiguousarray(self.decode(self.rows[idx]), dtype=np.float32)
+            return torch.from_numpy(states), torch.from_numpy(self.values[idx])
+
+    def __iter__(self):
+        n = len(self)
+        order = np.random.permutation(n) if self.shuffle else np.arange(n)
+        chunks = [order[lo:lo + self.batch_size] for lo in range(0, n, self.batch_size)]
+        if not chunks:
+            return
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") as prefetch:
+            pending = prefetch.submit(self._batch, chunks[0])
+            for nxt in chunks[1:]:
+                batch = pending.result()
+                pending = prefetch.submit(self._batch, nxt)
+                yield batch
+            yield pending.result()
 
 # ──────────────────────────────────────────────────────────────────────────
 #  Logging helper – duplicate stdout/stderr to a timestamped file
@@ -73,101 +108,212 @@ def _init_logfile() -> Path:
     sys.stdout = _Tee(sys.stdout, _fh)
     sys.stderr = _Tee(sys.stderr, _fh)
     print(f"[LOGFILE] → {log_path.resolve()}", flush=True)
+    metrics_path = metrics.configure(log_path.with_suffix(".metrics.jsonl"))
+    print(f"[METRICS] → {metrics_path.resolve()}", flush=True)
     return log_path
 
 
-_logfile_path = _init_logfile()
+# Spawned worker processes re-import this file as __mp_main__; only the
+# launching process owns the log file.
+if __name__ != "__mp_main__":
+    _logfile_path = _init_logfile()
 
 CSV_WRITER = csv.writer(sys.stdout, lineterminator="\n")
 
 
+# CSV rows stay in the human-readable log; the metrics stream
+# (engine/metrics.py, read by train_manager.py) gets the same record by name.
 def emit_stats(**kv):
     now = int(time.time())
     keys = ["ts"] + sorted(kv)
     values = [now] + [kv[k] for k in sorted(kv)]
     CSV_WRITER.writerow(values)
     sys.stdout.flush()
+    metrics.emit(kv.pop("stage"), **kv)
 
 import os
-emit_stats(stage="pid", pid=os.getpid())
+if __name__ != "__mp_main__":
+    emit_stats(stage="pid", pid=os.getpid())
 
 @contextlib.contextmanager
-def timer(label):
+def timer(label, **fields):
     t0 = time.time()
-    yield
+    with metrics.stage(label.lower(), **fields), tracing.span(label.lower(), cat="stage", **fields):
+        yield
     print(f"{label:<20} : {time.time() - t0:6.2f} s")
 
 
 # ──────────────────────────────────────────────────────────────────────────
 #  NN training helper
 # ──────────────────────────────────────────────────────────────────────────
+# The model packages do not import engine; their train() reports through this.
+def _count_epoch(samples: int, steps: int) -> None:
+    metrics.add("train.samples", samples)
+    metrics.add("train.steps", steps)
+
+
 def train_and_save_latest \
 (
     model_type: str,
-    states: torch.Tensor,
-    values: torch.Tensor,
+    batches: ReplayBatches,
     *,
     epochs: int = 10,
     lr: float = 1e-4,
-    batch_size: int = 32,
-    shuffle: bool = True,
-    num_workers: int = 8,
+    compile: bool = False,
+    bf16: bool = False,
+    meta: Dict[str, Any] | None = None,
+    gate: Callable[[Path], bool] | None = None,
 ) -> float:
 
     module, latest_path = core.get_value_network(model_type)
-
-    ValueNetDataset = getattr(module, "ValueNetDataset")
-    dataset = ValueNetDataset(states, values)
-    loader = DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, num_workers=num_workers)
-
-    ValueNetwork = getattr(module, "ValueNetwork")
     train_fn = getattr(module, "train")
 
     device = "cuda" if torch.cuda.is_available() else "cpu"
     if Path(latest_path).exists():
-        model = torch.load(latest_path, map_location=device)
         print("Loaded existing net from", latest_path)
     else:
-        model = ValueNetwork()
         print("No previous model – created new network instance")
+    model = core.load_model(model_type, latest_path, device)
 
-    avg_loss = train_fn(model, loader, epochs, lr, device=device)
+    # Adam moments carry over from the previous cycle (and across restarts).
+    optimizer = getattr(module, "make_optimizer")(model, lr)
+    opt_state = core.load_optimizer_state(latest_path, device)
+    if opt_state is not None:
+        optimizer.load_state_dict(opt_state)
 
-    checkpoint_dir = Path(latest_path).parent / "checkpoints"
-    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    avg_loss = train_fn(model, batches, epochs, lr, device=device, compile=compile, bf16=bf16, optimizer=optimizer,
+                        span=tracing.span, on_epoch=_count_epoch)
 
-    if Path(latest_path).exists():
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        Path(latest_path).rename(checkpoint_dir / f"{ts}.pth")
+    ckpt = core.save_checkpoint(model_type, model, optimizer, loss=avg_loss, positions=len(batches), **(meta or {}))
+    metrics.emit("checkpoint", path=ckpt.name, loss=avg_loss, **(meta or {}))
+
+    # The first net has no incumbent to beat.
+    if gate is not None and Path(latest_path).exists():
+        promoted = gate(ckpt)
+        core.update_index(model_type, ckpt.name, promoted=promoted)
+        if not promoted:
+            print("Candidate rejected – keeping", latest_path)
+            return avg_loss
 
-    torch.save(model, latest_path)
+    core.publish_latest(model_type, ckpt)
     print("Saved new *latest* model to", latest_path)
     return avg_loss
 
 
+# Candidate-vs-incumbent SPRT (engine/arena.py) at the current search
+# settings; the incumbent is whatever latest.pth holds.
+def _make_gate(engine: Engine, *, elo0: float, elo1: float, max_games: int) -> Callable[[Path], bool]:
+    value_cfg = engine.config["value"]
+    model_type = value_cfg["model_type"]
+    _, latest_path = core.get_value_network(model_type)
+
+    def player(label, path):
+        return label, {"name": "network_at_path", "model_type": model_type, "path": str(path),
+                       "batch_size": value_cfg.get("batch_size", 1)}
+
+    def gate(candidate: Path) -> bool:
+        with timer("GATE"):
+            passed, test = arena.gate \
+            (
+                engine.config, player("candidate", candidate), player("incumbent", latest_path),
+                elo0=elo0, elo1=elo1, max_games=max_games,
+            )
+        w, d, l = test.wdl
+        verdict = "promoted" if passed else "rejected"
+        print(f"Gate          : +{w} ={d} -{l} in {test.games} games, LLR {test.llr():.2f} "
+              f"[{test.lower:.2f}, {test.upper:.2f}] → {verdict}")
+        metrics.emit("gate", candidate=candidate.name, games=test.games, wins=w, draws=d, losses=l,
+                     llr=test.llr(), promoted=passed)
+        return passed
+
+    return gate
+
+
+# ──────────────────────────────────────────────────────────────────────────
+#  Trainer snapshots – resume a killed run where it stopped
+# ──────────────────────────────────────────────────────────────────────────
+# Set by SIGTERM/SIGINT: the run finishes the games in flight, snapshots and
+# exits.  Network weights and optimizer state live in the latest checkpoint;
+# the snapshot holds the schedule position, replay pointer and RNG states.
+STOP_REQUESTED = threading.Event()
+
+
+def _request_stop(signum, frame):
+    if STOP_REQUESTED.is_set():
+        raise SystemExit(128 + signum)
+    STOP_REQUESTED.set()
+    print(f"\nSignal {signum}: stopping after the current step (send again to exit now)", flush=True)
+
+
+def _snapshot_path(replay: ReplayBuffer) -> Path:
+    return replay.path / "trainer_state.pt"
+
+
+def _save_snapshot(replay: ReplayBuffer, **state) -> None:
+    replay.flush()
+    state["generation"] = replay.generation
+    state["rng"] = {"python": random.getstate(), "numpy": np.random.get_state(), "torch": torch.get_rng_state()}
+    path = _snapshot_path(replay)
+    tmp = path.with_suffix(".pt.tmp")
+    torch.save(state, tmp)
+    os.replace(tmp, path)
+
+
+def _load_snapshot(replay: ReplayBuffer, mode: str) -> Dict[str, Any] | None:
+    path = _snapshot_path(replay)
+    if not path.exists():
+        print("No trainer snapshot found – starting a new run")
+        return None
+    state = torch.load(path, weights_only=False)
+    if state["mode"] != mode:
+        raise ValueError(f"snapshot at {path} was written by a {state['mode']} run, not {mode}")
+    rng = state.pop("rng")
+    random.setstate(rng["python"])
+    np.random.set_state(rng["numpy"])
+    torch.set_rng_state(rng["torch"])
+    print(f"Resuming from {path}: cycle {state['cycle'] + 1}, phase {state['phase']}")
+    return state
+
+
 # ──────────────────────────────────────────────────────────────────────────
 #  Self-play helpers
 # ──────────────────────────────────────────────────────────────────────────
-def simulate_games(engine: Engine, total_games: int, current_cycle: int) -> List[int | None]:
-    unfinished = set(range(min(total_games, engine.threads)))
-    final = [None] * min(total_games, engine.threads)
+def simulate_games(engine: Engine, total_games: int, current_cycle: int, sink: Callable | None = None,
+                   stop: threading.Event | None = None, pool: SelfPlayPool | None = None) -> int:
+    finished = 0
+
+    def on_game(rows, labels, worker=0):
+        nonlocal finished
+        finished += 1
+        if sink is not None:
+            sink(rows, labels)
+        emit_stats(stage="game_done", cycle=current_cycle, finished=finished, target=total_games, worker=worker, plies=len(rows))
+
+    if pool is not None:
+        mcts_params = {k: engine.config["mcts"][k] for k in ("simulations", "c_puct")}
+        pool.play(total_games, mcts_params, on_game, stop=stop)
+    else:
+        play_games(engine, total_games, lambda rows, labels, _: on_game(rows, labels), stop=stop)
+    return finished
 
-    while unfinished:
-        sims = engine.config["mcts"]["simulations"]
-        c_val = engine.config["mcts"]["c_puct"]
-        results = engine.play_mcts_parallel(list(unfinished), simulations=sims, c=c_val)
 
-        finished_now = [(results[i], i) for i in unfinished if results[i] is not None]
-        for res, idx in finished_now:
-            unfinished.remove(idx)
-            final[idx] = res
-            emit_stats(stage="game_done", cycle=current_cycle, finished=sum(r is not None for r in final), target=total_games)
+# Blending search Q into the value targets needs play_mcts to record it.
+def _make_engine(config_path: str, q_blend: float = 0.0, profile_search: bool = False) -> Engine:
+    with open(config_path, "r", encoding="utf-8") as fh:
+        config = yaml.safe_load(fh)
+    if q_blend:
+        config.update(record_search=True, q_blend=q_blend)
+    if profile_search:
+        config["profile_search"] = True
+    return Engine(config)
 
-            if len(final) < total_games:
-                final += [None]
-                unfinished.add(engine.add_game())
 
-    return final
+# Worker processes for self-play; None keeps the in-process threaded loop.
+def _selfplay_pool(engine: Engine, workers: int) -> SelfPlayPool | None:
+    if workers <= 1:
+        return None
+    with timer("START WORKERS"):
+        return SelfPlayPool(engine.config, workers).start()
 
 
 def schedule_hyperparams \
@@ -195,53 +341,261 @@ def full_training_run \
     cycles: int = 30,
     batch_size: int = 256,
     epochs: int = 4,
-    num_workers: int = 8,
     games_cap: int = 2000,
     sims_cap: int = 800,
     init_lr: float = 3e-4,
     lr_decay: float = 0.95,
     lr_floor: float = 1e-5,
+    replay_dir: str | None = None,
+    replay_capacity: int = 1_000_000,
+    replay_decay: float = 0.9,
+    frac_old: float = 0.30,
+    selfplay_workers: int = 0,
+    q_blend: float = 0.0,
+    profile_search: bool = False,
+    compile: bool = False,
+    bf16: bool = False,
+    resume: bool = False,
+    snapshot_every: int = 50,
+    gate: bool = False,
+    gate_elo: Tuple[float, float] = (0.0, 30.0),
+    gate_max_games: int = 200,
 ) -> None:
 
-    engine = Engine(config_path)
+    engine = _make_engine(config_path, q_blend, profile_search)
+    model_type = engine.config["value"]["model_type"]
+    _, latest_path = core.get_value_network(model_type)
+    replay = _open_replay(engine, Path(replay_dir) if replay_dir else Path(latest_path).parent / "replay", replay_capacity)
+    _, decode, _ = engine.row_codec(compact=True)
+    gate_fn = _make_gate(engine, elo0=gate_elo[0], elo1=gate_elo[1], max_games=gate_max_games) if gate else None
     loss_acc = 0.0
 
-    for cycle in range(cycles):
-        engine.reset_all_games()
+    snap = _load_snapshot(replay, "full") if resume else None
+    start = snap["cycle"] if snap else 0
+    snapshot = lambda **state: _save_snapshot(replay, mode="full", **state)
 
-        hp = schedule_hyperparams(cycle, games_cap=games_cap, sims_cap=sims_cap, init_lr=init_lr, lr_decay=lr_decay, lr_floor=lr_floor)
+    pool = _selfplay_pool(engine, selfplay_workers)
+    try:
+        for cycle in range(start, cycles):
+            engine.reset_all_games()
+
+            hp = schedule_hyperparams(cycle, games_cap=games_cap, sims_cap=sims_cap, init_lr=init_lr, lr_decay=lr_decay, lr_floor=lr_floor)
+            engine.config["mcts"]["simulations"] = hp["simulations"]
+            engine.config["mcts"]["c_puct"] = hp["c_puct"]
+
+            emit_stats \
+            (
+                stage="cycle_start",
+                cycle=cycle + 1,
+                total_cycles=cycles,
+                games_target=hp["games"],
+                sims=hp["simulations"],
+            )
+            # A snapshot taken mid-cycle continues that cycle's generation; the
+            # games it already counted are in the replay buffer.
+            phase, games_done = "selfplay", 0
+            if snap is not None and snap["cycle"] == cycle and snap["phase"] != "start":
+                phase, games_done, gen = snap["phase"], snap["games_done"], snap["generation"]
+            else:
+                gen = replay.new_generation()
+            snap = None
+
+            if phase == "selfplay":
+                def sink(rows, vals):
+                    nonlocal games_done
+                    replay.add(rows, vals, gen, flush=False)
+                    games_done += 1
+                    if games_done % snapshot_every == 0:
+                        snapshot(cycle=cycle, phase="selfplay", games_done=games_done)
+
+                with timer("SELF-PLAY", cycle=cycle + 1):
+                    simulate_games(engine, hp["games"] - games_done, cycle + 1, sink=sink, stop=STOP_REQUESTED, pool=pool)
+                if STOP_REQUESTED.is_set():
+                    snapshot(cycle=cycle, phase="selfplay", games_done=games_done)
+                    emit_stats(stage="stopped", cycle=cycle + 1, games=games_done)
+                    return
+                snapshot(cycle=cycle, phase="train", games_done=games_done)
+
+            indices = _replay_indices(replay, gen, frac_old=frac_old, decay=replay_decay)
+            print(f"Replay buffer : {len(replay):,} positions stored, training on {len(indices):,} (+{len(replay.indices(gen))} this cycle)")
+
+            with timer("TRAIN", cycle=cycle + 1):
+                loss_acc += train_and_save_latest \
+                (
+                    model_type,
+                    ReplayBatches(replay, indices, decode, batch_size=batch_size),
+                    epochs=epochs,
+                    lr=hp["lr"],
+                    compile=compile,
+                    bf16=bf16,
+                    meta={"cycle": cycle + 1, "games": hp["games"]},
+                    gate=gate_fn,
+                )
+            _reload_values(engine, pool)
+            snapshot(cycle=cycle + 1, phase="start", games_done=0)
+            if STOP_REQUESTED.is_set():
+                emit_stats(stage="stopped", cycle=cycle + 1, games=games_done)
+                return
+    finally:
+        if pool is not None:
+            pool.stop()
+
+    emit_stats(stage="train_done", cycle=cycles, loss=loss_acc / max(1, cycles - start), epochs=epochs)
+
+
+# New weights for self-play: the engine's Values and every worker's.
+def _reload_values(engine: Engine, pool: SelfPlayPool | None = None) -> None:
+    for value in {id(v): v for v in engine.values}.values():
+        value.reload()
+    if pool is not None:
+        pool.reload()
+
+
+def pipelined_training_run \
+(
+    config_path: str,
+    *,
+    cycles: int = 30,
+    batch_size: int = 256,
+    epochs: int = 4,
+    games_cap: int = 2000,
+    sims_cap: int = 800,
+    init_lr: float = 3e-4,
+    lr_decay: float = 0.95,
+    lr_floor: float = 1e-5,
+    replay_dir: str | None = None,
+    replay_capacity: int = 1_000_000,
+    replay_decay: float = 0.9,
+    frac_old: float = 0.30,
+    selfplay_workers: int = 0,
+    q_blend: float = 0.0,
+    profile_search: bool = False,
+    compile: bool = False,
+    bf16: bool = False,
+    resume: bool = False,
+    snapshot_every: int = 50,
+    gate: bool = False,
+    gate_elo: Tuple[float, float] = (0.0, 30.0),
+    gate_max_games: int = 200,
+) -> None:
+    """
+    Actor/learner variant of full_training_run.  A self-play thread keeps
+    generating games into the replay buffer while the learner trains on it;
+    every new net is published atomically and hot-swapped into the running
+    engine's Values.  A generation ends once it has collected the scheduled
+    number of games, and the actor is already playing the next one while the
+    learner trains on it.
+    """
+    engine = _make_engine(config_path, q_blend, profile_search)
+    model_type = engine.config["value"]["model_type"]
+    _, latest_path = core.get_value_network(model_type)
+    replay = _open_replay(engine, Path(replay_dir) if replay_dir else Path(latest_path).parent / "replay", replay_capacity)
+    _, decode, _ = engine.row_codec(compact=True)
+    gate_fn = _make_gate(engine, elo0=gate_elo[0], elo1=gate_elo[1], max_games=gate_max_games) if gate else None
+
+    schedule = lambda cycle: schedule_hyperparams(cycle, games_cap=games_cap, sims_cap=sims_cap, init_lr=init_lr, lr_decay=lr_decay, lr_floor=lr_floor)
+    games_done: Counter = Counter()
+    rows_done: Counter = Counter()
+    rows_at_target: Dict[int, int] = {}
+    progress = threading.Condition()
+    stop = threading.Event()
+    current = {"cycle": 0}
+
+    def sink(rows, vals):
+        gen = replay.generation
+        replay.add(rows, vals, gen, flush=False)
+        with progress:
+            games_done[gen] += 1
+            rows_done[gen] += len(rows)
+            if games_done[gen] == schedule(current["cycle"])["games"]:
+                rows_at_target[gen] = rows_done[gen]
+            progress.notify_all()
+        if games_done[gen] % snapshot_every == 0:
+            replay.flush()
+
+    def actor():
+        while not stop.is_set():
+            engine.reset_all_games()
+            cycle = current["cycle"]
+            simulate_games(engine, schedule(cycle)["games"], cycle + 1, sink=sink, stop=stop, pool=pool)
+
+    def apply_search_params(cycle):
+        hp = schedule(cycle)
         engine.config["mcts"]["simulations"] = hp["simulations"]
         engine.config["mcts"]["c_puct"] = hp["c_puct"]
+        return hp
+
+    # The unfinished generation of a stopped run stays in the pool as older
+    # data; a resumed run opens a fresh one at the snapshot's cycle.
+    snap = _load_snapshot(replay, "pipelined") if resume else None
+    start = snap["cycle"] if snap else 0
+    current["cycle"] = start
+
+    hp = apply_search_params(start)
+    pool = _selfplay_pool(engine, selfplay_workers)
+    gen = replay.new_generation()
+    actor_thread = threading.Thread(target=actor, name="self-play-actor", daemon=True)
+    actor_thread.start()
 
-        emit_stats \
-        (
-            stage="cycle_start",
-            cycle=cycle + 1,
-            total_cycles=cycles,
-            games_target=hp["games"],
-            sims=hp["simulations"],
-        )
-        with timer("SELF-PLAY"):
-            simulate_games(engine, hp["games"], cycle + 1)
-
-        with timer("DATASET BUILD"):
-            states_now, values_now = engine.get_dataset()
-        states, values = _update_replay(states_now, values_now)
-        print(f"Replay buffer : {len(values):,} positions total (+{len(values_now)} this cycle)")
-
-        with timer("TRAIN"):
-            loss_acc += train_and_save_latest \
+    loss_acc = 0.0
+    try:
+        for cycle in range(start, cycles):
+            emit_stats \
             (
-                engine.config["value"]["model_type"],
-                states,
-                values,
-                epochs=epochs,
-                lr=hp["lr"],
-                batch_size=batch_size,
-                num_workers=num_workers,
+                stage="cycle_start",
+                cycle=cycle + 1,
+                total_cycles=cycles,
+                games_target=hp["games"],
+                sims=hp["simulations"],
             )
-
-    emit_stats(stage="train_done", cycle=cycles, loss=loss_acc / cycles, epochs=epochs)
+            with timer("WAIT FOR GAMES", cycle=cycle + 1):
+                with progress:
+                    while games_done[gen] < hp["games"] and actor_thread.is_alive() and not STOP_REQUESTED.is_set():
+                        progress.wait(timeout=1.0)
+            if STOP_REQUESTED.is_set():
+                _save_snapshot(replay, mode="pipelined", cycle=cycle, phase="start")
+                emit_stats(stage="stopped", cycle=cycle + 1, games=games_done[gen])
+                return
+            if not actor_thread.is_alive():
+                raise RuntimeError("self-play actor stopped unexpectedly")
+
+            # New games now count towards the next generation.
+            train_gen, train_hp = gen, hp
+            current["cycle"] = cycle + 1
+            hp = apply_search_params(cycle + 1)
+            gen = replay.new_generation()
+            replay.flush()
+
+            # The actor keeps playing while the learner trains, so a generation
+            # can overshoot its game target; train on the target's worth of
+            # fresh rows and leave the surplus in the pool.
+            indices = _replay_indices(replay, train_gen, frac_old=frac_old, decay=replay_decay,
+                                      max_fresh=rows_at_target.get(train_gen))
+            print(f"Replay buffer : {len(replay):,} positions stored, training on {len(indices):,} (+{len(replay.indices(train_gen))} this cycle)")
+
+            with timer("TRAIN", cycle=cycle + 1):
+                loss_acc += train_and_save_latest \
+                (
+                    model_type,
+                    ReplayBatches(replay, indices, decode, batch_size=batch_size),
+                    epochs=epochs,
+                    lr=train_hp["lr"],
+                    compile=compile,
+                    bf16=bf16,
+                    meta={"cycle": cycle + 1, "games": games_done[train_gen]},
+                    gate=gate_fn,
+                )
+            with timer("HOT SWAP", cycle=cycle + 1):
+                _reload_values(engine, pool)
+            _save_snapshot(replay, mode="pipelined", cycle=cycle + 1, phase="start")
+    finally:
+        stop.set()
+        actor_thread.join()
+        if pool is not None:
+            pool.stop()
+        replay.flush()
+
+    emit_stats(stage="train_done", cycle=cycles, loss=loss_acc / max(1, cycles - start), epochs=epochs)
 
 
 # ──────────────────────────────────────────────────────────────────────────
@@ -253,9 +607,19 @@ if __name__ == "__main__":
     # Hyper-params
     ap.add_argument("-c", "--config", required=True, help="Config name (without .yaml) under ./configs/")
     ap.add_argument("--cycles", type=int, default=30, help="Number of cycles")
-    ap.add_argument("--batch-size", type=int, default=256, help="DataLoader batch size")
+    ap.add_argument("--batch-size", type=int, default=256, help="Training batch size")
     ap.add_argument("--epochs", type=int, default=4, help="Epochs per cycle")
-    ap.add_argument("--num-workers", type=int, default=8, help="DataLoader workers")
+    ap.add_argument("--compile", action="store_true", help="torch.compile the value net for training")
+    ap.add_argument("--bf16", action="store_true", help="bfloat16 autocast during training")
+    ap.add_argument("--pipelined", action="store_true", help="Run self-play and training concurrently (actor/learner)")
+    ap.add_argument("--resume", action="store_true", help="Continue from the trainer snapshot in the replay directory")
+    ap.add_argument("--gate", action="store_true", help="Promote a new net only if it wins an SPRT against the current one")
+    ap.add_argument("--gate-elo", type=float, nargs=2, default=(0.0, 30.0), metavar=("ELO0", "ELO1"), help="SPRT hypotheses H0/H1")
+    ap.add_argument("--gate-max-games", type=int, default=200, help="Reject candidates still undecided after this many games")
+    ap.add_argument("--snapshot-every", type=int, default=50, help="Snapshot trainer state every N self-play games")
+    ap.add_argument("--selfplay-workers", type=int, default=0, help="Self-play worker processes (0/1 = threads in this process)")
+    ap.add_argument("--profile-search", action="store_true", help="Collect MCTS phase timers/counters into the metrics stream")
+    ap.add_argument("--trace", action="store_true", help="Write a Chrome/Perfetto timeline (logs/train_<ts>.trace.json)")
 
     # Tuning
     ap.add_argument("--games-cap", type=int, default=2000)
@@ -264,18 +628,49 @@ if __name__ == "__main__":
     ap.add_argument("--lr-decay", type=float, default=0.95)
     ap.add_argument("--lr-floor", type=float, default=1e-5)
 
+    # Replay buffer
+    ap.add_argument("--replay-dir", default=None, help="Replay buffer directory (default: models/<model_type>/replay)")
+    ap.add_argument("--replay-capacity", type=int, default=1_000_000, help="Positions kept on disk")
+    ap.add_argument("--replay-decay", type=float, default=0.9, help="Per-generation sampling weight decay for old positions")
+    ap.add_argument("--q-blend", type=float, default=0.0, help="Weight of root search Q in the value targets (0 = outcome only)")
+    ap.add_argument("--frac-old", type=float, default=0.30, help="Old positions mixed in, as a fraction of the older pool")
+
     args = ap.parse_args()
 
-    full_training_run \
+    kwargs = dict \
     (
-        args.config,
         cycles=args.cycles,
         batch_size=args.batch_size,
         epochs=args.epochs,
-        num_workers=args.num_workers,
         games_cap=args.games_cap,
         sims_cap=args.sims_cap,
         init_lr=args.init_lr,
         lr_decay=args.lr_decay,
         lr_floor=args.lr_floor,
+        replay_dir=args.replay_dir,
+        replay_capacity=args.replay_capacity,
+        replay_decay=args.replay_decay,
+        frac_old=args.frac_old,
+        selfplay_workers=args.selfplay_workers,
+        q_blend=args.q_blend,
+        profile_search=args.profile_search,
+        compile=args.compile,
+        bf16=args.bf16,
+        resume=args.resume,
+        snapshot_every=args.snapshot_every,
+        gate=args.gate,
+        gate_elo=tuple(args.gate_elo),
+        gate_max_games=args.gate_max_games,
     )
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+    if args.trace:
+        trace_path = tracing.configure(_logfile_path.with_suffix(".trace.json"))
+        print(f"[TRACE] → {trace_path.resolve()}", flush=True)
+    try:
+        if args.pipelined:
+            pipelined_training_run(args.config, **kwargs)
+        else:
+            full_training_run(args.config, **kwargs)
+    finally:
+        tracing.write()
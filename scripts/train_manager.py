@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import argparse
-import csv
+import json
 import os
+import select
+import signal
 import subprocess
 import sys
 import time
+from collections import deque
 from pathlib import Path
 from typing import Optional, Tuple
 
@@ -31,125 +34,130 @@ def _start_training(cmd: list[str]) -> Tuple[subprocess.Popen, Optional[Path]]:
     return proc, (new_logs[-1] if new_logs else None)
 
 
-def _parse_stats_row(row: list[str]) -> tuple[str, dict]:
-    stage_idx = next((i for i, v in enumerate(row) if not v.replace(".", "", 1).isdigit()), None)
-    if stage_idx is None:
-        return "", {}
-
-    stage = row[stage_idx]
-    info: dict = {"stage": stage}
-
-    try:
-        if stage == "pid":
-            info["pid"] = int(row[stage_idx - 1])
-
-        elif stage == "cycle_start":
-            info["cycle"]        = int(row[1])
-            info["games_target"] = int(row[2])
-            info["sims"]         = int(row[3])
-            info["total_cycles"] = int(row[stage_idx + 1])
-
-        elif stage == "game_done":
-            info["cycle"]    = int(row[1])
-            info["finished"] = int(row[2])
-            info["target"]   = int(row[stage_idx + 1])
-
-        elif stage == "train_done":
-            info["cycle"]  = int(row[1])
-            info["epochs"] = int(row[2])
-            info["loss"]   = float(row[3])
-
-    except (ValueError, IndexError, KeyError):
-        pass
-    
-    return stage, info
-
-
+# ──────────────────────────────────────────────────────────────────────────
+#  Live dashboard – follows the run's metrics stream (engine/metrics.py)
+# ──────────────────────────────────────────────────────────────────────────
+STAGE_COLUMNS = \
+[
+    ("seconds",                  "secs",       "{:8.1f}"),
+    ("games_per_s",              "games/s",    "{:8.2f}"),
+    ("plies_per_s",              "plies/s",    "{:8.1f}"),
+    ("mcts.simulations_per_s",   "sims/s",     "{:9.0f}"),
+    ("nn.batches_per_s",         "nn b/s",     "{:8.1f}"),
+    ("nn.fill",                  "fill",       "{:6.0%}"),
+    ("train.samples_per_s",      "samples/s",  "{:9.0f}"),
+    ("cache.hit_rate",           "cache hit",  "{:9.0%}"),
+]
+LIVE_WINDOW = 30.0
+
+
+def _metrics_path(log_path: Path) -> Path:
+    return log_path if log_path.suffix == ".jsonl" else log_path.with_suffix(".metrics.jsonl")
+
+
+class Dashboard:
+    def __init__(self):
+        self.pid: Optional[int] = None
+        self.cycle = self.total_cycles = None
+        self.games_target = self.sims = None
+        self.finished = 0
+        self.recent: deque = deque()            # (ts, plies) of finished games
+        self.stages: dict[str, dict] = {}        # last record per stage name
+        self.losses: list[tuple[int, float]] = []
+        self.last_gate: Optional[dict] = None
+        self.status = "running"
+
+    def feed(self, rec: dict) -> None:
+        event = rec.get("event")
+        if event == "pid":
+            self.pid = rec.get("pid")
+        elif event == "cycle_start":
+            self.cycle, self.total_cycles = rec.get("cycle"), rec.get("total_cycles")
+            self.games_target, self.sims = rec.get("games_target"), rec.get("sims")
+            self.finished = 0
+        elif event == "game_done":
+            self.finished = rec.get("finished", self.finished)
+            self.recent.append((rec["ts"], rec.get("plies", 0)))
+        elif event == "stage":
+            self.stages[rec["name"]] = rec
+        elif event == "checkpoint":
+            self.losses.append((rec.get("cycle"), rec["loss"]))
+        elif event == "gate":
+            self.last_gate = rec
+        elif event == "train_done":
+            self.status = "complete"
+        elif event == "stopped":
+            self.status = "stopped"
+
+    def render(self, source: Path) -> str:
+        now = time.time()
+        while self.recent and now - self.recent[0][0] > LIVE_WINDOW:
+            self.recent.popleft()
+        games_s = len(self.recent) / LIVE_WINDOW
+        plies_s = sum(p for _, p in self.recent) / LIVE_WINDOW
+
+        lines = [f"ZeroClone training  –  pid {self.pid or '?'}  –  {source}  –  {self.status}", ""]
+        if self.cycle is not None:
+            pct = 100.0 * self.finished / max(1, self.games_target or 1)
+            lines.append(f"Cycle {self.cycle}/{self.total_cycles}   games {self.finished}/{self.games_target} ({pct:.1f}%)   sims {self.sims}")
+        lines.append(f"Live ({LIVE_WINDOW:.0f}s): {games_s:.2f} games/s   {plies_s:.1f} plies/s")
+        lines.append("")
+
+        header = f"{'stage':<16}" + "".join(f"{title:>{len(fmt.format(0))}}" for _, title, fmt in STAGE_COLUMNS)
+        lines += [header, "-" * len(header)]
+        for name, rec in self.stages.items():
+            row = f"{name:<16}"
+            for key, _, fmt in STAGE_COLUMNS:
+                width = len(fmt.format(0))
+                row += fmt.format(rec[key]) if key in rec else f"{'–':>{width}}"
+            lines.append(row + (f"   (cycle {rec['cycle']})" if "cycle" in rec else ""))
+        if self.losses:
+            lines += ["", "Loss: " + "  ".join(f"c{c}={l:.4f}" for c, l in self.losses[-8:])]
+        if self.last_gate:
+            g = self.last_gate
+            lines.append(f"Gate: {g['candidate']}  +{g['wins']} ={g['draws']} -{g['losses']}  "
+                         f"LLR {g['llr']:.2f}  {'promoted' if g['promoted'] else 'rejected'}")
+        lines += ["", "type 'k' + ENTER to stop the run,  Ctrl-C to quit"]
+        return "\n".join(lines)
 
-import select, os, signal, sys, csv
 
 def view_log(log_path: Path) -> None:
-    if not log_path.exists():
-        print(f"[manager] Log file not found: {log_path}", file=sys.stderr)
+    metrics_path = _metrics_path(log_path)
+    if not metrics_path.exists():
+        print(f"[manager] Metrics stream not found: {metrics_path}", file=sys.stderr)
         sys.exit(1)
 
-    pid = None
-    with log_path.open("r", encoding="utf-8") as fh:
-        for line in fh:
-            if not line or not line[0].isdigit():
-                continue
-            try:
-                row = next(csv.reader([line]))
-            except csv.Error:
-                continue
-            stage, info = _parse_stats_row(row)
-            if stage == "pid":
-                pid = info["pid"]
-                break
-
-    if not pid:
-        print("[manager] ⚠️  PID not found in log; kill feature disabled.", file=sys.stderr)
-
-    print(f"[manager] Viewing {log_path}")
-    print("          type 'k' + ENTER to kill the run,  Ctrl-C to quit\n")
-
-    current_cycle, finished, target = None, 0, 0
-    with log_path.open("r", encoding="utf-8") as fh:
-        fh.seek(0, os.SEEK_END)
-
+    board = Dashboard()
+    with metrics_path.open("r", encoding="utf-8") as fh:
+        last_draw, partial = 0.0, ""
         while True:
-            rlist, _, _ = select.select([fh, sys.stdin], [], [], 0.5)
+            for line in iter(fh.readline, ""):
+                partial += line
+                if not partial.endswith("\n"):
+                    break                               # writer is mid-line
+                try:
+                    board.feed(json.loads(partial))
+                except (ValueError, KeyError):
+                    pass
+                partial = ""
+
+            if time.time() - last_draw >= 1.0:
+                print("\x1b[H\x1b[2J" + board.render(metrics_path), flush=True)
+                last_draw = time.time()
+            if board.status != "running":
+                break
 
+            rlist, _, _ = select.select([sys.stdin], [], [], 0.5)
             if sys.stdin in rlist:
                 cmd = sys.stdin.readline().strip().lower()
-                if cmd == "k" and pid:
-                    os.kill(pid, signal.SIGTERM)
-                    print(f"\n[manager] Sent SIGTERM to PID {pid}")
-                    break
-
-            if fh in rlist:
-                line = fh.readline()
-                if not line:
-                    continue
-                if not line[0].isdigit():
-                    continue
-                try:
-                    row = next(csv.reader([line]))
-                except csv.Error:
-                    continue
-
-                stage, info = _parse_stats_row(row)
-                if not stage:
-                    continue
-                
-                try:
-                    if stage == "cycle_start":
-                        current_cycle = info["cycle"]
-                        target        = info["games_target"]
-                        finished      = 0
-                        print(f"\n▶ Cycle {current_cycle}  –  target {target} games")
-
-                    elif stage == "game_done":
-                        if current_cycle is None:
-                            current_cycle = info["cycle"]
-                            target        = info["target"]
-                            finished      = 0
-                            print(f"\n▶ Cycle {current_cycle}   target {target} games")
-
-                        if info["cycle"] != current_cycle:
-                            continue
-
-                        finished = info["finished"]
-                        target   = info["target"]
-                        pct      = 100.0 * finished / max(1, target)
-                        print(f"\r   progress: {finished}/{target}  ({pct:.1f}% )", end="", flush=True)
-
-                    elif stage == "train_done":
-                        print("\n\n🎉  Training run complete!\n")
-                        break
-
-                except (ValueError, IndexError, KeyError):
-                    pass
+                if cmd == "k" and board.pid:
+                    os.kill(board.pid, signal.SIGTERM)
+                    print(f"\n[manager] Sent SIGTERM to PID {board.pid} (it stops after the current step)")
+                elif cmd == "k":
+                    print("[manager] ⚠️  PID not found in metrics; kill disabled.", file=sys.stderr)
+
+    print("\x1b[H\x1b[2J" + board.render(metrics_path), flush=True)
+
 
 # ──────────────────────────────────────────────────────────────────────────
 #  CLI
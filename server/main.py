@@ -1,16 +1,31 @@
 import argparse
+import asyncio
+import json
 import os
 import collections
-from typing import Any
-from contextlib import asynccontextmanager
+import functools
+import threading
+from typing import Any, Optional
+from contextlib import asynccontextmanager, contextmanager
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
+from engine.analysis import AnalysisCache, Analyser
 from engine.engine import Engine
+from engine.search_jobs import SearchJobs
+from engine.sessions import SessionStore
+from engine import wire
 
 # === Game-agnostic state serializer ===
+# Candidate attribute names per state type, found once instead of per call.
+@functools.lru_cache(maxsize=None)
+def _state_fields(cls) -> tuple:
+    return tuple(name for name in dir(cls)
+                 if not name.startswith('_') and name != 'board' and not callable(getattr(cls, name, None)))
+
 def serialize_state(s: object) -> dict:
     out = {}
     # 1) board
@@ -22,9 +37,7 @@ def serialize_state(s: object) -> dict:
             out['board'] = b
 
     # 2) any other simple attributes
-    for name in dir(s):
-        if name.startswith('_') or name == 'board':
-            continue
+    for name in _state_fields(type(s)):
         try:
             v = getattr(s, name)
         except Exception:
@@ -47,69 +60,226 @@ async def lifespan(app: FastAPI):
             "Config file path must be set. Use `python api.py -c` or set CONFIG_PATH env var"
         )
     app.state.engine = Engine(cfg)
+    server_cfg = app.state.engine.config.get("server", {})
+    app.state.sessions = SessionStore \
+    (
+        app.state.engine,
+        max_sessions=server_cfg.get("max_games", 1000),
+        idle_timeout=server_cfg.get("game_timeout", 1800),
+        persist_dir=server_cfg.get("game_store"),
+    )
+    app.state.jobs = SearchJobs \
+    (
+        app.state.engine,
+        workers=server_cfg.get("search_workers", 4),
+        interval=server_cfg.get("progress_interval", 0.25),
+        ponder=server_cfg.get("ponder", False),
+        ponder_workers=server_cfg.get("ponder_workers", 1),
+        ponder_simulations=server_cfg.get("ponder_simulations", 100_000),
+        coalesce=server_cfg.get("coalesce", True),
+        coalesce_batch=server_cfg.get("coalesce_batch", 256),
+        coalesce_wait=server_cfg.get("coalesce_wait", 0.005),
+    )
+    app.state.analyser = Analyser \
+    (
+        app.state.engine,
+        AnalysisCache(server_cfg.get("analysis_db") or ":memory:"),
+        evaluator=app.state.jobs.evaluator,
+        trees=server_cfg.get("analysis_trees", 32),
+        max_nodes=server_cfg.get("analysis_max_nodes", 2_000_000),
+        workers=server_cfg.get("analysis_workers", 2),
+        max_simulations=server_cfg.get("analysis_max_simulations", 1_000_000),
+        max_time=server_cfg.get("analysis_max_time", 60.0),
+    )
     yield
-    # (Optional) add shutdown logic here
+    app.state.analyser.close()
+    app.state.jobs.close()
+    app.state.sessions.close()
 
 # Create app with lifespan handler
 app = FastAPI(lifespan=lifespan)
 
-# Pydantic models for request bodies
+# Pydantic models for request bodies.  `idx` is the opaque game id
+# returned by /add_game.
+# `view` picks the response body: "full" (the serialized state) or
+# "compact" (engine/wire.py); `since` asks for the moves after that ply.
 class MoveRequest(BaseModel):
-    idx: int = 0
+    idx: str
     move: Any
+    view: str = "full"
+    since: Optional[int] = None
 
 class MCTSRequest(BaseModel):
-    idx: int = 0
+    idx: str
+    view: str = "full"
+    since: Optional[int] = None
     simulations: int = 1000
     c: float = 1.4
 
-@app.get("/legal_moves/{idx}")
-def legal_moves(idx: int):
+class SearchRequest(MCTSRequest):
+    time_limit: float = 0.0
+    play: bool = True
+
+class AnalyseRequest(BaseModel):
+    position: str
+    simulations: int = 10000
+    c: float = 1.4
+    time_limit: float = 0.0
+
+# Holds the game's lock for the duration of the block.
+@contextmanager
+def _game(idx: str):
     try:
-        moves = app.state.engine.legal_moves(idx)
-        return {"idx": idx, "moves": [[*m[0]] for m in moves]}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        session = app.state.sessions.acquire(idx)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"unknown or expired game {idx}")
+    try:
+        yield session
+    finally:
+        session.lock.release()
 
-@app.post("/play_move")
-def play_move(req: MoveRequest):
+# Call with the game held: jobs start under its lock, so none can start
+# between this check and the caller's move.
+def _require_idle(idx: str):
+    if app.state.jobs.active(idx) is not None:
+        raise HTTPException(status_code=409, detail=f"game {idx} has a search running")
+
+def _view(game, view: str = "full", since: Optional[int] = None) -> dict:
+    if view == "compact" or since is not None:
+        try:
+            return wire.compact_state(game, since)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if view != "full":
+        raise HTTPException(status_code=400, detail=f"unknown view {view!r}")
+    return {"result": game.result, **serialize_state(game.state)}
+
+# JSON, or msgpack for clients that send `Accept: application/msgpack`.
+def _respond(request: Request, payload: dict) -> Response:
     try:
-        coords = tuple(req.move)
-        legal_mv = next((mv for mv in app.state.engine.legal_moves(req.idx) if mv[0] == coords), None)
-        if legal_mv is None:
-            raise ValueError("Illegal move")
+        body, media_type = wire.encode(payload, request.headers.get("accept"))
+    except LookupError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    return Response(body, media_type=media_type)
 
-        result = app.state.engine.play_move(legal_mv, req.idx)
-        state  = app.state.engine.get_state(req.idx)
-        return {"idx": req.idx, "result": result, **serialize_state(state)}
+def _move_json(move):
+    return [*move[0]] if isinstance(move[0], tuple) else move[0]
 
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+def _job(job_id: str):
+    try:
+        return app.state.jobs.get(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="unknown search job")
+
+# These take game locks (and may wait on a stopping ponder), so the async
+# endpoints run them in a worker thread, never on the event loop.
+def _start_job(idx: str, **kwargs):
+    with _game(idx) as game:
+        try:
+            return app.state.jobs.start(game, **kwargs)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
 
+def _game_view(idx: str, view: str, since: Optional[int]) -> dict:
+    with _game(idx) as game:
+        return {"idx": idx, **_view(game, view, since)}
+
+def _serialized(session) -> dict:
+    with session.lock:
+        return serialize_state(session.state)
+
+@app.get("/legal_moves/{idx}")
+def legal_moves(idx: str):
+    with _game(idx) as game:
+        return {"idx": idx, "moves": [_move_json(m) for m in game.legal_moves()]}
+
+@app.post("/play_move")
+def play_move(req: MoveRequest, request: Request):
+    with _game(req.idx) as game:
+        _require_idle(req.idx)
+        try:
+            game.play(req.move)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return _respond(request, {"idx": req.idx, **_view(game, req.view, req.since)})
+
+# Runs as a search job and awaits it, so a long search holds no server thread.
 @app.post("/play_mcts")
-def play_mcts(req: MCTSRequest):
+async def play_mcts(req: MCTSRequest, request: Request):
+    job = await asyncio.to_thread(_start_job, req.idx, simulations=req.simulations, c=req.c)
+    event, data = await job.wait()
+    if event == "failed":
+        raise HTTPException(status_code=400, detail=data["error"].strip().splitlines()[-1])
+    return _respond(request, await asyncio.to_thread(_game_view, req.idx, req.view, req.since))
+
+# ─── Search jobs ──────────────────────────────────────────────────────────
+# POST /search starts a search and returns its job id at once; progress is
+# polled from GET /search/{job} or streamed from GET /search/{job}/events
+# (server-sent events: "progress" snapshots, then one of done / stopped /
+# cancelled / failed).  /stop plays the best move found so far, DELETE
+# discards the search.
+@app.post("/search")
+def start_search(req: SearchRequest):
+    job = _start_job(req.idx, simulations=req.simulations, c=req.c, time_limit=req.time_limit, play=req.play)
+    return job.snapshot()
+
+@app.get("/search/{job_id}")
+def search_status(job_id: str):
+    return _job(job_id).snapshot()
+
+@app.get("/search/{job_id}/events")
+async def search_events(job_id: str):
+    job = _job(job_id)
+
+    async def stream():
+        async for event, data in job.events():
+            if event in ("done", "stopped"):
+                data = {**data, **await asyncio.to_thread(_serialized, job.session)}
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/search/{job_id}/stop")
+def stop_search(job_id: str):
+    job = _job(job_id)
+    job.stop()
+    return job.snapshot()
+
+@app.delete("/search/{job_id}")
+def cancel_search(job_id: str):
+    job = _job(job_id)
+    job.cancel()
+    return job.snapshot()
+
+# ─── Analysis ─────────────────────────────────────────────────────────────
+# A position (FEN, or a connect4 column or move string, see engine/wire.py)
+# in, best move / value / PV out.  Answered from the SQLite cache at
+# `server.analysis_db` when an entry has the visits asked for, otherwise
+# searched deeper and stored (engine/analysis.py).
+@app.post("/analyse")
+async def analyse(req: AnalyseRequest, request: Request):
+    cancel = threading.Event()
     try:
-        result = app.state.engine.play_mcts(req.idx, req.simulations, req.c)
-        state  = app.state.engine.get_state(req.idx)
-        return {"idx": req.idx, "result": result, **serialize_state(state)}
-    except Exception as e:
+        out = await asyncio.wrap_future(app.state.analyser.submit(req.position, req.simulations, req.c,
+                                                                  req.time_limit, cancel))
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except asyncio.CancelledError:      # client went away: stop the search
+        cancel.set()
+        raise
+    return _respond(request, out)
 
+# Games live in the session store (engine/sessions.py): idle games are
+# evicted after `server.game_timeout` seconds, the least recently used
+# beyond `server.max_games`, and kept on disk under `server.game_store`
+# when that is set.
 @app.post("/add_game")
 def add_game():
-    try:
-        idx = app.state.engine.add_game()
-        return {"idx": idx}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    return {"idx": app.state.sessions.create().id}
 
 @app.get("/state/{idx}")
-def get_state(idx: int):
-    try:
-        state = app.state.engine.get_state(idx)
-        return {"idx": idx, **serialize_state(state)}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+def get_state(idx: str, request: Request, view: str = "full", since: Optional[int] = None):
+    return _respond(request, _game_view(idx, view, since))
 
 
 def main():
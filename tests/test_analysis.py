@@ -0,0 +1,64 @@
+import os, sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from engine.analysis import AnalysisCache, Analyser
+from engine.engine import Engine
+
+
+def test_cache_persists_across_analysers(tmp_path):
+    engine = Engine(os.path.join(ROOT, 'configs', 'crude_chess.yaml'))
+    path = tmp_path / 'analysis.sqlite'
+    analyser = Analyser(engine, AnalysisCache(path))
+    start = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+    first = analyser.analyse(start, 256)
+    assert not first['cached']
+    analyser.close()
+
+    analyser = Analyser(engine, AnalysisCache(path))
+    cached = analyser.analyse(start, 128)
+    assert cached['cached'] and cached['simulations'] == first['simulations'] and cached['pv'] == first['pv']
+    assert analyser.analyse(start, 256, c=2.0)['cached'] is False       # other settings, other entry
+    assert len(analyser.cache) == 2
+    # The cache keeps the deeper entry.
+    analyser.cache.put(cached['position'], analyser.settings(1.4), {**cached, 'simulations': 10})
+    assert analyser.analyse(start, 256)['cached']
+    analyser.close()
+
+
+def test_kept_trees_share_a_node_budget():
+    engine = Engine(os.path.join(ROOT, 'configs', 'crude_chess.yaml'))
+    analyser = Analyser(engine, AnalysisCache(), trees=8, max_nodes=500)
+    positions = ['rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+                 '6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1',
+                 'r3k2r/8/8/8/8/8/8/4K2R b Kkq - 7 30']
+    for position in positions:
+        analyser.analyse(position, 200)
+    kept = [tree.searcher.simulations for tree in analyser._trees.values()]
+    assert len(kept) == 2 and sum(kept) <= 500
+    analyser.analyse(positions[0], 600)      # above the budget on its own
+    assert len(analyser._trees) == 0
+    analyser.close()
+
+
+def test_analysis_is_capped_and_cancellable():
+    import threading, time
+    engine = Engine(os.path.join(ROOT, 'configs', 'crude_chess.yaml'))
+    analyser = Analyser(engine, AnalysisCache(), max_simulations=300, max_time=5.0)
+    start = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+    capped = analyser.analyse(start, 10**9)
+    assert capped['capped'] and not capped['complete'] and 300 <= capped['simulations'] < 10**9
+    assert analyser.analyse(start, 200, c=2.0)['complete']
+
+    analyser.max_simulations = 10**9
+    t0 = time.perf_counter()
+    timed = analyser.analyse(start, 10**9, time_limit=0.3)
+    assert not timed['complete'] and time.perf_counter() - t0 < 2.0
+
+    cancel = threading.Event()
+    future = analyser.submit(start, 10**9, cancel=cancel)
+    time.sleep(0.2)
+    cancel.set()
+    assert not future.result(timeout=2.0)['complete']
+    analyser.close()
@@ -0,0 +1,73 @@
+import os, sys
+
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine import arena
+from engine.arena import SPRT, Tournament, ratings
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'configs')
+
+
+def test_ratings_order_and_intervals():
+    few = ratings(['a', 'b', 'c'], {('a', 'b'): (7, 10), ('b', 'c'): (6, 10), ('a', 'c'): (8, 10)})
+    many = ratings(['a', 'b', 'c'], {('a', 'b'): (70, 100), ('b', 'c'): (60, 100), ('a', 'c'): (80, 100)})
+    assert few['a'][0] > few['b'][0] > few['c'][0]
+    assert abs(sum(elo for elo, _ in few.values())) < 1e-6
+    assert all(many[p][1] < few[p][1] for p in 'abc')
+    # Even score -> equal ratings.
+    even = ratings(['a', 'b'], {('a', 'b'): (5, 10)})
+    assert abs(even['a'][0] - even['b'][0]) < 1e-6
+
+
+def test_sprt_decisions():
+    wins = SPRT(0, 30)
+    for _ in range(2):
+        wins.update(1.0)
+    assert wins.status() is None
+    while wins.status() is None:
+        wins.update(1.0)
+    assert wins.status() == 'H1' and wins.games < 20
+
+    losses = SPRT(0, 30)
+    while losses.status() is None:
+        losses.update(0.0)
+    assert losses.status() == 'H0'
+
+    even = SPRT(0, 30)
+    for score in [1.0, 0.0, 0.5] * 10:
+        even.update(score)
+    assert even.llr() < 0 and even.wdl == [10, 10, 10]
+
+
+def test_gate_stops_at_max_games(monkeypatch):
+    played = []
+
+    def draws(config, white, black, games, cache=None):
+        played.append(games)
+        return [0.5] * games
+
+    monkeypatch.setattr(arena, 'play_pairing', draws)
+    for max_games, expected in ((2, [1, 1]), (3, [2, 1]), (25, [10, 10, 3, 2])):
+        played.clear()
+        promoted, test = arena.gate({'threads': 10}, ('a',), ('b',), max_games=max_games)
+        assert not promoted and played == expected and test.games == max_games
+
+
+def test_tournament_caches_results(tmp_path):
+    with open(os.path.join(CONFIG_DIR, 'crude_chess.yaml')) as fh:
+        cfg = yaml.safe_load(fh)
+    cfg.update(threads=2, mcts={'simulations': 2, 'c_puct': 1.4})
+    players = {'material': {'name': 'material'}, 'pst': {'name': 'pst'}}
+    cache = tmp_path / 'tournament.json'
+
+    first = Tournament(cfg, players, games_per_pair=2, cache_path=cache)
+    assert sum(n for *_, n in first.schedule()) == 2
+    table = first.run()
+    assert set(table) == {'material', 'pst'}
+
+    players['mobility'] = {'name': 'mobility'}
+    again = Tournament(cfg, players, games_per_pair=2, cache_path=cache)
+    assert sorted((w, b) for w, b, _ in again.schedule()) == \
+        [('material', 'mobility'), ('mobility', 'material'), ('mobility', 'pst'), ('pst', 'mobility')]
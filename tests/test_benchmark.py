@@ -0,0 +1,38 @@
+import os, sys, json, importlib.util
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+spec = importlib.util.spec_from_file_location(
+    'benchmark', os.path.join(os.path.dirname(__file__), '..', 'scripts', 'benchmark.py'))
+benchmark = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(benchmark)
+
+
+def _result(median, spread=0.01):
+    return {'median': median, 'min': median, 'spread': spread, 'samples': [median]}
+
+
+def test_compare_flags_only_changes_beyond_noise(tmp_path, capsys):
+    old = {'tag': 'box', 'results': {'fast': _result(1.0), 'noisy': _result(1.0, spread=0.5), 'gone': _result(1.0)}}
+    new = {'tag': 'box', 'results': {'fast': _result(1.2), 'noisy': _result(1.3, spread=0.5), 'added': _result(1.0)}}
+    for name, data in (('old', old), ('new', new)):
+        (tmp_path / f'{name}.json').write_text(json.dumps(data))
+    args = SimpleNamespace(old=tmp_path / 'old.json', new=tmp_path / 'new.json', threshold=0.05)
+
+    assert benchmark.compare(args) == 1
+    out = capsys.readouterr().out
+    assert '1 regression(s)' in out
+    assert 'only in old' in out and 'only in new' in out
+
+    new['results']['fast'] = _result(0.5)
+    (tmp_path / 'new.json').write_text(json.dumps(new))
+    assert benchmark.compare(args) == 0
+    assert 'faster' in capsys.readouterr().out
+
+
+def test_measure_and_summarize():
+    samples = benchmark.measure(lambda: sum(range(100)), repeat=5, min_time=0.001)
+    stats = benchmark.summarize(samples)
+    assert len(samples) == 5 and stats['min'] <= stats['median']
+    assert stats['spread'] >= 0
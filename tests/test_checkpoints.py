@@ -0,0 +1,46 @@
+import os, sys
+
+import pytest
+import torch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import models.core as core
+from models.chess_value.network import ValueNetwork
+
+
+@pytest.fixture
+def model_root(tmp_path, monkeypatch):
+    # Point models/<type>/ at a scratch directory.
+    monkeypatch.setattr(core, "checkpoint_dir", lambda model_type: tmp_path / model_type / "checkpoints")
+    real = core.get_value_network
+    monkeypatch.setattr(core, "get_value_network",
+                        lambda model_type: (real(model_type)[0], tmp_path / model_type / "latest.pth"))
+    return tmp_path
+
+
+def test_save_publish_load_round_trip(model_root):
+    model = ValueNetwork(channels=8, blocks=1)
+    first = core.save_checkpoint("chess_value", model, cycle=1, loss=0.5, games=10)
+    second = core.save_checkpoint("chess_value", model, cycle=2, loss=0.4, games=20)
+    latest = core.publish_latest("chess_value", second)
+
+    index = core.read_index("chess_value")
+    assert index["latest"] == second.name
+    assert [e["cycle"] for e in index["checkpoints"]] == [1, 2]
+    assert core.list_checkpoints("chess_value") == [first, second]
+
+    loaded = core.load_model("chess_value", latest)
+    assert loaded.arch == {"channels": 8, "blocks": 1}
+    x = torch.randn(2, 17, 8, 8)
+    model.eval(), loaded.eval()
+    assert torch.allclose(model(x), loaded(x))
+
+
+def test_load_legacy_module_pickle(model_root):
+    model = ValueNetwork(channels=8, blocks=1).eval()
+    path = model_root / "legacy.pth"
+    torch.save(model, path)
+    loaded = core.load_model("chess_value", path).eval()
+    x = torch.randn(1, 17, 8, 8)
+    assert torch.allclose(model(x), loaded(x))
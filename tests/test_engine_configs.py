@@ -21,3 +21,104 @@ def test_engine_config_basic_move(cfg):
     assert len(moves) > 0
     mcts.get_move(eng.get_state(), eng.values[0], eng.policy, eng.backend, 1, eng.config['mcts']['c_puct'], 1)
 
+
+
+def test_harvest_matches_get_dataset():
+    import numpy as np
+    eng = Engine(os.path.join(CONFIG_DIR, 'connect4.yaml'))
+    for col in (0, 1, 0, 1, 0, 1, 0):
+        result = eng.play_move((col, 0))
+    assert result is not None and eng.history[0].result == result
+
+    states, labels = eng.get_dataset()
+    rows, harvested = eng.harvest(0, compact=True)
+    assert np.array_equal(eng.backend.compact_to_tensor(rows), states)
+    assert np.array_equal(harvested, labels)
+    assert len(eng.history[0]) == 0 and eng.history[0].result == result
+    assert len(eng.get_dataset()[0]) == 0
+
+
+def test_history_replays_moves():
+    import yaml
+    with open(os.path.join(CONFIG_DIR, 'crude_chess.yaml')) as fh:
+        cfg = yaml.safe_load(fh)
+    cfg.update(threads=1)
+    eng = Engine(cfg)
+    played = [eng.get_state()]
+    for _ in range(6):
+        key = sorted(eng.legal_moves())[0][0]
+        eng.play_move((key, None))          # the legal move with that key is played
+        played.append(eng.get_state())
+    with pytest.raises(ValueError):
+        eng.play_move(((0, 0, 7, 7), 0.0))
+
+    hist = eng.history[0]
+    assert len(hist) == 7 and len(hist.keys) == 6 * 4
+    replayed = eng.get_hist()
+    assert [bytes(s.board) for s in replayed] == [bytes(s.board) for s in played]
+    assert list(replayed[-1].hist_white) == list(played[-1].hist_white)
+
+    c4 = Engine(os.path.join(CONFIG_DIR, 'connect4.yaml'))
+    assert c4._is_legal((3, 0)) and not c4._is_legal((9, 0))
+    c4.play_move((3, 0))
+    assert c4.get_hist()[-1].board == c4.get_state().board
+
+
+def test_record_search_blends_targets():
+    import numpy as np
+    import yaml
+    with open(os.path.join(CONFIG_DIR, 'crude_chess.yaml')) as fh:
+        cfg = yaml.safe_load(fh)
+    cfg.update(threads=1, record_search=True, q_blend=0.5)
+    eng = Engine(cfg)
+
+    stats = mcts.search(eng.get_state(), eng.values[0], eng.policy, eng.backend, 40, 1.4)
+    assert len(stats['visits']) == len(stats['moves']) == len(eng.legal_moves())
+    assert sum(stats['visits']) == 40 and stats['move'] in stats['moves']
+
+    for _ in range(3):
+        eng.play_mcts(0, simulations=20)
+    hist = eng.history[0]
+    hist.result = 1
+    assert len(hist.visits) == len(hist.root_q) == 3
+    assert all(abs(float(v.astype(np.float32).sum()) - 1) < 1e-2 for v in hist.visits)
+
+    _, outcome = eng.get_dataset(q_blend=0.0)
+    _, blended, (flat, offsets) = eng.get_dataset(with_policy=True)
+    expected = outcome.copy()
+    expected[:3] = 0.5 * outcome[:3] + 0.5 * np.clip(np.array(hist.root_q, dtype=np.float32), -1, 1)
+    assert np.allclose(blended, expected)
+    assert offsets[-1] == len(flat) and offsets[4] == offsets[3]
+
+
+def test_profile_search_counters():
+    import yaml
+    from engine import metrics
+    with open(os.path.join(CONFIG_DIR, 'crude_chess.yaml')) as fh:
+        cfg = yaml.safe_load(fh)
+    cfg.update(threads=2, profile_search=True)
+    eng = Engine(cfg)
+
+    stats = mcts.search(eng.get_state(), eng.values[0], eng.policy, eng.backend, 64, 1.4, 16, profile=True)
+    prof = stats['profile']
+    assert prof['nodes'] == prof['expansions'] + 1 and prof['flushes'] == 4
+    assert prof['leaves'] == 64 and prof['slots'] == 64 and prof['max_depth'] >= 1
+    assert 'profile' not in mcts.search(eng.get_state(), eng.values[0], eng.policy, eng.backend, 8, 1.4)
+
+    before = metrics.counters()
+    eng.play_mcts_parallel([0, 1], simulations=32)
+    delta = metrics.delta(before)
+    assert delta['mcts.searches'] == 2 and delta['mcts.leaves'] == 64
+    assert 'mcts.fill' in metrics.summarize(delta, 1.0)
+
+
+def test_searcher_advance_defers_free():
+    eng = Engine(os.path.join(CONFIG_DIR, 'crude_chess.yaml'))
+    searcher = mcts.Searcher(eng.get_state(), eng.values[0], eng.policy, eng.backend, 1.4, 16)
+    searcher.run(512)
+    best = searcher.result()['move']
+    kept = searcher.result()['visits'][searcher.result()['moves'].index(best)]
+    assert searcher.advance(best, collect=False)
+    assert searcher.simulations == kept
+    assert searcher.collect() > 0 and searcher.collect() == 0
+    assert searcher.run(32) == 32
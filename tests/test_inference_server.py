@@ -0,0 +1,101 @@
+import os, sys, threading, time
+
+import numpy as np
+import pytest
+import torch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import models.core as core
+from engine.inference_server import InferenceServer
+from models.chess_value.network import ValueNetwork
+
+
+def test_threads_sharing_a_client_get_their_own_values(tmp_path):
+    torch.manual_seed(0)
+    net = ValueNetwork(channels=8, blocks=1)
+    path = tmp_path / 'net.pth'
+    torch.save({'state_dict': net.state_dict(), 'arch': net.arch}, path)
+    model = core.load_model('chess_value', path).eval()
+
+    rng = np.random.default_rng(0)
+    # Sizes that fill the ring unevenly, so releases come out of order.
+    jobs = [[rng.standard_normal((n, 17, 8, 8)).astype(np.float32) for n in rng.integers(1, 400, 6)]
+            for _ in range(6)]
+    results, errors = {}, []
+
+    with InferenceServer('chess_value', (17, 8, 8), path=str(path), slots=1024, batch_size=64) as server:
+        client = server.client(0)
+
+        def run(t):
+            try:
+                results[t] = [client.evaluate(x) for x in jobs[t]]
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=run, args=(t,)) for t in range(len(jobs))]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+
+    assert not errors and client._free == [(0, 1024)]
+    with torch.no_grad():
+        for t, arrays in enumerate(jobs):
+            for x, got in zip(arrays, results[t]):
+                want = model(torch.from_numpy(x)).reshape(-1).numpy()
+                assert np.allclose(got, want, atol=1e-4)
+
+
+def test_value_close_stops_its_server(tmp_path):
+    from engine.value_functions import Value
+    from engine.games.chess import chess_backend as cb
+
+    net = ValueNetwork(channels=8, blocks=1)
+    path = tmp_path / 'net.pth'
+    torch.save({'state_dict': net.state_dict(), 'arch': net.arch}, path)
+    value = Value('network_server', model_type='chess_value', path=str(path), slots=64, batch_size=8)
+    assert len(value.batch([cb.create_init_state()] * 3, backend=cb)) == 3
+    proc = value._server._proc
+    value.close()
+    assert value._server is None and not proc.is_alive()
+
+
+def test_failed_batch_raises_and_dead_server_does_not_hang(tmp_path):
+    net = ValueNetwork(channels=8, blocks=1)
+    path = tmp_path / 'net.pth'
+    torch.save({'state_dict': net.state_dict(), 'arch': net.arch}, path)
+
+    # Three planes where the net expects 17: the forward pass raises.
+    with InferenceServer('chess_value', (3, 8, 8), path=str(path), slots=64, batch_size=8) as server:
+        client = server.client(0)
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match='failed a batch'):
+                client.evaluate(np.zeros((4, 3, 8, 8), np.float32))
+        assert client._free == [(0, 64)]
+
+        server._proc.kill()
+        server._proc.join()
+        with pytest.raises(RuntimeError, match='has exited'):
+            client.evaluate(np.zeros((4, 3, 8, 8), np.float32))
+
+
+def test_bad_checkpoint_keeps_the_loaded_weights(tmp_path):
+    torch.manual_seed(0)
+    net = ValueNetwork(channels=8, blocks=1)
+    path = tmp_path / 'net.pth'
+    torch.save({'state_dict': net.state_dict(), 'arch': net.arch}, path)
+    x = np.random.default_rng(0).standard_normal((5, 17, 8, 8)).astype(np.float32)
+
+    with InferenceServer('chess_value', (17, 8, 8), path=str(path), slots=64, batch_size=8,
+                         reload_interval=0.05) as server:
+        client = server.client(0)
+        before = client.evaluate(x)
+        wider = ValueNetwork(channels=16, blocks=1)      # no longer fits the running net
+        # Replaced, as core.save_checkpoint does: the loaded weights map the old file.
+        torch.save({'state_dict': wider.state_dict(), 'arch': wider.arch}, tmp_path / 'wider.pth')
+        os.replace(tmp_path / 'wider.pth', path)
+        os.utime(path, (2_000_000, 2_000_000))
+        time.sleep(0.3)
+        assert server._proc.is_alive()
+        assert np.allclose(client.evaluate(x), before)
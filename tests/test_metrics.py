@@ -0,0 +1,44 @@
+import os, sys, json, importlib.util
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine import metrics
+
+
+def test_stage_record_has_rates_and_ratios(tmp_path):
+    path = metrics.configure(tmp_path / 'run.metrics.jsonl')
+    with metrics.stage('self-play', cycle=1):
+        metrics.add('games', 2)
+        metrics.add('nn.batches', 4)
+        metrics.add('nn.rows', 24)
+        metrics.add('nn.slots', 32)
+        metrics.add('cache.hits', 3)
+        metrics.add('cache.misses', 1)
+    metrics.emit('game_done', finished=1)
+
+    recs = [json.loads(line) for line in path.read_text().splitlines()]
+    stage = recs[0]
+    assert stage['event'] == 'stage' and stage['name'] == 'self-play' and stage['cycle'] == 1
+    assert stage['games'] == 2 and stage['games_per_s'] > 0
+    assert stage['nn.fill'] == 0.75 and stage['cache.hit_rate'] == 0.75
+    assert recs[1]['event'] == 'game_done' and recs[1]['finished'] == 1
+
+
+def test_dashboard_renders_from_records():
+    spec = importlib.util.spec_from_file_location(
+        'train_manager', os.path.join(os.path.dirname(__file__), '..', 'scripts', 'train_manager.py'))
+    tm = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(tm)
+
+    board = tm.Dashboard()
+    for rec in [
+        {'ts': 0, 'event': 'pid', 'pid': 42},
+        {'ts': 1, 'event': 'cycle_start', 'cycle': 2, 'total_cycles': 5, 'games_target': 10, 'sims': 100},
+        {'ts': 2, 'event': 'game_done', 'finished': 4, 'plies': 80},
+        {'ts': 3, 'event': 'stage', 'name': 'train', 'seconds': 2.0, 'train.samples_per_s': 500.0, 'cycle': 1},
+        {'ts': 4, 'event': 'checkpoint', 'cycle': 1, 'loss': 0.25},
+    ]:
+        board.feed(rec)
+    text = board.render('run.metrics.jsonl')
+    assert 'pid 42' in text and 'Cycle 2/5' in text and 'games 4/10' in text
+    assert 'train' in text and '500' in text and 'c1=0.2500' in text
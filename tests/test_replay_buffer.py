@@ -0,0 +1,62 @@
+import os, sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.replay_buffer import ReplayBuffer
+from engine.games.connect4 import c4_backend
+
+
+def _rows(n, start=0):
+    return np.arange(start, start + n, dtype=np.uint8).reshape(n, 1).repeat(3, axis=1)
+
+
+def test_ring_wraps_and_keeps_newest(tmp_path):
+    rb = ReplayBuffer(tmp_path, capacity=5, row_shape=(3,))
+    rb.add(_rows(4), np.zeros(4, np.float32), gen=rb.new_generation())
+    rb.add(_rows(3, 10), np.ones(3, np.float32), gen=rb.new_generation())
+
+    assert len(rb) == 5
+    rows, values = rb.fetch(np.arange(5))
+    assert sorted(rows[:, 0].tolist()) == [2, 3, 10, 11, 12]
+    assert values.sum() == 3
+
+
+def test_reopen_survives_restart(tmp_path):
+    rb = ReplayBuffer(tmp_path, capacity=8, row_shape=(3,))
+    gen = rb.new_generation()
+    rb.add(_rows(6), np.arange(6, dtype=np.float32), gen=gen)
+    del rb
+
+    rb = ReplayBuffer(tmp_path, capacity=8, row_shape=(3,))
+    assert len(rb) == 6 and rb.generation == gen
+    rows, values = rb.fetch(np.array([5, 0]))
+    assert rows[:, 0].tolist() == [5, 0] and values.tolist() == [5.0, 0.0]
+
+    with pytest.raises(ValueError):
+        ReplayBuffer(tmp_path, capacity=16, row_shape=(3,))
+
+
+def test_sample_excludes_generation_and_prefers_recent(tmp_path):
+    rb = ReplayBuffer(tmp_path, capacity=400, row_shape=(3,))
+    for _ in range(4):
+        rb.add(_rows(100), np.zeros(100, np.float32), gen=rb.new_generation())
+
+    rng = np.random.default_rng(0)
+    idx = rb.sample(150, decay=0.2, exclude_gen=4, rng=rng)
+    gens = rb.gens[idx]
+    assert len(idx) == 150 and len(set(idx.tolist())) == 150
+    assert 4 not in gens
+    assert (gens == 3).sum() > (gens == 1).sum()
+    assert rb.indices(4).tolist() == list(range(300, 400))
+
+
+def test_connect4_compact_round_trip():
+    state = c4_backend.create_init_state()
+    for col in (3, 3, 2, 4):
+        state = c4_backend.play_move(state, (col, 0))
+    rows = np.stack([c4_backend.state_to_compact(state)] * 2)
+    planes = c4_backend.compact_to_tensor(rows)
+    assert planes.shape == (2, 2, 6, 7)
+    assert np.array_equal(planes[1], c4_backend.state_to_tensor(state))
@@ -0,0 +1,84 @@
+import os, sys, threading, time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from engine.scheduler import InferenceScheduler
+import engine.mcts as mcts
+from engine.games.chess import chess_backend as cb
+from engine.policy_functions import Policy
+
+
+# Scores a state as float(state); records every batch it sees.
+class RecordingValue:
+    def __init__(self, delay=0.0, gate=None):
+        self.batches = []
+        self.delay = delay
+        self.gate = gate
+
+    def batch(self, states, **kwargs):
+        if self.gate is not None:
+            self.gate.wait()
+        time.sleep(self.delay)
+        self.batches.append(list(states))
+        return [float(s) if isinstance(s, int) else 0.0 for s in states]
+
+
+def test_running_lanes_share_batches():
+    value = RecordingValue(delay=0.002)
+    sched = InferenceScheduler(value, None, batch_size=64, max_wait=0.05)
+    results = {}
+
+    def search(i):
+        lane = sched.lane()
+        with lane.running():
+            results[i] = [lane.batch(list(range(i * 100, i * 100 + 8))) for _ in range(5)]
+
+    threads = [threading.Thread(target=search, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    sched.close()
+    assert all(r == [[float(x) for x in range(i * 100, i * 100 + 8)]] * 5 for i, r in results.items())
+    assert max(len(b) for b in value.batches) == 32
+    assert len(value.batches) < 20
+
+
+def test_order_priority_deadline_and_split():
+    gate = threading.Event()
+    value = RecordingValue(gate=gate)
+    sched = InferenceScheduler(value, None, batch_size=4, max_wait=0.0)
+    now = time.monotonic()
+    lanes = \
+    {
+        'first':  sched.lane(),
+        'ponder': sched.lane(priority=1),
+        'later':  sched.lane(deadline=now + 10),
+        'sooner': sched.lane(deadline=now + 5),
+        'none':   sched.lane(),
+    }
+    out = {}
+    threads = []
+    for name, states in (('first', [0]), ('ponder', [1, 1]), ('later', [2, 2]), ('sooner', [3, 3, 3, 3, 3]),
+                         ('none', [4])):
+        t = threading.Thread(target=lambda n=name, s=states: out.__setitem__(n, lanes[n].batch(s)))
+        t.start()
+        threads.append(t)
+        time.sleep(0.02)      # 'first' is taken alone; the rest queue behind it
+    gate.set()
+    for t in threads:
+        t.join()
+    sched.close()
+    assert value.batches == [[0], [3, 3, 3, 3], [3, 2, 2, 4], [1, 1]]
+    assert out['sooner'] == [3.0] * 5
+
+
+def test_searcher_through_lane():
+    value = RecordingValue()
+    sched = InferenceScheduler(value, cb, batch_size=64)
+    lane = sched.lane()
+    searcher = mcts.Searcher(cb.create_init_state(), lane, Policy(name='random'), cb, 1.4, 16)
+    assert searcher.run(64) == 64
+    sched.close()
+    assert sum(len(b) for b in value.batches) == 64
@@ -0,0 +1,58 @@
+import os, sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import yaml
+
+from engine.selfplay import SelfPlayPool, pack_game, unpack_game
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'configs')
+
+
+def test_pack_round_trip():
+    rows = np.random.randint(0, 13, size=(7, 69), dtype=np.uint8)
+    labels = np.array([-1, 1, -1, 1, -1, 1, -1], dtype=np.float32)
+    got_rows, got_labels = unpack_game(pack_game(rows, labels), (69,), np.uint8)
+    assert np.array_equal(got_rows, rows)
+    assert np.array_equal(got_labels, labels) and got_labels.dtype == np.float32
+
+
+def test_pool_plays_all_games():
+    with open(os.path.join(CONFIG_DIR, 'crude_chess.yaml')) as fh:
+        config = yaml.safe_load(fh)
+    config['threads'] = 1
+
+    games = []
+    with SelfPlayPool(config, workers=2) as pool:
+        played = pool.play(3, {'simulations': 2, 'c_puct': 1.4}, lambda rows, labels, wid: games.append((rows, labels, wid)))
+
+    assert played == 3 and len(games) == 3
+    assert {wid for _, _, wid in games} == {0, 1}
+    for rows, labels, _ in games:
+        assert rows.shape[1:] == pool.row_shape and len(rows) == len(labels)
+        assert labels[-1] in (-1.0, 0.0)
+
+
+def test_pool_reload_reaches_workers(tmp_path):
+    import torch
+    from models.chess_value.network import ValueNetwork
+
+    path = tmp_path / 'net.pth'
+    def publish(mtime):
+        net = ValueNetwork(channels=8, blocks=1)
+        torch.save({'state_dict': net.state_dict(), 'arch': net.arch}, path)
+        os.utime(path, (mtime, mtime))
+
+    publish(1_000_000)
+    with open(os.path.join(CONFIG_DIR, 'chess_value.yaml')) as fh:
+        config = yaml.safe_load(fh)
+    config.update(threads=1, value_function='network_at_path')
+    config['value'].update(path=str(path), batch_size=4)
+
+    with SelfPlayPool(config, workers=2) as pool:
+        assert pool.reload() == {0: [1_000_000], 1: [1_000_000]}
+        publish(2_000_000)
+        assert pool.reload() == {0: [2_000_000], 1: [2_000_000]}
+        assert pool.play(2, {'simulations': 2, 'c_puct': 1.4}, lambda *a: None) == 2
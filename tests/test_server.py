@@ -0,0 +1,253 @@
+import os, sys, json, time
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('CONFIG_PATH', os.path.join(ROOT, 'configs', 'crude_chess.yaml'))
+    import main
+    with TestClient(main.app) as c:
+        yield c
+
+
+def _events(client, job_id):
+    events = []
+    with client.stream('GET', f'/search/{job_id}/events') as resp:
+        event = None
+        for line in resp.iter_lines():
+            if line.startswith('event: '):
+                event = line[len('event: '):]
+            elif line.startswith('data: '):
+                events.append((event, json.loads(line[len('data: '):])))
+    return events
+
+
+def _new_game(client):
+    return client.post('/add_game').json()['idx']
+
+
+def test_games_have_opaque_ids(client):
+    a, b = _new_game(client), _new_game(client)
+    assert isinstance(a, str) and a != b
+    assert client.post('/play_move', json={'idx': a, 'move': [6, 4, 4, 4]}).status_code == 200
+    assert client.get(f'/state/{a}').json()['turn'] == 1
+    assert client.get(f'/state/{b}').json()['turn'] == 0
+    assert client.post('/play_move', json={'idx': b, 'move': [6, 4, 3, 4]}).status_code == 400
+    assert client.get('/state/0').status_code == 404
+    assert client.get('/legal_moves/nope').status_code == 404
+
+
+def test_play_mcts_runs_as_job(client):
+    idx = _new_game(client)
+    resp = client.post('/play_mcts', json={'idx': idx, 'simulations': 200})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body['turn'] == 1 and body['result'] is None
+
+
+def test_search_streams_progress_and_plays(client):
+    idx = _new_game(client)
+    job = client.post('/search', json={'idx': idx, 'simulations': 10**9, 'time_limit': 0.6}).json()
+    events = _events(client, job['job'])
+    kinds = [e for e, _ in events]
+    assert kinds[-1] == 'done' and kinds.count('progress') >= 2
+    progress = events[-2][1]
+    assert progress['simulations'] > 0 and progress['pv'] and progress['top'][0]['move'] == progress['move']
+    final = events[-1][1]
+    assert final['turn'] == 1
+    assert client.get(f"/search/{job['job']}").json()['status'] == 'done'
+
+
+def test_stop_plays_and_cancel_discards(client):
+    idx = _new_game(client)
+    job = client.post('/search', json={'idx': idx, 'simulations': 10**9}).json()
+    assert client.post('/search', json={'idx': idx}).status_code == 409
+    assert client.post('/play_move', json={'idx': idx, 'move': [6, 4, 4, 4]}).status_code == 409
+    client.post(f"/search/{job['job']}/stop")
+    assert _events(client, job['job'])[-1][0] == 'stopped'
+    assert client.get(f'/state/{idx}').json()['turn'] == 1
+
+    job = client.post('/search', json={'idx': idx, 'simulations': 10**9}).json()
+    client.delete(f"/search/{job['job']}")
+    assert _events(client, job['job'])[-1][0] == 'cancelled'
+    assert client.get(f'/state/{idx}').json()['turn'] == 1
+    assert client.get('/search/nope').status_code == 404
+
+
+def test_ponder_reuses_tree(client):
+    client.app.state.jobs.ponder = True
+    idx = _new_game(client)
+    client.post('/play_mcts', json={'idx': idx, 'simulations': 200})
+    game = client.app.state.sessions.get(idx)
+    time.sleep(0.5)
+    t0 = time.perf_counter()
+    assert client.post('/play_move', json={'idx': idx, 'move': [1, 4, 3, 4]}).status_code == 200
+    assert time.perf_counter() - t0 < 0.5
+    assert game.ponder is None and game.tree.simulations > 0
+
+    job = client.post('/search', json={'idx': idx, 'simulations': 100}).json()
+    final = _events(client, job['job'])[-1][1]
+    assert final['reused'] > 0 and final['simulations'] >= 100
+    assert game.ponder is not None
+
+    # A kept tree only serves a search with the same exploration constant.
+    reply = client.get(f'/legal_moves/{idx}').json()['moves'][0]
+    assert client.post('/play_move', json={'idx': idx, 'move': reply}).status_code == 200
+    assert game.tree.simulations > 0
+    job = client.post('/search', json={'idx': idx, 'simulations': 50, 'c': 2.0}).json()
+    final = _events(client, job['job'])[-1][1]
+    assert final['reused'] == 0 and final['simulations'] >= 50
+
+
+def test_taken_ponder_tree_is_left_alone(client):
+    import threading
+    import engine.mcts as mcts
+    from engine.search_jobs import Ponder
+
+    class Spy:
+        def __init__(self, inner):
+            self.inner, self.calls = inner, []
+
+        def __getattr__(self, name):
+            self.calls.append(name)
+            return getattr(self.inner, name)
+
+    eng = client.app.state.jobs.engine
+    searcher = Spy(mcts.Searcher(eng.backend.create_init_state(), eng.values[0], eng.policy, eng.backend, 1.4, 32))
+    ponder = Ponder(searcher, 10**9)
+    threading.Thread(target=ponder.run).start()
+    time.sleep(0.1)
+    assert ponder.stop() is searcher and searcher.inner.simulations > 0   # taken, as by GameSession.take_tree
+    # A later stop (another game's ponder preempting this one) must not
+    # touch the tree a job may now be running.
+    searcher.calls.clear()
+    assert ponder.stop() is searcher and searcher.calls == []
+
+
+def test_preempted_ponder_drops_its_tree(client):
+    import engine.mcts as mcts
+    jobs = client.app.state.jobs
+    eng = jobs.engine
+    games = [client.app.state.sessions.get(_new_game(client)) for _ in range(2)]
+    for game in games:
+        with game.lock:
+            game.tree = mcts.Searcher(game.state, eng.values[0], eng.policy, eng.backend, 1.4, 32)
+            jobs._start_ponder(game)
+    older, newer = games
+    assert jobs.ponder_workers == 1 and older.ponder.searcher is None and older.take_tree() is None
+    assert newer.take_tree() is not None
+
+
+def test_stop_before_first_slice_still_plays(client):
+    import engine.mcts as mcts
+    from engine.search_jobs import SearchJob
+    jobs = client.app.state.jobs
+    game = client.app.state.sessions.get(_new_game(client))
+    eng = jobs.engine
+    # A stop that reached the searcher after the job took it but before
+    # the first slice ran.
+    game.tree = mcts.Searcher(game.state, eng.values[0], eng.policy, eng.backend, 1.4, 32)
+    game.tree.stop()
+    job = SearchJob(game, simulations=100, c=1.4, time_limit=0.0, play=True)
+    job._stop.set()
+    event, data = jobs._search(job)
+    assert event == 'stopped' and data['move'] is not None and len(game.moves) == 1
+
+    # Another stop landing between clearing the flag and the single run.
+    class StopsAfterClear:
+        def __init__(self, inner):
+            self.inner, self.cleared = inner, False
+
+        def __getattr__(self, name):
+            return getattr(self.inner, name)
+
+        def run(self, simulations, time_limit=0.0):
+            done = self.inner.run(simulations, time_limit)
+            if simulations == 0 and not self.cleared:
+                self.cleared = True
+                self.inner.stop()
+            return done
+
+    game.tree = StopsAfterClear(mcts.Searcher(game.state, eng.values[0], eng.policy, eng.backend, 1.4, 32))
+    job = SearchJob(game, simulations=100, c=1.4, time_limit=0.0, play=True)
+    job._stop.set()
+    event, data = jobs._search(job)
+    assert event == 'stopped' and data['move'] is not None and len(game.moves) == 2
+
+
+def test_search_does_not_play_on_a_moved_game(client):
+    jobs = client.app.state.jobs
+    idx = _new_game(client)
+    game = client.app.state.sessions.get(idx)
+    job = jobs.start(game, simulations=10**7)
+    assert client.post('/play_move', json={'idx': idx, 'move': [6, 4, 4, 4]}).status_code == 409
+    with game.lock:         # a move that got past the check before the job started
+        game.play((6, 4, 4, 4))
+    job.stop()
+    assert job.join(10) and job.status == 'failed' and 'moved on' in job.snapshot()['result']['error']
+    assert game.moves == [(6, 4, 4, 4)]
+
+
+def test_waiting_on_a_game_lock_leaves_the_event_loop_free(client):
+    import threading
+    idx = _new_game(client)
+    game = client.app.state.sessions.get(idx)
+    done = []
+    with game.lock:
+        waiting = threading.Thread(target=lambda: done.append(
+            client.post('/play_mcts', json={'idx': idx, 'simulations': 20}).status_code))
+        waiting.start()
+        time.sleep(0.2)
+        # An async endpoint still answers while /play_mcts waits for the lock.
+        fen = '6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1'
+        assert client.post('/analyse', json={'position': fen, 'simulations': 20}).status_code == 200
+        assert not done
+    waiting.join(10)
+    assert done == [200]
+
+
+def test_compact_view_and_incremental_moves(client, monkeypatch):
+    idx = _new_game(client)
+    body = client.post('/play_move', json={'idx': idx, 'move': [6, 4, 4, 4], 'view': 'compact'}).json()
+    assert body == {'idx': idx, 'ply': 1, 'result': None, 'last': [6, 4, 4, 4],
+                    'position': 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1'}
+    client.post('/play_move', json={'idx': idx, 'move': [1, 4, 3, 4]})
+    assert client.get(f'/state/{idx}?since=1').json()['moves'] == [[1, 4, 3, 4]]
+    assert client.get(f'/state/{idx}?since=2').json()['moves'] == []
+    assert client.get(f'/state/{idx}?since=3').status_code == 400
+    assert client.get(f'/state/{idx}?view=tiny').status_code == 400
+
+    from engine import wire
+    monkeypatch.setattr(wire, 'msgpack', None)
+    assert client.get(f'/state/{idx}', headers={'Accept': 'application/msgpack'}).status_code == 406
+
+
+def test_msgpack_encoding(client):
+    msgpack = pytest.importorskip('msgpack')
+    idx = _new_game(client)
+    resp = client.get(f'/state/{idx}?view=compact', headers={'Accept': 'application/msgpack'})
+    assert resp.headers['content-type'] == 'application/msgpack'
+    assert msgpack.unpackb(resp.content)['ply'] == 0
+
+
+def test_analyse_caches_and_deepens(client):
+    from engine import metrics
+    fen = '6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1'
+    before = metrics.counters()
+    first = client.post('/analyse', json={'position': fen, 'simulations': 300}).json()
+    assert first['cached'] is False and first['simulations'] >= 300 and first['pv'][0] == first['move']
+    again = client.post('/analyse', json={'position': fen.replace(' 0 1', ''), 'simulations': 200}).json()
+    assert again['cached'] is True and again['move'] == first['move'] and again['pv'] == first['pv']
+    deeper = client.post('/analyse', json={'position': fen, 'simulations': 600}).json()
+    assert deeper['cached'] is False and deeper['reused'] >= 300 and deeper['simulations'] >= 600
+    delta = metrics.delta(before)
+    assert delta['analysis.hits'] == 1 and delta['analysis.misses'] == 2
+    assert client.post('/analyse', json={'position': 'not a fen'}).status_code == 400
+    assert client.post('/analyse', json={'position': 'xxxxxxxx/8/8/8/8/8/8/8 w - - 0 1'}).status_code == 400
@@ -0,0 +1,75 @@
+import os, sys, threading, time
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from engine.engine import Engine
+from engine.sessions import SessionStore
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return Engine(os.path.join(ROOT, 'configs', 'crude_chess.yaml'))
+
+
+def test_lru_eviction_persists_and_restores(engine, tmp_path):
+    store = SessionStore(engine, max_sessions=2, persist_dir=tmp_path)
+    a = store.create()
+    with store.use(a.id) as game:
+        game.play((6, 4, 4, 4))
+        game.play((1, 4, 3, 4))
+    b, c = store.create(), store.create()
+    assert len(store) == 2 and a.evicted and (tmp_path / f'{a.id}.json').exists()
+
+    with store.use(a.id) as game:
+        assert game is not a and game.moves == [(6, 4, 4, 4), (1, 4, 3, 4)]
+        assert game.state.board == a.state.board and game.state.turn == 0
+    assert not (tmp_path / f'{a.id}.json').exists()
+    with pytest.raises(KeyError):
+        store.get('../etc')
+
+
+def test_idle_and_busy_games(engine):
+    store = SessionStore(engine, idle_timeout=0.05)
+    idle, busy, pinned = store.create(), store.create(), store.create()
+    pinned.pins += 1
+    time.sleep(0.1)
+    held, done = threading.Event(), threading.Event()
+
+    def hold():
+        with busy.lock:
+            held.set()
+            done.wait()
+
+    t = threading.Thread(target=hold)
+    t.start()
+    held.wait()
+    store.sweep()
+    done.set()
+    t.join()
+    assert idle.evicted and not busy.evicted and not pinned.evicted
+    with pytest.raises(KeyError):
+        store.get(idle.id)
+
+
+def test_concurrent_moves_on_one_game(engine):
+    store = SessionStore(engine)
+    game = store.create()
+    errors = []
+
+    def play(key):
+        try:
+            with store.use(game.id) as g:
+                g.play(key)
+        except ValueError as e:
+            errors.append(e)
+
+    # Both threads try white's first move; exactly one gets it.
+    threads = [threading.Thread(target=play, args=((6, c, 4, c),)) for c in (3, 4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(game.moves) == 1 and len(errors) == 1
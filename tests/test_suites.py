@@ -0,0 +1,38 @@
+import os, sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.games.chess import chess_backend as cb
+from engine.games.connect4 import c4_backend as c4
+from engine.suites import load_suite, move_text
+
+SUITE_DIR = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'suites')
+
+
+def test_chess_epd_moves(tmp_path):
+    path = tmp_path / 'mini.epd'
+    path.write_text('# comment\n'
+                    '6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - bm Ra8#; id "back rank";\n'
+                    '4k3/8/8/3q4/4P3/8/8/4K3 w - - 0 1 bm e4d5; am Ke2;\n')
+    first, second = load_suite(path, cb)
+    assert first.id == 'back rank' and [move_text(cb, m) for m in first.best_moves] == ['a1a8']
+    assert second.id == 'mini.2' and second.best_moves[0][0] == (4, 4, 3, 3)
+    assert not second.solved_by(second.avoid_moves[0])
+
+    path.write_text('4k3/8/8/8/8/8/8/4K3 w - - bm Qd1;\n')
+    with pytest.raises(ValueError, match='mini.epd:1'):
+        load_suite(path, cb)
+
+
+def test_connect4_suite():
+    positions = load_suite(os.path.join(SUITE_DIR, 'connect4.txt'), c4)
+    win = positions[0]
+    assert win.best_moves == [(0, 0)]
+    assert sum(cell != ' ' for row in win.state.board for cell in row) == 6
+    assert win.solved_by((0, 0)) and not win.solved_by((1, 0))
+
+
+def test_shipped_chess_suite_loads():
+    assert len(load_suite(os.path.join(SUITE_DIR, 'chess.epd'), cb)) == 6
@@ -0,0 +1,60 @@
+import os, sys, json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import yaml
+
+from engine import tracing
+from engine.engine import Engine
+from engine.selfplay import SelfPlayPool
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'configs')
+
+
+def _load(path):
+    return json.loads(path.read_text())['traceEvents']
+
+
+def test_spans_from_threads(tmp_path):
+    assert tracing.span('off') is tracing.span('off too')       # disabled: one shared no-op
+    with open(os.path.join(CONFIG_DIR, 'connect4.yaml')) as fh:
+        cfg = yaml.safe_load(fh)
+    cfg['threads'] = 2
+    eng = Engine(cfg)
+
+    tracing.configure(tmp_path / 'run.trace.json')
+    try:
+        for _ in range(2):
+            eng.play_mcts_parallel([0, 1], simulations=8)
+        path = tracing.write()
+    finally:
+        tracing.disable()
+
+    events = _load(path)
+    spans = [e for e in events if e['ph'] == 'X']
+    names = {e['name'] for e in spans}
+    assert {'engine.play_mcts', 'value.batch'} <= names
+    assert all(e['dur'] >= 0 and e['args']['cpu_ms'] >= 0 for e in spans)
+    threads = {e['args']['name'] for e in events if e['name'] == 'thread_name'}
+    assert any(t.startswith('play-mcts') for t in threads)
+    plies = [e for e in spans if e['name'] == 'engine.play_mcts']
+    assert len(plies) == 4 and {e['args']['game'] for e in plies} == {0, 1}
+
+
+def test_worker_spans_reach_parent(tmp_path):
+    with open(os.path.join(CONFIG_DIR, 'crude_chess.yaml')) as fh:
+        config = yaml.safe_load(fh)
+    config['threads'] = 1
+
+    tracing.configure(tmp_path / 'pool.trace.json')
+    try:
+        with SelfPlayPool(config, workers=1) as pool:
+            pool.play(1, {'simulations': 2, 'c_puct': 1.4}, lambda *a: None)
+        events = _load(tracing.write())
+    finally:
+        tracing.disable()
+
+    worker = {e['pid'] for e in events if e['name'] == 'engine.play_mcts'}
+    assert worker and os.getpid() not in worker
+    procs = {e['args']['name'] for e in events if e['name'] == 'process_name'}
+    assert 'self-play-0' in procs
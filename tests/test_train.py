@@ -0,0 +1,155 @@
+import importlib.util, os, sys, threading
+
+import pytest
+import torch
+import yaml
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import models.core as core
+from models.chess_value.network import ValueNetwork
+
+
+@pytest.fixture(scope='module')
+def train(tmp_path_factory):
+    # Importing the script opens its log file under ./logs and tees stdout.
+    cwd, out, err = os.getcwd(), sys.stdout, sys.stderr
+    os.chdir(tmp_path_factory.mktemp('run'))
+    try:
+        spec = importlib.util.spec_from_file_location('train', os.path.join(ROOT, 'scripts', 'train.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+        sys.stdout, sys.stderr = out, err
+    yield module
+    module.STOP_REQUESTED.clear()
+
+
+@pytest.fixture
+def model_root(tmp_path, monkeypatch):
+    # models/chess_value/ in a scratch directory, seeded with a small net.
+    monkeypatch.setattr(core, 'checkpoint_dir', lambda model_type: tmp_path / model_type / 'checkpoints')
+    real = core.get_value_network
+    monkeypatch.setattr(core, 'get_value_network',
+                        lambda model_type: (real(model_type)[0], tmp_path / model_type / 'latest.pth'))
+    core.publish_latest('chess_value', core.save_checkpoint('chess_value', ValueNetwork(channels=8, blocks=1)))
+    return tmp_path
+
+
+# Native evaluator for self-play, so the runs are quick; the net it trains
+# is chess_value.
+@pytest.fixture
+def config(tmp_path):
+    with open(os.path.join(ROOT, 'configs', 'crude_chess.yaml')) as fh:
+        cfg = yaml.safe_load(fh)
+    cfg.update(threads=1, value={'model_type': 'chess_value', 'batch_size': 64})
+    path = tmp_path / 'tiny.yaml'
+    path.write_text(yaml.safe_dump(cfg))
+    return str(path)
+
+
+RUN = dict(cycles=2, batch_size=64, epochs=1, games_cap=2, sims_cap=2, replay_capacity=100_000, snapshot_every=1)
+
+
+def _cycles(model_root):
+    return [e.get('cycle') for e in core.read_index('chess_value')['checkpoints']]
+
+
+def test_stop_and_resume(train, model_root, config, monkeypatch):
+    replay_dir = model_root / 'replay'
+    save, play = train._save_snapshot, train.simulate_games
+    requested = []
+
+    # Stop after the first game of the second cycle.
+    def snapshot(replay, **state):
+        save(replay, **state)
+        if (state['cycle'], state['phase'], state['games_done']) == (1, 'selfplay', 1):
+            train.STOP_REQUESTED.set()
+
+    def simulate(engine, total_games, *args, **kwargs):
+        requested.append(total_games)
+        return play(engine, total_games, *args, **kwargs)
+
+    monkeypatch.setattr(train, '_save_snapshot', snapshot)
+    monkeypatch.setattr(train, 'simulate_games', simulate)
+    try:
+        train.full_training_run(config, replay_dir=str(replay_dir), **RUN)
+    finally:
+        train.STOP_REQUESTED.clear()
+
+    snap = torch.load(replay_dir / 'trainer_state.pt', weights_only=False)
+    assert (snap['mode'], snap['cycle'], snap['phase'], snap['games_done'], snap['generation']) == \
+        ('full', 1, 'selfplay', 1, 2)
+    assert requested == [2, 2] and _cycles(model_root) == [None, 1]
+    stopped = train._open_replay(train._make_engine(config), replay_dir, RUN['replay_capacity'])
+    head, total, rows = stopped.meta['head'], stopped.meta['total'], len(stopped.indices(2))
+    assert rows > 0 and head == total
+
+    requested.clear()
+    train.full_training_run(config, replay_dir=str(replay_dir), resume=True, **RUN)
+
+    # The second cycle went on in the same generation with the game it lacked.
+    assert requested == [1] and _cycles(model_root) == [None, 1, 2]
+    snap = torch.load(replay_dir / 'trainer_state.pt', weights_only=False)
+    assert (snap['cycle'], snap['phase'], snap['generation']) == (2, 'start', 2)
+    resumed = train._open_replay(train._make_engine(config), replay_dir, RUN['replay_capacity'])
+    assert resumed.generation == 2 and resumed.meta['total'] > total and len(resumed.indices(2)) > rows
+
+
+def test_pipelined_run(train, model_root, config, monkeypatch):
+    replay_dir = model_root / 'replay'
+    pick, reload = train._replay_indices, train._reload_values
+    picked, swaps = [], []
+
+    def replay_indices(replay, gen, **kwargs):
+        idx = pick(replay, gen, **kwargs)
+        fresh = int((replay.gens[idx] == gen).sum())
+        picked.append((kwargs['max_fresh'], fresh, len(replay.indices(gen))))
+        return idx
+
+    monkeypatch.setattr(train, '_replay_indices', replay_indices)
+    monkeypatch.setattr(train, '_reload_values', lambda *a, **k: swaps.append(reload(*a, **k)))
+    train.pipelined_training_run(config, replay_dir=str(replay_dir), **RUN)
+
+    assert not any(t.name == 'self-play-actor' for t in threading.enumerate())
+    assert _cycles(model_root) == [None, 1, 2] and len(swaps) == 2
+    # Training takes the target's worth of fresh rows, however many the
+    # actor added meanwhile.
+    assert len(picked) == 2
+    for max_fresh, fresh, stored in picked:
+        assert max_fresh and fresh == min(max_fresh, stored)
+    snap = torch.load(replay_dir / 'trainer_state.pt', weights_only=False)
+    assert (snap['mode'], snap['cycle'], snap['phase']) == ('pipelined', 2, 'start')
+
+
+def test_gate_promotes_or_keeps_latest(train, model_root):
+    latest = model_root / 'chess_value' / 'latest.pth'
+    batches = [(torch.randn(8, 17, 8, 8), torch.rand(8))]
+    seen = []
+
+    def gate(verdict):
+        def run(candidate):
+            seen.append(candidate.name)
+            return verdict
+        return run
+
+    before = latest.read_bytes()
+    train.train_and_save_latest('chess_value', batches, epochs=1, gate=gate(False))
+    index = core.read_index('chess_value')
+    rejected = index['checkpoints'][-1]
+    assert seen == [rejected['file']] and rejected['promoted'] is False
+    assert latest.read_bytes() == before and index['latest'] != rejected['file']
+
+    train.train_and_save_latest('chess_value', batches, epochs=1, gate=gate(True))
+    index = core.read_index('chess_value')
+    promoted = index['checkpoints'][-1]
+    assert seen[-1] == promoted['file'] and promoted['promoted'] is True
+    assert index['latest'] == promoted['file']
+    assert latest.read_bytes() == (model_root / 'chess_value' / 'checkpoints' / promoted['file']).read_bytes()
+
+    # The first net has no incumbent to play.
+    latest.unlink()
+    train.train_and_save_latest('chess_value', batches, epochs=1, gate=gate(False))
+    assert len(seen) == 2 and latest.exists()
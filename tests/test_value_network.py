@@ -0,0 +1,59 @@
+import os, sys
+
+import torch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.chess_value.network import ValueNetwork, train
+
+
+def test_train_accepts_plain_batches():
+    torch.manual_seed(0)
+    model = ValueNetwork(channels=8, blocks=1)
+    batches = [(torch.randn(16, 17, 8, 8), torch.rand(16) * 2 - 1) for _ in range(4)]
+    loss = train(model, batches, epochs=2, lr=1e-3, device='cpu', bf16=True)
+    assert isinstance(loss, float) and loss > 0
+
+
+def test_train_reports_through_hooks():
+    import contextlib, subprocess
+    steps, epochs = [], []
+
+    def span(name, **args):
+        steps.append((name, args['rows']))
+        return contextlib.nullcontext()
+
+    model = ValueNetwork(channels=8, blocks=1)
+    batches = [(torch.randn(16, 17, 8, 8), torch.rand(16)) for _ in range(3)]
+    train(model, batches, epochs=2, device='cpu', span=span, on_epoch=lambda *counts: epochs.append(counts))
+    assert steps == [('train.step', 16)] * 6 and epochs == [(48, 3)] * 2
+
+    # The model package stands on its own: engine is not imported.
+    code = "import sys; import models.chess_value.network; print(any(m.startswith('engine') for m in sys.modules))"
+    root = os.path.join(os.path.dirname(__file__), '..')
+    out = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == 'False'
+
+
+def test_warm_start_loads_in_background(tmp_path):
+    from engine.value_functions import Value
+    from engine.games.chess import chess_backend as cb
+
+    path = tmp_path / 'net.pth'
+    net = ValueNetwork(channels=8, blocks=1)
+    torch.save({'state_dict': net.state_dict(), 'arch': net.arch}, path)
+    value = Value('network_at_path', model_type='chess_value', path=str(path), batch_size=4, warm_start=True)
+    try:
+        value.warm_up(cb)
+        assert value._ready.is_set() and value._load_error is None
+        assert len(value.batch([cb.create_init_state()] * 3, backend=cb)) == 3
+    finally:
+        value.close()
+
+
+def test_native_configs_do_not_import_torch():
+    import subprocess
+    code = "import sys; from engine.engine import Engine; Engine('configs/crude_chess.yaml'); print('torch' in sys.modules)"
+    root = os.path.join(os.path.dirname(__file__), '..')
+    out = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == 'False'
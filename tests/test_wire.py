@@ -0,0 +1,38 @@
+import os, sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine import wire
+from engine.games.chess import chess_backend as cb
+from engine.games.connect4 import c4_backend as c4
+
+
+def test_fen_round_trip():
+    start = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+    assert wire.position_text(cb, cb.create_init_state()) == start
+    fen = 'r3k2r/8/8/8/8/8/8/4K2R b Kkq - 7 30'
+    state = wire.parse_position(cb, fen)
+    assert state.turn == 1 and state.fifty_move_rule_counter == 7
+    assert wire.position_text(cb, state, ply=59) == fen
+    assert list(wire.parse_position(cb, '6k1/5ppp/8/8/8/8/5PPP/R5K1 w - -').board) == \
+        list(cb.state_from_fen('6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1').board)
+    for bad in ('rnbqkbnr/pppppppp w KQkq - 0 1',
+                'xxxxxxxx/8/8/8/8/8/8/8 w - - 0 1',
+                'rnbqkbnr/ppppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+                'rnbqkbnr/pppppppp/7/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+                '8/8/8/8/8/8/8/8 w - - 0 1',
+                'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkx - 0 1',
+                'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - x 1'):
+        with pytest.raises(ValueError):
+            wire.parse_position(cb, bad)
+
+
+def test_connect4_columns():
+    state = wire.parse_position(c4, '445')
+    assert wire.position_text(c4, state) == '///XO/X//' and state.turn == 1
+    assert wire.parse_position(c4, '///XO/X//') == state
+    assert wire.position_text(c4, c4.create_init_state()) == '//////'
+    with pytest.raises(ValueError):
+        wire.parse_position(c4, 'OO//////')